@@ -1,9 +1,30 @@
 """
 Module DatetimeEventStore pour stocker et récupérer des événements associés à des dates.
+
+Les classes exportées sont importées au premier accès (PEP 562): importer le
+paquet, ou un module sans dépendance comme `formats`, ne charge pas pymongo.
 """
 
-from .event_store import DatetimeEventStore
+import importlib
+
+__version__ = '0.1.0'
+
+_LAZY_EXPORTS = {
+    "DatetimeEventStore": ".event_store",
+    "Event": ".event_store",
+}
+
+__all__ = list(_LAZY_EXPORTS)
+
+
+def __getattr__(name):
+    module = _LAZY_EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
 
-from .event_store import Event
 
-__version__ = '0.1.0'
\ No newline at end of file
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_EXPORTS))
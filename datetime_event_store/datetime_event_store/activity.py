@@ -0,0 +1,58 @@
+"""
+Réponses de MongoDB reçues pendant une opération.
+
+Le DatetimeEventStore écoute les commandes de son client MongoDB: chaque
+commande aboutie est comptée dans le suivi de l'opération en cours, ouvert par
+`track()`. Un appelant sait ainsi si l'opération a réellement obtenu une
+réponse de MongoDB, ou si elle a été servie sans lui (fenêtre en mémoire, cache
+ou lecture partagée de l'API).
+
+Comme l'échéance (module deadline), le suivi est porté par une variable de
+contexte: il suit l'opération dans le pool de threads de l'API et dans les
+lectures parallèles. Ce module n'importe pas pymongo.
+"""
+
+import contextlib
+import contextvars
+from typing import Iterator
+
+
+class Activity:
+    """
+    Compteur des réponses de MongoDB d'une opération.
+    """
+
+    def __init__(self):
+        self.replies = 0
+
+    @property
+    def contacted(self) -> bool:
+        """
+        Indique si MongoDB a répondu à au moins une commande de l'opération.
+        """
+        return self.replies > 0
+
+
+_activity: contextvars.ContextVar = contextvars.ContextVar("datetime_event_store_activity", default=None)
+
+
+@contextlib.contextmanager
+def track() -> Iterator[Activity]:
+    """
+    Compte les réponses de MongoDB reçues par les opérations du bloc.
+    """
+    activity = Activity()
+    token = _activity.set(activity)
+    try:
+        yield activity
+    finally:
+        _activity.reset(token)
+
+
+def record_reply() -> None:
+    """
+    Compte une réponse de MongoDB dans le suivi de l'opération en cours, s'il y en a un.
+    """
+    activity = _activity.get()
+    if activity is not None:
+        activity.replies += 1
@@ -0,0 +1,147 @@
+"""
+Comptes approximatifs: estimation par échantillonnage et esquisse HyperLogLog.
+"""
+
+import hashlib
+import math
+from typing import Iterable, Optional
+
+Z_95 = 1.96
+
+
+class ApproximateCount(int):
+    """
+    Compte retourné en mode approximatif, utilisable comme un entier.
+
+    Attributes:
+        error_bound: Demi-largeur de l'intervalle de confiance à 95% (0 si le compte est exact)
+        exact: True si la valeur a pu être calculée exactement à moindre coût
+    """
+
+    def __new__(cls, value: int, error_bound: int = 0, exact: bool = False):
+        count = super().__new__(cls, value)
+        count.error_bound = error_bound
+        count.exact = exact
+        return count
+
+    def __repr__(self) -> str:
+        if self.exact:
+            return f"ApproximateCount({int(self)}, exact)"
+        return f"ApproximateCount({int(self)} ± {self.error_bound})"
+
+
+def estimate_from_sample(hits: int, sample_size: int, population: int) -> ApproximateCount:
+    """
+    Extrapole un compte à partir de la proportion d'un échantillon aléatoire qui correspond au filtre.
+
+    La borne d'erreur est la demi-largeur de l'intervalle de Wilson à 95%, qui
+    reste non nulle lorsque l'échantillon ne contient aucune correspondance.
+
+    Args:
+        hits: Nombre de documents de l'échantillon correspondant au filtre
+        sample_size: Taille de l'échantillon
+        population: Nombre total de documents échantillonnés
+
+    Returns:
+        ApproximateCount: Compte estimé et sa borne d'erreur
+    """
+    if sample_size <= 0:
+        return ApproximateCount(0, population)
+
+    p = hits / sample_size
+    z2 = Z_95 * Z_95
+    half_width = (Z_95 * math.sqrt(p * (1 - p) / sample_size + z2 / (4 * sample_size * sample_size))
+                  / (1 + z2 / sample_size))
+    return ApproximateCount(round(p * population), math.ceil(half_width * population))
+
+
+class HyperLogLog:
+    """
+    Esquisse de cardinalité HyperLogLog, fusionnable entre fenêtres.
+
+    Avec la précision par défaut (2^12 registres, 4 Ko), l'erreur type
+    relative est d'environ 1,6%.
+    """
+
+    def __init__(self, precision: int = 12, registers: Optional[bytes] = None):
+        """
+        Initialise une esquisse vide.
+
+        Args:
+            precision: Nombre de bits d'indexation des registres (entre 4 et 16)
+            registers: Contenu des registres, pour recharger une esquisse sérialisée (optionnel)
+        """
+        if not 4 <= precision <= 16:
+            raise ValueError("La précision doit être comprise entre 4 et 16")
+
+        self.precision = precision
+        self.size = 1 << precision
+        self.registers = bytearray(registers) if registers is not None else bytearray(self.size)
+        if len(self.registers) != self.size:
+            raise ValueError("Le nombre de registres ne correspond pas à la précision")
+
+    def add(self, value: str) -> None:
+        """
+        Ajoute une valeur à l'esquisse.
+        """
+        digest = int.from_bytes(hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest(), "big")
+        index = digest >> (64 - self.precision)
+        rest = digest & ((1 << (64 - self.precision)) - 1)
+        rank = (64 - self.precision) - rest.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def update(self, values: Iterable[str]) -> "HyperLogLog":
+        """
+        Ajoute plusieurs valeurs à l'esquisse.
+        """
+        for value in values:
+            self.add(value)
+        return self
+
+    def merge(self, other: "HyperLogLog") -> "HyperLogLog":
+        """
+        Fusionne une autre esquisse (de même précision) dans celle-ci.
+        """
+        if other.precision != self.precision:
+            raise ValueError("Impossible de fusionner des esquisses de précisions différentes")
+        self.registers = bytearray(max(a, b) for a, b in zip(self.registers, other.registers))
+        return self
+
+    @property
+    def relative_error(self) -> float:
+        """
+        Erreur type relative de l'estimation.
+        """
+        return 1.04 / math.sqrt(self.size)
+
+    def count(self) -> ApproximateCount:
+        """
+        Estime le nombre de valeurs distinctes ajoutées.
+
+        Returns:
+            ApproximateCount: Cardinalité estimée, avec une borne d'erreur à deux erreurs types
+        """
+        alpha = 0.7213 / (1 + 1.079 / self.size)
+        raw = alpha * self.size * self.size / sum(2.0 ** -r for r in self.registers)
+
+        zeros = self.registers.count(0)
+        if raw <= 2.5 * self.size and zeros:
+            estimate = self.size * math.log(self.size / zeros)
+        else:
+            estimate = raw
+
+        return ApproximateCount(round(estimate), math.ceil(2 * self.relative_error * estimate))
+
+    def to_bytes(self) -> bytes:
+        """
+        Sérialise l'esquisse (un octet de précision suivi des registres).
+        """
+        return bytes([self.precision]) + bytes(self.registers)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "HyperLogLog":
+        """
+        Recharge une esquisse sérialisée avec `to_bytes`.
+        """
+        return cls(precision=data[0], registers=data[1:])
@@ -0,0 +1,183 @@
+"""
+Interface en ligne de commande du DatetimeEventStore.
+
+Exemples:
+    datetime-event-store --db my_events_db export --start 2023-01-01 --end 2023-12-31 -f parquet -o events.parquet
+    datetime-event-store --db other_db import -f parquet -i events.parquet
+    datetime-event-store --db my_events_db rebuild-rollups --start 2023-01-01 --end 2023-12-31
+    datetime-event-store --db my_events_db migrate-schema --target 2 --batch-size 1000
+    datetime-event-store loadtest --app-dir fastApi --duration 30 --rate 200
+"""
+
+import argparse
+import datetime
+import sys
+from typing import TYPE_CHECKING, List, Optional
+
+from . import formats
+
+if TYPE_CHECKING:
+    from .event_store import DatetimeEventStore
+
+
+def _parse_datetime(value: str) -> datetime.datetime:
+    try:
+        return datetime.datetime.fromisoformat(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Date invalide: {value!r} (format ISO 8601 attendu)")
+
+
+def _open_store(args: argparse.Namespace, **options) -> 'DatetimeEventStore':
+    # Import local: pymongo n'est chargé que par les commandes qui ouvrent le store
+    from .event_store import DatetimeEventStore
+
+    return DatetimeEventStore(
+        connection_string=args.uri,
+        db_name=args.db,
+        collection_name=args.collection,
+        **options
+    )
+
+
+def _export(args: argparse.Namespace) -> int:
+    store = _open_store(args)
+    try:
+        if args.output == "-":
+            count = store.export(args.start, args.end, args.format, sys.stdout.buffer)
+        else:
+            with open(args.output, "wb") as fileobj:
+                count = store.export(args.start, args.end, args.format, fileobj)
+    finally:
+        store.close()
+
+    print(f"{count} événements exportés", file=sys.stderr)
+    return 0
+
+
+def _import(args: argparse.Namespace) -> int:
+    store = _open_store(args)
+    try:
+        if args.input == "-":
+            count = store.import_(sys.stdin.buffer, args.format, args.batch_size)
+        else:
+            with open(args.input, "rb") as fileobj:
+                count = store.import_(fileobj, args.format, args.batch_size)
+    finally:
+        store.close()
+
+    print(f"{count} événements importés", file=sys.stderr)
+    return 0
+
+
+def _loadtest(args: argparse.Namespace) -> int:
+    if args.duration is None and args.requests is None:
+        args.duration = 10.0
+
+    from . import loadtest
+    return loadtest.run_from_args(args)
+
+
+def _rebuild_rollups(args: argparse.Namespace) -> int:
+    if (args.start is None) != (args.end is None):
+        print("--start et --end doivent être fournis ensemble", file=sys.stderr)
+        return 2
+
+    store = _open_store(args)
+    try:
+        written = store.rebuild_rollups(args.start, args.end)
+    finally:
+        store.close()
+
+    print(f"{written} documents de rollups écrits")
+    return 0
+
+
+def _migrate_schema(args: argparse.Namespace) -> int:
+    from .migration import SchemaMigrator
+
+    store = _open_store(args, schema_version=args.target, day_buckets=args.day_buckets)
+    try:
+        migrator = SchemaMigrator(store, batch_size=args.batch_size, pause=args.pause)
+        try:
+            progress = migrator.run()
+        except KeyboardInterrupt:
+            migrator.stop()
+            progress = migrator.progress()
+    finally:
+        store.close()
+
+    state = "terminée" if progress["completed"] else "interrompue (reprise possible)"
+    print(f"Migration vers le schéma v{progress['target']} {state}: "
+          f"{progress['migrated']} documents migrés en {progress['passes']} passage(s)")
+    return 0 if progress["completed"] else 1
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """
+    Construit l'analyseur des arguments de la ligne de commande.
+    """
+    parser = argparse.ArgumentParser(prog="datetime-event-store", description=__doc__.splitlines()[1])
+    parser.add_argument("--uri", default="mongodb://localhost:27017/", help="URL de connexion MongoDB")
+    parser.add_argument("--db", default="datetime_events", help="Nom de la base de données")
+    parser.add_argument("--collection", default="events", help="Nom de la collection des événements")
+
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    export = commands.add_parser("export", help="Exporte les événements d'une plage")
+    export.add_argument("--start", type=_parse_datetime, required=True, help="Début de la plage")
+    export.add_argument("--end", type=_parse_datetime, required=True, help="Fin de la plage")
+    export.add_argument("-f", "--format", choices=formats.FORMATS, default=formats.NDJSON, help="Format de sortie")
+    export.add_argument("-o", "--output", default="-", help="Fichier de sortie (défaut: sortie standard)")
+    export.set_defaults(handler=_export)
+
+    import_ = commands.add_parser("import", help="Importe des événements par insertions groupées")
+    import_.add_argument("-f", "--format", choices=formats.FORMATS, default=formats.NDJSON, help="Format d'entrée")
+    import_.add_argument("-i", "--input", default="-", help="Fichier d'entrée (défaut: entrée standard)")
+    import_.add_argument("--batch-size", type=int, default=formats.DEFAULT_CHUNK_SIZE,
+                         help="Nombre d'événements par insertion")
+    import_.set_defaults(handler=_import)
+
+    rebuild = commands.add_parser("rebuild-rollups", help="Recalcule les rollups de comptage")
+    rebuild.add_argument("--start", type=_parse_datetime, help="Début de la zone à reconstruire")
+    rebuild.add_argument("--end", type=_parse_datetime, help="Fin de la zone à reconstruire")
+    rebuild.set_defaults(handler=_rebuild_rollups)
+
+    migrate = commands.add_parser("migrate-schema", help="Réécrit les documents dans une autre version de schéma")
+    migrate.add_argument("--target", type=int, choices=(1, 2), default=2, help="Version cible (défaut: 2)")
+    migrate.add_argument("--batch-size", type=int, default=500, help="Nombre de documents réécrits par lot")
+    migrate.add_argument("--pause", type=float, default=0.0, help="Attente en secondes entre deux lots")
+    migrate.add_argument("--day-buckets", action="store_true", help="Précalcule le numéro du jour (schéma v2)")
+    migrate.set_defaults(handler=_migrate_schema)
+
+    load = commands.add_parser("loadtest", help="Génère une charge HTTP sur l'API et mesure les latences")
+    target = load.add_mutually_exclusive_group()
+    target.add_argument("--url", help="URL de l'API à charger (défaut: application chargée dans le processus)")
+    target.add_argument("--app", default="main:app", help="Application ASGI à charger (défaut: main:app)")
+    load.add_argument("--app-dir", default=".", help="Répertoire de l'application chargée dans le processus")
+    load.add_argument("--backend", choices=("memory", "mongodb"), default="memory",
+                      help="Backend du service chargé dans le processus (défaut: memory)")
+    load.add_argument("--rate", type=float, default=100.0, help="Débit cible en requêtes/s (0: sans limite)")
+    load.add_argument("--concurrency", type=int, default=8, help="Nombre de requêtes simultanées")
+    load.add_argument("--duration", type=float, help="Durée en secondes (défaut: 10)")
+    load.add_argument("--requests", type=int, help="Nombre total de requêtes")
+    load.add_argument("--mix", help="Proportions des opérations, ex: create=20,list=35,get=25,update=12,delete=8")
+    load.add_argument("--skew", type=float, default=1.2,
+                      help="Concentration des accès sur les événements récents (1: uniforme)")
+    load.add_argument("--preload", type=int, default=200, help="Événements créés avant la mesure")
+    load.add_argument("--seed", type=int, help="Graine aléatoire")
+    load.add_argument("--json", action="store_true", help="Affiche le résumé en JSON")
+    load.set_defaults(handler=_loadtest)
+
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Point d'entrée de la commande `datetime-event-store`.
+    """
+    args = build_parser().parse_args(argv)
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,46 @@
+"""
+Échéance des opérations du DatetimeEventStore.
+
+Un appelant (par exemple l'API, pour chaque requête) fixe une échéance avec
+`deadline(seconds)`; le store en déduit le temps restant et le transmet à
+MongoDB comme limite côté serveur (maxTimeMS) des lectures de plages. Une
+lecture lancée après l'échéance échoue sans interroger MongoDB.
+
+L'échéance est portée par une variable de contexte: elle suit la requête dans
+le pool de threads de l'API et dans les lectures parallèles (module parallel).
+Les échéances imbriquées ne peuvent que la rapprocher.
+"""
+
+import contextlib
+import contextvars
+import time
+from typing import Iterator, Optional
+
+_deadline: contextvars.ContextVar = contextvars.ContextVar("datetime_event_store_deadline", default=None)
+
+
+@contextlib.contextmanager
+def deadline(seconds: Optional[float]) -> Iterator[None]:
+    """
+    Fixe une échéance dans `seconds` secondes pour les opérations du bloc (None: inchangée).
+    """
+    if seconds is None:
+        yield
+        return
+    at = time.monotonic() + seconds
+    current = _deadline.get()
+    token = _deadline.set(at if current is None else min(current, at))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining() -> Optional[float]:
+    """
+    Temps restant avant l'échéance en secondes (négatif si elle est dépassée), None sans échéance.
+    """
+    at = _deadline.get()
+    if at is None:
+        return None
+    return at - time.monotonic()
@@ -2,36 +2,288 @@
 DatetimeEventStore avec stockage MongoDB - Un module pour stocker et récupérer des événements associés à des dates.
 """
 
+import collections
+import contextlib
 import datetime
-from typing import Any, List, Generator, Optional, Dict
+import heapq
+import itertools
+import logging
+import math
+from typing import Any, BinaryIO, Callable, Iterable, List, Generator, Optional, Dict, Tuple, Union
 import pymongo
-from pymongo import MongoClient
+from pymongo import DeleteOne, InsertOne, MongoClient, ReturnDocument, UpdateOne, monitoring
+from pymongo.errors import (
+    BulkWriteError, ConnectionFailure, DuplicateKeyError, ExecutionTimeout, PyMongoError, WTimeoutError
+)
+from bson.errors import InvalidId
 from bson.objectid import ObjectId
 
+from . import activity, formats, frame, rollups, schema
+from .approximate import ApproximateCount, HyperLogLog, estimate_from_sample
+from .deadline import remaining as deadline_remaining
+from .parallel import SAMPLES_PER_SHARD, map_shards, merge_shards, split_range
+from .slowlog import DEFAULT_LOG_SIZE, SlowQueryLog
+from .spool import WriteSpool
+
+logger = logging.getLogger(__name__)
+
+ESTIMATE_SAMPLE_SIZE = 1000
+DUPLICATE_KEY_ERROR = 11000
+
+# Durée de conservation des clés d'idempotence, assez longue pour couvrir les réessais
+DEFAULT_IDEMPOTENCY_TTL = datetime.timedelta(days=1)
+
+# Erreurs d'un backend lent ou injoignable: l'écriture est alors ajoutée au journal local
+BACKEND_UNAVAILABLE = (ConnectionFailure, ExecutionTimeout, WTimeoutError)
+
+# Opérations d'un lot (apply_batch) et statuts de leurs résultats
+BATCH_CREATE = "create"
+BATCH_UPDATE = "update"
+BATCH_DELETE = "delete"
+BATCH_OPERATIONS = (BATCH_CREATE, BATCH_UPDATE, BATCH_DELETE)
+
+CREATED = "created"
+UPDATED = "updated"
+UNCHANGED = "unchanged"
+DELETED = "deleted"
+NOT_FOUND = "not_found"
+FAILED = "error"
+
+# Ordres de get_events: date croissante ou décroissante, importance (la plus haute
+# d'abord, puis les plus récents) et nom (puis date croissante)
+SORT_AT = "at"
+SORT_AT_DESC = "-at"
+SORT_IMPORTANCE = "importance"
+SORT_NAME = "name"
+SORTS = (SORT_AT, SORT_AT_DESC, SORT_IMPORTANCE, SORT_NAME)
+
+
+def merge_nearest(at: datetime.datetime, later: Iterable['Event'], earlier: Iterable['Event'],
+                  n: int) -> List['Event']:
+    """
+    Fusionne les événements postérieurs et antérieurs à une date, chacun trié du
+    plus proche au plus éloigné, et retourne les n plus proches.
+
+    À distance égale, l'événement postérieur passe en premier.
+    """
+    merged = heapq.merge(later, earlier, key=lambda event: abs(event.at - at))
+    return list(itertools.islice(merged, n))
+
+
+def resolve_timezone(tz: Union[str, datetime.tzinfo, None]) -> Tuple[datetime.tzinfo, str]:
+    """
+    Résout un fuseau horaire en (tzinfo, nom compris par MongoDB).
+
+    Un nom IANA (« Europe/Paris ») nécessite le module zoneinfo (Python 3.9+);
+    un fuseau à décalage fixe (datetime.timezone) fonctionne partout.
+    """
+    if tz is None or tz == "UTC":
+        return datetime.timezone.utc, "UTC"
+    if isinstance(tz, str):
+        try:
+            import zoneinfo
+        except ImportError:
+            raise ValueError("Les noms de fuseaux horaires nécessitent Python 3.9+ (zoneinfo); "
+                             "passez un datetime.timezone") from None
+        try:
+            return zoneinfo.ZoneInfo(tz), tz
+        except (zoneinfo.ZoneInfoNotFoundError, ValueError):
+            raise ValueError(f"Fuseau horaire inconnu: {tz!r}") from None
+    name = getattr(tz, "key", None) or getattr(tz, "zone", None)
+    if name:
+        return tz, name
+    offset = tz.utcoffset(None)
+    if offset is None:
+        raise ValueError(f"Fuseau horaire sans nom ni décalage fixe: {tz!r}")
+    minutes = int(offset.total_seconds()) // 60
+    sign = "-" if minutes < 0 else "+"
+    return tz, f"{sign}{abs(minutes) // 60:02d}:{abs(minutes) % 60:02d}"
+
+
+def utc_naive(at: Optional[datetime.datetime]) -> Optional[datetime.datetime]:
+    """
+    Convertit une date avec fuseau en date UTC naïve, comme les dates stockées; une date naïve est déjà en UTC.
+    """
+    if isinstance(at, datetime.datetime) and at.tzinfo is not None:
+        return at.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+    return at
+
+
+def month_range(year: int, month: int, tz: datetime.tzinfo) -> Tuple[datetime.datetime, datetime.datetime]:
+    """
+    Bornes UTC (naïves, comme les dates stockées) d'un mois civil dans un fuseau: [début, fin[.
+    """
+    if not 1 <= month <= 12:
+        raise ValueError(f"Mois invalide: {month!r}")
+    first = datetime.datetime(year, month, 1, tzinfo=tz)
+    following = datetime.datetime(year + month // 12, month % 12 + 1, 1, tzinfo=tz)
+    return utc_naive(first), utc_naive(following)
+
+
+def calendar_day(day: datetime.date, total: int, events: List['Event']) -> Dict:
+    """
+    Construit l'entrée d'un jour du calendrier.
+    """
+    return {"day": day, "total": total, "events": events, "more": total - len(events)}
+
+
+def check_batch_operation(operation: Dict) -> str:
+    """
+    Vérifie une opération de lot et retourne son type.
+
+    Raises:
+        ValueError: Si l'opération est inconnue ou incomplète
+        TypeError: Si une date n'est pas une instance de datetime.datetime
+    """
+    op = operation.get("op")
+    if op not in BATCH_OPERATIONS:
+        raise ValueError(f"Opération inconnue: {op!r} (opérations acceptées: {', '.join(BATCH_OPERATIONS)})")
+    if op == BATCH_CREATE:
+        if operation.get("at") is None or operation.get("name") is None:
+            raise ValueError("Une création nécessite 'at' et 'name'")
+        if not isinstance(operation["at"], datetime.datetime):
+            raise TypeError("Le paramètre 'at' doit être une instance de datetime.datetime")
+        check_interval(operation["at"], operation.get("end_at"))
+        return op
+    if not operation.get("id"):
+        raise ValueError(f"L'opération {op!r} nécessite 'id'")
+    if op == BATCH_UPDATE and all(operation.get(key) is None for key in ("at", "name", "importance", "end_at")):
+        raise ValueError("Aucune modification demandée")
+    return op
+
+
+def apply_changes(previous: 'Event', operation: Dict) -> 'Event':
+    """
+    Retourne l'événement obtenu en appliquant les champs fournis d'une mise à jour.
+    """
+    updated = Event(
+        operation["at"] if operation.get("at") is not None else previous.at,
+        operation["name"] if operation.get("name") is not None else previous.name,
+        operation["importance"] if operation.get("importance") is not None else previous.importance,
+        previous.id,
+        operation["end_at"] if operation.get("end_at") is not None else previous.end_at
+    )
+    check_interval(updated.at, updated.end_at)
+    return updated
+
+
+def batch_result(index: int, op: Optional[str], status: str, event_id: Optional[str] = None,
+                 event: Optional['Event'] = None, error: Optional[str] = None) -> Dict:
+    """
+    Construit le résultat d'une opération de lot.
+    """
+    return {"index": index, "op": op, "status": status, "id": event_id, "event": event, "error": error}
+
+
+def _same_event(a: 'Event', b: 'Event') -> bool:
+    return (a.at, a.name, a.importance, a.end_at) == (b.at, b.name, b.importance, b.end_at)
+
+
+def idempotency_record(event_id: str, event: 'Event', now: Optional[datetime.datetime]) -> Dict:
+    """
+    Contenu d'une clé d'idempotence: l'événement créé avec la clé, pour que
+    le réessai le retourne sans relire la collection des événements.
+    """
+    return {"event_id": event_id, "at": event.at, "name": event.name,
+            "importance": event.importance, "end_at": event.end_at, "created_at": now}
+
+
+def recorded_event(record: Dict) -> 'Event':
+    """
+    Événement d'origine d'une clé d'idempotence (idempotency_record).
+    """
+    return Event(record["at"], record["name"], record["importance"], str(record["event_id"]), record.get("end_at"))
+
+
+def replayed_event(key: str, original: 'Event', event: 'Event') -> 'Event':
+    """
+    Retourne l'événement déjà créé avec une clé d'idempotence.
+
+    Le réessai est comparé à l'événement tel qu'il a été créé: une
+    modification ultérieure de l'événement ne le fait pas refuser.
+
+    Raises:
+        ValueError: Si la clé a été utilisée pour un événement différent
+    """
+    if not _same_event(original, event):
+        raise ValueError(f"La clé d'idempotence {key!r} a déjà été utilisée pour un autre événement")
+    return original
+
+
+def check_sort(sort: str, limit: Optional[int] = None) -> str:
+    """
+    Vérifie un ordre de tri de get_events et sa limite.
+
+    Raises:
+        ValueError: Si l'ordre est inconnu ou la limite négative
+    """
+    if sort not in SORTS:
+        raise ValueError(f"Tri inconnu: {sort!r} (tris acceptés: {', '.join(SORTS)})")
+    if limit is not None and limit < 0:
+        raise ValueError("La limite doit être positive")
+    return sort
+
+
+def sort_key(sort: str) -> Tuple[Callable[['Event'], Any], bool]:
+    """
+    Clé de tri des événements pour un ordre de get_events, et si elle est décroissante.
+    """
+    if sort == SORT_AT_DESC:
+        return (lambda event: event.at), True
+    if sort == SORT_IMPORTANCE:
+        return (lambda event: (schema.importance_rank(event.importance), event.at)), True
+    if sort == SORT_NAME:
+        return (lambda event: (event.name, event.at)), False
+    return (lambda event: event.at), False
+
+
+def check_interval(at: datetime.datetime, end_at: Optional[datetime.datetime]) -> None:
+    """
+    Vérifie la date de fin d'un événement avec une durée.
+    """
+    if end_at is None:
+        return
+    if not isinstance(end_at, datetime.datetime):
+        raise TypeError("Le paramètre 'end_at' doit être une instance de datetime.datetime")
+    if end_at < at:
+        raise ValueError("La date de fin 'end_at' doit être postérieure ou égale à 'at'")
+
+
 class Event:
     """
     Classe représentant un événement avec sa date, son nom et son importance.
     """
     
-    def __init__(self, at: datetime.datetime, name: str, importance: str = "normal", event_id: Optional[str] = None):
+    # Vrai pour une écriture acquittée par le journal local et pas encore appliquée
+    spooled = False
+
+    def __init__(self, at: datetime.datetime, name: str, importance: str = "normal", event_id: Optional[str] = None,
+                 end_at: Optional[datetime.datetime] = None):
         """
         Initialise un événement.
         
+        Les dates avec fuseau sont converties en UTC naïf, comme à leur stockage.
+
         Args:
-            at: Date et heure de l'événement
+            at: Date et heure de l'événement (début, pour un événement avec une durée)
             name: Nom ou description de l'événement
             importance: Niveau d'importance de l'événement (défaut: "normal")
             event_id: Identifiant unique de l'événement (optionnel)
+            end_at: Date et heure de fin d'un événement avec une durée (optionnel)
         """
-        self.at = at
+        self.at = utc_naive(at)
         self.name = name
         self.importance = importance
         self.id = event_id
+        self.end_at = utc_naive(end_at)
         
     def __str__(self) -> str:
         """
         Représentation textuelle de l'événement.
         """
+        if self.end_at is not None:
+            return (f"Event(id={self.id}, at={self.at}, end_at={self.end_at}, "
+                    f"name='{self.name}', importance='{self.importance}')")
         return f"Event(id={self.id}, at={self.at}, name='{self.name}', importance='{self.importance}')"
     
     def __repr__(self) -> str:
@@ -43,36 +295,59 @@ class Event:
     @classmethod
     def from_document(cls, doc: Dict) -> 'Event':
         """
-        Crée un événement à partir d'un document MongoDB.
+        Crée un événement à partir d'un document MongoDB, quelle que soit sa version de schéma.
         """
+        at, name, importance = schema.decode(doc)
         return cls(
-            at=doc['at'],
-            name=doc['name'],
-            importance=doc['importance'],
-            event_id=str(doc['_id'])
+            at=at,
+            name=name,
+            importance=importance,
+            event_id=str(doc['_id']),
+            end_at=schema.decode_end(doc)
         )
     
-    def to_document(self) -> Dict:
+    def to_document(self, schema_version: int = schema.V1, with_day: bool = False) -> Dict:
         """
         Convertit l'événement en document MongoDB.
+
+        Args:
+            schema_version: Version du schéma du document (défaut: 1)
+            with_day: Ajoute le numéro du jour précalculé (schéma v2 uniquement)
         """
-        doc = {
-            'at': self.at,
-            'name': self.name,
-            'importance': self.importance
-        }
+        doc = schema.encode(self.at, self.name, self.importance, schema_version, with_day, self.end_at)
         if self.id:
             doc['_id'] = ObjectId(self.id)
         return doc
 
 
+class _ReplyListener(monitoring.CommandListener):
+    """
+    Compte les commandes abouties dans le suivi de l'opération en cours (module activity).
+    """
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        activity.record_reply()
+
+    def failed(self, event):
+        pass
+
+
 class DatetimeEventStore:
     """
     Classe pour stocker et récupérer des événements liés à des dates, avec stockage MongoDB.
     """
     
     def __init__(self, connection_string: str = "mongodb://localhost:27017/", 
-                 db_name: str = "datetime_events", collection_name: str = "events"):
+                 db_name: str = "datetime_events", collection_name: str = "events",
+                 rollups_enabled: bool = False, schema_version: int = schema.V1,
+                 day_buckets: bool = False, slow_query_ms: Optional[float] = None,
+                 slow_query_log_size: int = DEFAULT_LOG_SIZE, spool_path: Optional[str] = None,
+                 spool_timeout_ms: float = 1000, hot_window: Optional[datetime.timedelta] = None,
+                 idempotency_ttl: datetime.timedelta = DEFAULT_IDEMPOTENCY_TTL,
+                 server_selection_timeout_ms: Optional[float] = None):
         """
         Initialise le magasin d'événements avec MongoDB.
         
@@ -80,58 +355,779 @@ class DatetimeEventStore:
             connection_string: URL de connexion MongoDB
             db_name: Nom de la base de données
             collection_name: Nom de la collection pour les événements
+            rollups_enabled: Maintient les comptes par minute/heure/jour pour
+                répondre à count_events sans parcourir la plage (défaut: False)
+            schema_version: Version du schéma des documents écrits (défaut: 1);
+                les documents des deux versions restent lisibles
+            day_buckets: Précalcule le numéro du jour dans les documents v2 (défaut: False)
+            slow_query_ms: Enregistre dans `slow_queries` les opérations plus longues
+                que ce seuil en millisecondes (défaut: None, désactivé)
+            slow_query_log_size: Nombre d'opérations lentes conservées
+            spool_path: Journal local où sont acquittées les écritures quand MongoDB
+                est lent ou injoignable (défaut: None, désactivé); voir spool.SpoolReplayer
+            spool_timeout_ms: Délai d'une écriture directe avant son ajout au journal
+            hot_window: Garde en mémoire les événements de cette durée glissante pour
+                servir les lectures récentes (défaut: None, désactivé); voir le module hot_window
+            idempotency_ttl: Durée de conservation des clés d'idempotence (défaut: 1 jour)
+            server_selection_timeout_ms: Attente maximale d'un serveur MongoDB disponible
+                (défaut: None, celle du driver, 30 secondes)
         """
-        self.client = MongoClient(connection_string)
+        options = {}
+        if server_selection_timeout_ms is not None:
+            options["serverSelectionTimeoutMS"] = server_selection_timeout_ms
+        self.client = MongoClient(connection_string, event_listeners=[_ReplyListener()], **options)
         self.db = self.client[db_name]
         self.events_collection = self.db[collection_name]
+        self.rollups_collection = self.db[f"{collection_name}_rollups"]
+        self.idempotency_collection = self.db[f"{collection_name}_idempotency"]
+        self.rollups_enabled = rollups_enabled
+        self.schema_version = schema.check_version(schema_version)
+        self.day_buckets = day_buckets
+        self.slow_queries = None
+        if slow_query_ms is not None:
+            self.slow_queries = SlowQueryLog(slow_query_ms, slow_query_log_size, self._explain)
+        self.spool = WriteSpool(spool_path) if spool_path else None
+        self.spool_timeout = spool_timeout_ms / 1000
+
+        self.ensure_schema_index(self.schema_version)
+        if rollups_enabled:
+            self.rollups_collection.create_index([("g", 1), ("t", 1), ("i", 1)], unique=True)
+        # Les clés expirent: l'index unique sur _id reste de la taille du trafic récent
+        self.idempotency_collection.create_index(
+            "created_at", expireAfterSeconds=int(idempotency_ttl.total_seconds())
+        )
+        self.refresh_schema()
         
-        self.events_collection.create_index("at")
+        self.hot_window = None
+        if hot_window:
+            # Import local: hot_window dépend de memory, qui dépend de ce module
+            from .hot_window import HotWindow
+            self.hot_window = HotWindow(hot_window)
+            self.reload_hot_window()
+
+    def reload_hot_window(self) -> None:
+        """
+        Recharge depuis MongoDB les événements de la fenêtre en mémoire.
+        """
+        if self.hot_window is None:
+            return
+        start = self.hot_window.cutoff()
+        self.hot_window.load(self._find_range(start, None), start)
+
+    def _mirror(self, upserted: Iterable[Event] = (), removed: Iterable[str] = ()) -> None:
+        """
+        Reporte des écritures dans la fenêtre en mémoire.
+        """
+        if self.hot_window is None:
+            return
+        for event in upserted:
+            self.hot_window.upsert(event)
+        for event_id in removed:
+            self.hot_window.remove(event_id)
+
+    def ensure_schema_index(self, version: int) -> None:
+        """
+        Crée les index d'une version de schéma: la date seule, l'importance
+        suivie de la date pour les lectures filtrées ou triées par importance,
+        le nom suivi de la date pour le tri par nom, et la classe de durée
+        suivie de la date pour les recherches de chevauchement.
+
+        Les index v2 sont clairsemés: pendant une migration, ils ne contiennent
+        que les documents déjà convertis.
+        """
+        if version == schema.V1:
+            self.events_collection.create_index("at")
+            self.events_collection.create_index([("importance", 1), ("at", 1)])
+            self.events_collection.create_index([("name", 1), ("at", 1)])
+        else:
+            self.events_collection.create_index("t", sparse=True)
+            self.events_collection.create_index([("i", 1), ("t", 1)], sparse=True)
+            self.events_collection.create_index([("n", 1), ("t", 1)], sparse=True)
+        class_key = schema.INTERVAL_FIELDS[version][1]
+        self.events_collection.create_index(
+            [(class_key, 1), (schema.date_field(version), 1)],
+            partialFilterExpression={class_key: {"$exists": True}}
+        )
     
-    def store_event(self, at: datetime.datetime, name: str, importance: str = "normal") -> Event:
+    def refresh_schema(self) -> tuple:
+        """
+        Détermine les versions de schéma présentes dans la collection.
+
+        La version d'écriture est toujours lue; une autre version ne l'est que si
+        son index de date existe et contient au moins un document, de sorte
+        qu'une collection homogène ne coûte qu'une requête par lecture.
+
+        Returns:
+            tuple: Versions lues, en commençant par la version d'écriture
+        """
+        indexed = {
+            key
+            for index in self.events_collection.index_information().values()
+            for key, _ in index["key"]
+        }
+        versions = [self.schema_version]
+        for version in schema.VERSIONS:
+            if version == self.schema_version or schema.date_field(version) not in indexed:
+                continue
+            if self.events_collection.find_one(schema.presence_filter(version), projection={"_id": 1}):
+                versions.append(version)
+        self.read_versions = tuple(versions)
+        return self.read_versions
+
+    def store_event(self, at: datetime.datetime, name: str, importance: str = "normal",
+                    end_at: Optional[datetime.datetime] = None, idempotency_key: Optional[str] = None) -> Event:
         """
         Stocke un événement associé à une date et heure.
         
+        Avec une clé d'idempotence, un réessai de la même création retourne
+        l'événement créé la première fois au lieu d'en insérer un second. La
+        clé est enregistrée dans `<collection>_idempotency` et expire après
+        `idempotency_ttl`: passé ce délai, la même clé crée un nouvel événement.
+        Pendant une panne, un réessai d'une création encore dans le journal
+        local retourne l'événement du journal.
+
         Args:
             at: Date et heure de l'événement
             name: Nom ou description de l'événement
             importance: Niveau d'importance de l'événement (défaut: "normal")
+            end_at: Date et heure de fin, pour un événement avec une durée (optionnel)
+            idempotency_key: Clé fournie par le client, unique par création (optionnel)
             
         Returns:
-            Event: L'événement créé avec son ID
+            Event: L'événement créé avec son ID, ou celui déjà créé avec la même clé
+
+        Raises:
+            ValueError: Si la clé a déjà été utilisée pour un autre événement
         """
         if not isinstance(at, datetime.datetime):
             raise TypeError("Le paramètre 'at' doit être une instance de datetime.datetime")
+        at, end_at = utc_naive(at), utc_naive(end_at)
+        check_interval(at, end_at)
         
-        event = Event(at, name, importance)
+        # Avec le journal ou une clé d'idempotence, l'ID est attribué ici pour rester le même au rejeu
+        event = Event(at, name, importance, str(ObjectId()) if self.spool or idempotency_key else None, end_at)
+        if idempotency_key is not None and self.spool is not None:
+            spooled = self.spool.pending_create(idempotency_key)
+            if spooled is not None:
+                original = replayed_event(idempotency_key, Event(
+                    spooled["at"], spooled["name"], spooled.get("importance") or "normal", spooled["id"],
+                    spooled.get("end_at")
+                ), event)
+                original.spooled = True
+                return original
+        original = None
         
-        doc = event.to_document()
-        result = self.events_collection.insert_one(doc)
-        
-        event.id = str(result.inserted_id)
+        def write():
+            nonlocal original
+            if idempotency_key is not None:
+                original = self._claim_idempotency_key(idempotency_key, event)
+                if original is not None:
+                    return
+            doc = event.to_document(self.schema_version, self.day_buckets)
+            try:
+                result = self.events_collection.insert_one(doc)
+            except PyMongoError as e:
+                # Une création ajoutée au journal garde sa clé: le rejeu l'insère avec le même ID.
+                # Sinon la création a échoué et la clé est libérée pour que le réessai aboutisse.
+                if idempotency_key is not None and not (self.spool is not None and isinstance(e, BACKEND_UNAVAILABLE)):
+                    self._release_idempotency_keys([idempotency_key])
+                raise
+            event.id = str(result.inserted_id)
         
+        event.spooled = self._write_or_spool(
+            {"op": BATCH_CREATE, "id": event.id, "at": at, "name": name, "importance": importance, "end_at": end_at,
+             "idempotency_key": idempotency_key},
+            write
+        )
+        if original is not None:
+            return original
+        if not event.spooled:
+            self._update_rollups([(at, importance, 1)])
+            self._mirror([event])
         return event
+
+    def _claim_idempotency_key(self, key: str, event: Event) -> Optional[Event]:
+        """
+        Enregistre une clé d'idempotence pour `event`, en un seul aller-retour.
+
+        Returns:
+            Optional[Event]: L'événement déjà créé avec cette clé, None si la clé est nouvelle
+        """
+        record = idempotency_record(event.id, event, datetime.datetime.utcnow())
+        try:
+            previous = self.idempotency_collection.find_one_and_update(
+                {"_id": key}, {"$setOnInsert": record}, upsert=True, return_document=ReturnDocument.BEFORE
+            )
+        except DuplicateKeyError:
+            # Deux premières tentatives simultanées: l'autre a enregistré la clé
+            previous = self.idempotency_collection.find_one({"_id": key})
+        if previous is None:
+            return None
+        return replayed_event(key, recorded_event(previous), event)
+
+    def _claim_idempotency_keys(self, keys: List[Optional[str]], events: List[Event],
+                                event_ids: List[str]) -> Dict[int, Dict]:
+        """
+        Enregistre en une écriture groupée les clés d'idempotence d'un lot.
+
+        Returns:
+            Dict: Pour chaque événement dont la clé était déjà enregistrée (dans
+                la collection ou plus tôt dans le lot), l'enregistrement de la clé
+        """
+        claims = {}
+        for index, key in enumerate(keys):
+            if key is not None:
+                claims.setdefault(key, index)
+        if not claims:
+            return {}
+
+        now = datetime.datetime.utcnow()
+        records = {key: idempotency_record(event_ids[index], events[index], now) for key, index in claims.items()}
+        requests = [UpdateOne({"_id": key}, {"$setOnInsert": record}, upsert=True) for key, record in records.items()]
+        try:
+            upserted = set(self.idempotency_collection.bulk_write(requests, ordered=False).upserted_ids)
+        except BulkWriteError as e:
+            # Une clé enregistrée en même temps par un autre lot est une clé déjà utilisée
+            if any(error["code"] != DUPLICATE_KEY_ERROR for error in e.details.get("writeErrors", [])):
+                raise
+            upserted = {item["index"] for item in e.details.get("upserted", [])}
+        existing = [key for position, key in enumerate(records) if position not in upserted]
+        if existing:
+            for record in self.idempotency_collection.find({"_id": {"$in": existing}}, max_time_ms=self._max_time_ms()):
+                records[record["_id"]] = record
+        return {
+            index: records[key]
+            for index, key in enumerate(keys)
+            if key is not None and (claims[key] != index or key in existing)
+        }
+
+    def _release_idempotency_keys(self, keys: Iterable[str]) -> None:
+        """
+        Libère des clés d'idempotence dont la création a échoué (au mieux: une erreur est ignorée).
+        """
+        keys = list(keys)
+        if keys:
+            with contextlib.suppress(PyMongoError):
+                self.idempotency_collection.delete_many({"_id": {"$in": keys}})
+
+    def store_events(self, events: Iterable[Event],
+                     idempotency_keys: Optional[Iterable[Optional[str]]] = None) -> List[Event]:
+        """
+        Stocke plusieurs événements en une seule insertion groupée.
+        
+        Les événements portant déjà un ID existant dans la collection, ou une
+        clé d'idempotence déjà enregistrée (voir store_event), sont ignorés, ce
+        qui rend la réinsertion d'un même lot idempotente.
+
+        Args:
+            events: Événements à stocker (avec ou sans ID)
+            idempotency_keys: Clé d'idempotence de chaque événement, None pour aucune (optionnel)
+
+        Returns:
+            List: Les événements effectivement insérés, avec leur ID
+        """
+        events = list(events)
+        for event in events:
+            if not isinstance(event.at, datetime.datetime):
+                raise TypeError("Le paramètre 'at' doit être une instance de datetime.datetime")
+            check_interval(event.at, event.end_at)
+        keys = list(idempotency_keys) if idempotency_keys is not None else [None] * len(events)
+        if len(keys) != len(events):
+            raise ValueError("Il faut une clé d'idempotence (ou None) par événement")
+        if not events:
+            return []
+
+        docs = []
+        for event in events:
+            doc = event.to_document(self.schema_version, self.day_buckets)
+            doc.setdefault("_id", ObjectId())
+            docs.append(doc)
+
+        skipped = set(self._claim_idempotency_keys(keys, events, [str(doc["_id"]) for doc in docs]))
+        pending = [index for index in range(len(docs)) if index not in skipped]
+        try:
+            if pending:
+                self.events_collection.insert_many([docs[index] for index in pending], ordered=False)
+        except BulkWriteError as e:
+            errors = e.details.get("writeErrors", [])
+            failed = {pending[error["index"]] for error in errors}
+            if any(error["code"] != DUPLICATE_KEY_ERROR for error in errors):
+                self._release_idempotency_keys(keys[index] for index in failed if keys[index] is not None)
+                raise
+            skipped |= failed
+        except PyMongoError:
+            self._release_idempotency_keys(keys[index] for index in pending if keys[index] is not None)
+            raise
+
+        stored = []
+        for index, (event, doc) in enumerate(zip(events, docs)):
+            if index not in skipped:
+                event.id = str(doc["_id"])
+                stored.append(event)
+
+        self._update_rollups([(event.at, event.importance, 1) for event in stored])
+        self._mirror(stored)
+        return stored
     
-    def get_events(self, start: datetime.datetime, end: datetime.datetime) -> Generator[Event, None, None]:
+    def get_events(self, start: datetime.datetime, end: datetime.datetime,
+                   parallel: int = 1, sort: str = SORT_AT,
+                   limit: Optional[int] = None) -> Generator[Event, None, None]:
         """
         Récupère les événements dans une plage de dates spécifiée.
         
+        Chaque ordre est lu par un index: celui de la date, celui de
+        l'importance suivie de la date pour le tri par importance, ou celui du
+        nom suivi de la date pour le tri par nom. Avec une limite, seuls les
+        premiers événements sont lus (top-K).
+
         Args:
             start: Date et heure de début de la période
             end: Date et heure de fin de la période
+            parallel: Nombre de sous-plages lues en parallèle (défaut: 1, lecture séquentielle);
+                seulement pour le tri par date croissante sans limite
+            sort: Ordre des événements, parmi SORTS (défaut: date croissante)
+            limit: Nombre maximal d'événements retournés (défaut: None, tous)
             
         Returns:
             Generator: Générateur d'événements dans la plage spécifiée
         """
+        check_sort(sort, limit)
+        start, end = utc_naive(start), utc_naive(end)
         if start > end:
             start, end = end, start
+
+        if self.hot_window is not None and self.hot_window.covers(start):
+            yield from self.hot_window.events.get_events(start, end, sort=sort, limit=limit)
+            return
+
+        if parallel > 1 and sort == SORT_AT and limit is None:
+            sources = [
+                (lambda lo=lo, hi=hi, last=last: self._find_range(lo, hi, last))
+                for lo, hi, last in self._split_range(start, end, parallel)
+            ]
+            yield from merge_shards(sources, key=lambda event: event.at)
+            return
+
+        yield from self._find_range(start, end, sort=sort, limit=limit)
+
+    def get_events_frame(self, start: datetime.datetime, end: datetime.datetime,
+                         columns: Iterable[str] = frame.DEFAULT_COLUMNS):
+        """
+        Lit les événements d'une plage directement en colonnes NumPy, triés par date.
+
+        Seuls les champs des colonnes demandées sont lus et aucun objet Event
+        n'est créé (voir le module frame).
+
+        Args:
+            start: Date et heure de début de la période
+            end: Date et heure de fin de la période
+            columns: Colonnes parmi id, at, name, importance, end_at (défaut: at, name, importance)
+
+        Returns:
+            DataFrame pandas si pandas est installé, sinon dictionnaire de tableaux NumPy
+        """
+        if start > end:
+            start, end = end, start
+        builder = frame.FrameBuilder(columns)
+
+        def find(version):
+            query = schema.query(version, start, end)
+            date_key = schema.date_field(version)
+            explain = {"find": self.events_collection.name, "filter": query, "sort": {date_key: pymongo.ASCENDING}}
+            cursor = self.events_collection.find(query, frame.projection(version, builder.columns)).sort(
+                date_key, pymongo.ASCENDING
+            ).max_time_ms(self._max_time_ms())
+            return self._measure_cursor(cursor, "find", query, explain)
+
+        cursors = [find(version) for version in self.read_versions]
+        docs = cursors[0] if len(cursors) == 1 else heapq.merge(*cursors, key=frame.document_date)
+        for doc in docs:
+            builder.add_document(doc)
+        return builder.build()
+
+    def export(self, start: datetime.datetime, end: datetime.datetime, fmt: str,
+               fileobj: BinaryIO, chunk_size: int = formats.DEFAULT_CHUNK_SIZE) -> int:
+        """
+        Exporte en flux les événements d'une plage vers un fichier binaire.
+
+        Les événements sont écrits par morceaux au fil du curseur: la mémoire
+        utilisée ne dépend pas du nombre d'événements exportés.
+
+        Args:
+            start: Date et heure de début de la période
+            end: Date et heure de fin de la période
+            fmt: Format de sortie ("ndjson", "csv" ou "parquet")
+            fileobj: Fichier ouvert en écriture binaire
+            chunk_size: Nombre d'événements par morceau écrit
             
-        query = {"at": {"$gte": start, "$lte": end}}
-        
-        cursor = self.events_collection.find(query).sort("at", pymongo.ASCENDING)
+        Returns:
+            int: Nombre d'événements exportés
+        """
+        count = 0
+
+        def counted():
+            nonlocal count
+            for event in self.get_events(start, end):
+                count += 1
+                yield event
+
+        for chunk in formats.iter_export(counted(), fmt, chunk_size):
+            fileobj.write(chunk)
+        return count
+
+    def import_(self, fileobj: BinaryIO, fmt: str, batch_size: int = formats.DEFAULT_CHUNK_SIZE) -> int:
+        """
+        Importe en flux des événements depuis un fichier binaire, par insertions groupées.
+
+        Les IDs présents dans le fichier sont conservés; les événements déjà
+        présents sont ignorés, de sorte qu'un import interrompu peut être relancé.
+
+        Args:
+            fileobj: Fichier ouvert en lecture binaire
+            fmt: Format d'entrée ("ndjson", "csv" ou "parquet")
+            batch_size: Nombre d'événements par insertion groupée
+
+        Returns:
+            int: Nombre d'événements insérés
+        """
+        inserted = 0
+        batch = []
+        for record in formats.iter_import(fileobj, fmt, batch_size):
+            event_id = record["id"] if record["id"] and ObjectId.is_valid(record["id"]) else None
+            batch.append(Event(record["at"], record["name"], record["importance"], event_id, record["end_at"]))
+            if len(batch) >= batch_size:
+                inserted += len(self.store_events(batch))
+                batch = []
+        if batch:
+            inserted += len(self.store_events(batch))
+        return inserted
+
+    def _find_range(self, start: datetime.datetime, end: datetime.datetime,
+                    include_end: bool = True, sort: str = SORT_AT,
+                    limit: Optional[int] = None) -> Generator[Event, None, None]:
+        """
+        Parcourt les événements d'une plage, dans l'ordre demandé (par date par défaut).
+        """
+        if limit == 0:
+            return
+        cursors = []
+        for version in self.read_versions:
+            if sort == SORT_IMPORTANCE:
+                cursors.append(self._find_by_importance(version, start, end, include_end, limit))
+            else:
+                query = schema.query(version, start, end, include_end)
+                cursors.append(self._find_sorted(query, self._sort_fields(version, sort), limit=limit or 0))
+        if len(cursors) == 1:
+            events = cursors[0]
+        else:
+            key, reverse = sort_key(sort)
+            events = heapq.merge(*cursors, key=key, reverse=reverse)
+        if limit is not None:
+            events = itertools.islice(events, limit)
+        yield from events
+
+    @staticmethod
+    def _sort_fields(version: int, sort: str) -> List[Tuple[str, int]]:
+        """
+        Tri MongoDB d'un ordre de get_events dans une version de schéma.
+        """
+        date_key, name_key, importance_key = schema.FIELDS[version]
+        if sort == SORT_AT_DESC:
+            return [(date_key, pymongo.DESCENDING)]
+        if sort == SORT_NAME:
+            return [(name_key, pymongo.ASCENDING), (date_key, pymongo.ASCENDING)]
+        return [(date_key, pymongo.ASCENDING)]
+
+    def _find_by_importance(self, version: int, start: datetime.datetime, end: datetime.datetime,
+                            include_end: bool, limit: Optional[int]) -> Generator[Event, None, None]:
+        """
+        Parcourt les événements d'une plage par importance décroissante, puis date décroissante.
         
-        for doc in cursor:
+        Ni le texte (v1) ni le code (v2) de l'importance ne suivent exactement
+        son rang: "normal" et "normale" ont le même rang. Chaque rang est donc
+        lu à son tour par l'index (importance, date), du plus haut au plus bas,
+        avec un $in sur ses importances, puis les importances hors table. Les
+        lectures suivantes ne sont lancées que si la limite n'est pas atteinte.
+        """
+        importance_key = schema.FIELDS[version][2]
+        queries = []
+        for names in schema.importance_groups():
+            query = schema.query(version, start, end, include_end)
+            values = names if version == schema.V1 else [schema.IMPORTANCE_CODES[name] for name in names]
+            query[importance_key] = {"$in": values}
+            queries.append(query)
+        others = schema.query(version, start, end, include_end)
+        if version == schema.V1:
+            others[importance_key] = {"$nin": list(schema.IMPORTANCE_CODES)}
+        else:
+            others[importance_key] = schema.OTHER_IMPORTANCE
+        queries.append(others)
+        for query in queries:
+            yield from self._find_sorted(query, schema.date_field(version), pymongo.DESCENDING, limit or 0)
+
+    def _find_sorted(self, query: Dict, sort_field: Union[str, List[Tuple[str, int]]],
+                     direction: int = pymongo.ASCENDING, limit: int = 0) -> Generator[Event, None, None]:
+        """
+        Parcourt les événements correspondant à un filtre, triés sur un champ
+        (ou sur une liste de couples (champ, sens)).
+        """
+        keys = [(sort_field, direction)] if isinstance(sort_field, str) else sort_field
+        explain = {"find": self.events_collection.name, "filter": query, "sort": dict(keys)}
+        if limit:
+            explain["limit"] = limit
+        cursor = self.events_collection.find(query).sort(keys).limit(limit).max_time_ms(self._max_time_ms())
+        for doc in self._measure_cursor(cursor, "find", query, explain):
             yield Event.from_document(doc)
     
+    def get_next_events(self, after: datetime.datetime, n: int, importance: Optional[str] = None,
+                        inclusive: bool = False) -> List[Event]:
+        """
+        Récupère les n premiers événements postérieurs à une date.
+
+        La lecture parcourt l'index de date (ou l'index importance + date) à
+        partir de la date donnée et s'arrête après n documents: son coût ne
+        dépend pas du nombre d'événements stockés.
+
+        Args:
+            after: Date à partir de laquelle chercher
+            n: Nombre maximal d'événements retournés
+            importance: Ne retient que les événements de cette importance (optionnel)
+            inclusive: Inclut les événements situés exactement à `after` (défaut: False)
+
+        Returns:
+            List: Les événements, du plus proche au plus éloigné
+        """
+        return self._find_nearby(after, n, importance, inclusive, pymongo.ASCENDING)
+
+    def get_previous_events(self, before: datetime.datetime, n: int, importance: Optional[str] = None,
+                            inclusive: bool = False) -> List[Event]:
+        """
+        Récupère les n derniers événements antérieurs à une date.
+
+        Args:
+            before: Date avant laquelle chercher
+            n: Nombre maximal d'événements retournés
+            importance: Ne retient que les événements de cette importance (optionnel)
+            inclusive: Inclut les événements situés exactement à `before` (défaut: False)
+
+        Returns:
+            List: Les événements, du plus proche au plus éloigné (dates décroissantes)
+        """
+        return self._find_nearby(before, n, importance, inclusive, pymongo.DESCENDING)
+
+    def get_nearest_events(self, at: datetime.datetime, n: int,
+                           importance: Optional[str] = None) -> List[Event]:
+        """
+        Récupère les n événements les plus proches d'une date, avant ou après.
+
+        Les deux sens sont lus séparément (n événements au plus chacun) puis
+        fusionnés par distance à la date.
+
+        Args:
+            at: Date de référence
+            n: Nombre maximal d'événements retournés
+            importance: Ne retient que les événements de cette importance (optionnel)
+
+        Returns:
+            List: Les événements, par distance croissante à `at`
+        """
+        later = self.get_next_events(at, n, importance, inclusive=True)
+        earlier = self.get_previous_events(at, n, importance)
+        return merge_nearest(at, later, earlier, n)
+
+    def _find_nearby(self, at: datetime.datetime, n: int, importance: Optional[str],
+                     inclusive: bool, direction: int) -> List[Event]:
+        """
+        Lit au plus n événements à partir d'une date, dans un sens donné.
+        """
+        if n <= 0:
+            return []
+
+        cursors = []
+        for version in self.read_versions:
+            if direction == pymongo.ASCENDING:
+                query = schema.query(version, at, None, importance=importance, include_start=inclusive)
+            else:
+                query = schema.query(version, None, at, include_end=inclusive, importance=importance)
+            cursors.append(self._find_sorted(query, schema.date_field(version), direction, n))
+        if len(cursors) == 1:
+            return list(cursors[0])
+
+        merged = heapq.merge(*cursors, key=lambda event: event.at, reverse=direction == pymongo.DESCENDING)
+        return list(itertools.islice(merged, n))
+
+    def overlapping(self, start: datetime.datetime, end: datetime.datetime) -> Generator[Event, None, None]:
+        """
+        Récupère les événements qui chevauchent une fenêtre, triés par date de début.
+
+        Un événement ponctuel chevauche la fenêtre s'il s'y trouve; un événement
+        avec une durée, si son intervalle [at, end_at] l'intersecte. Les
+        intervalles commencés avant la fenêtre sont cherchés classe de durée par
+        classe de durée, chacune sur une plage de dates bornée par sa durée
+        maximale: un intervalle long n'est lu que s'il atteint la fenêtre.
+
+        Args:
+            start: Date et heure de début de la fenêtre
+            end: Date et heure de fin de la fenêtre
+
+        Returns:
+            Generator: Générateur des événements qui chevauchent la fenêtre
+        """
+        if start > end:
+            start, end = end, start
+
+        cursors = []
+        for version in self.read_versions:
+            class_key = schema.INTERVAL_FIELDS[version][1]
+            classes = self.events_collection.find({class_key: {"$exists": True}}).max_time_ms(
+                self._max_time_ms()
+            ).distinct(class_key)
+            queries = schema.overlap_queries(version, start, end, classes)
+            query = queries[0] if len(queries) == 1 else {"$or": queries}
+            cursors.append(self._find_sorted(query, schema.date_field(version)))
+        if len(cursors) == 1:
+            yield from cursors[0]
+            return
+
+        yield from heapq.merge(*cursors, key=lambda event: event.at)
+
+    def _write_or_spool(self, operation: Dict, write) -> bool:
+        """
+        Exécute une écriture, ou l'ajoute au journal local si MongoDB est lent ou injoignable.
+
+        Tant que le journal n'est pas vide, les écritures y sont ajoutées pour
+        être appliquées dans l'ordre. `write` ne doit faire que l'écriture
+        elle-même: l'appelant met à jour rollups et fenêtre en mémoire une fois
+        l'écriture aboutie, hors du délai du journal.
+
+        Returns:
+            bool: True si l'écriture a été ajoutée au journal
+        """
+        if self.spool is None:
+            write()
+            return False
+        if not self.spool.depth:
+            try:
+                with pymongo.timeout(self.spool_timeout):
+                    write()
+                return False
+            except BACKEND_UNAVAILABLE as e:
+                logger.warning("MongoDB indisponible, écriture ajoutée au journal local: %s", e)
+        self.spool.append(operation)
+        return True
+
+    def _measure(self, operation: str, query: Any, explain_command: Optional[Dict] = None,
+                 collection: Optional[str] = None):
+        """
+        Mesure une opération pour le journal des opérations lentes, s'il est activé.
+        """
+        if self.slow_queries is None:
+            return contextlib.nullcontext()
+        return self.slow_queries.measure(
+            operation, collection or self.events_collection.name, query, explain_command
+        )
+
+    def _measure_cursor(self, cursor: Iterable, operation: str, query: Any,
+                        explain_command: Optional[Dict] = None) -> Iterable:
+        """
+        Mesure une lecture en flux pour le journal des opérations lentes, s'il est activé,
+        sans compter le temps que l'appelant passe entre deux documents.
+        """
+        if self.slow_queries is None:
+            return cursor
+        return self.slow_queries.measure_iter(operation, self.events_collection.name, query, cursor, explain_command)
+
+    def _explain(self, command: Dict) -> Dict:
+        """
+        Exécute une commande explain avec les statistiques d'exécution.
+        """
+        return self.db.command("explain", command, verbosity="executionStats")
+
+    def _max_time_ms(self) -> Optional[int]:
+        """
+        Temps restant avant l'échéance de l'opération en cours (module deadline), en
+        millisecondes, transmis à MongoDB comme maxTimeMS; None sans échéance.
+
+        Raises:
+            ExecutionTimeout: Si l'échéance est déjà dépassée
+        """
+        left = deadline_remaining()
+        if left is None:
+            return None
+        if left <= 0:
+            raise ExecutionTimeout("Échéance de l'opération dépassée avant la lecture", code=50)
+        return max(1, math.ceil(left * 1000))
+
+    def _time_limit(self) -> Dict:
+        """
+        Options maxTimeMS d'une commande (count, agrégation) pour l'échéance en cours.
+        """
+        max_time_ms = self._max_time_ms()
+        return {} if max_time_ms is None else {"maxTimeMS": max_time_ms}
+
+    def _count(self, query: Dict) -> int:
+        """
+        Compte les événements correspondant à un filtre.
+        """
+        with self._measure("count", query, {"count": self.events_collection.name, "query": query}):
+            return self.events_collection.count_documents(query, **self._time_limit())
+
+    def _aggregate(self, pipeline: List[Dict], collection=None) -> List[Dict]:
+        """
+        Exécute un pipeline d'agrégation et retourne ses résultats.
+        """
+        collection = collection if collection is not None else self.events_collection
+        explain = {"aggregate": collection.name, "pipeline": pipeline, "cursor": {}}
+        with self._measure("aggregate", pipeline, explain, collection.name):
+            return list(collection.aggregate(pipeline, **self._time_limit()))
+
+    def _schema_query(self, start: Optional[datetime.datetime], end: Optional[datetime.datetime],
+                      include_end: bool = True, importance: Optional[str] = None) -> Dict:
+        """
+        Construit un filtre couvrant toutes les versions de schéma lues.
+
+        Chaque borne est optionnelle; le filtre peut être restreint à une importance.
+        Les champs des deux versions étant disjoints, les filtres sont combinés
+        par un $or dont chaque branche utilise l'index de date de sa version.
+        """
+        queries = [
+            schema.query(version, start, end, include_end, importance)
+            for version in self.read_versions
+        ]
+        if len(queries) == 1:
+            return queries[0]
+        if not all(queries):
+            return {}
+        return {"$or": queries}
+
+    def _field_expression(self, index: int) -> Any:
+        """
+        Expression d'agrégation lisant un champ (0: date, 1: nom) dans toutes les versions lues.
+        """
+        fields = [f"${schema.FIELDS[version][index]}" for version in self.read_versions]
+        if len(fields) == 1:
+            return fields[0]
+        return {"$ifNull": fields}
+
+    def _split_range(self, start: datetime.datetime, end: datetime.datetime, shards: int) -> List:
+        """
+        Découpe une plage en sous-plages équilibrées à partir d'un échantillon de dates.
+
+        L'échantillon est tiré sur toute la collection ($sample en premier étage
+        utilise un curseur aléatoire sans parcourir la plage); s'il contient trop
+        peu de dates dans la plage, le découpage se fait à largeur égale.
+        """
+        pipeline = [
+            {"$sample": {"size": shards * SAMPLES_PER_SHARD}},
+            {"$project": {"_id": 0, "at": 1, "t": 1}},
+        ]
+        samples = [
+            doc.get("at", doc.get("t"))
+            for doc in self._aggregate(pipeline)
+            if "at" in doc or "t" in doc
+        ]
+        return split_range(start, end, shards, samples)
+
     def delete_event(self, event_id: str) -> bool:
         """
         Supprime un événement par son ID.
@@ -140,58 +1136,258 @@ class DatetimeEventStore:
             event_id: Identifiant de l'événement à supprimer
             
         Returns:
-            bool: True si l'événement a été supprimé, False sinon
+            bool: True si l'événement a été supprimé, False sinon (ID invalide ou introuvable)
+
+        Raises:
+            PyMongoError: Si MongoDB est injoignable et que le journal local n'est pas activé
         """
         try:
-            result = self.events_collection.delete_one({"_id": ObjectId(event_id)})
-            return result.deleted_count > 0
-        except Exception as e:
-            print(f"Erreur lors de la suppression de l'événement: {e}")
+            object_id = ObjectId(event_id)
+        except (InvalidId, TypeError):
+            return False
+
+        deleted = None
+
+        def write():
+            nonlocal deleted
+            deleted = self.events_collection.find_one_and_delete({"_id": object_id})
+
+        if self._write_or_spool({"op": BATCH_DELETE, "id": event_id}, write):
+            return True
+        if deleted is None:
             return False
+        event = Event.from_document(deleted)
+        self._update_rollups([(event.at, event.importance, -1)])
+        self._mirror(removed=[event_id])
+        return True
+
+    def delete_events(self, start: datetime.datetime, end: datetime.datetime,
+                      importance: Optional[str] = None, dry_run: bool = False) -> int:
+        """
+        Supprime en une seule opération tous les événements d'une plage de dates.
+
+        Args:
+            start: Date et heure de début de la plage
+            end: Date et heure de fin de la plage
+            importance: Ne supprime que les événements de cette importance (optionnel)
+            dry_run: Compte les événements concernés sans les supprimer (défaut: False)
+
+        Returns:
+            int: Nombre d'événements supprimés (ou qui le seraient en mode dry_run)
+        """
+        start, end = utc_naive(start), utc_naive(end)
+        if start > end:
+            start, end = end, start
+
+        query = self._schema_query(start, end, importance=importance)
+        if dry_run:
+            return self._count(query)
+
+        explain = {"delete": self.events_collection.name, "deletes": [{"q": query, "limit": 0}]}
+        with self._measure("delete", query, explain):
+            deleted = self.events_collection.delete_many(query).deleted_count
+        if deleted and self.rollups_enabled:
+            self.rebuild_rollups(start, end)
+        if deleted and self.hot_window is not None:
+            self.hot_window.apply(lambda events: events.delete_events(start, end, importance=importance))
+        return deleted
+
+    def update_events(self, start: datetime.datetime, end: datetime.datetime,
+                      importance: Optional[str] = None,
+                      set_importance: Optional[str] = None,
+                      shift_by: Optional[datetime.timedelta] = None,
+                      dry_run: bool = False) -> int:
+        """
+        Met à jour en une seule opération tous les événements d'une plage de dates.
+
+        Args:
+            start: Date et heure de début de la plage
+            end: Date et heure de fin de la plage
+            importance: Ne modifie que les événements de cette importance (optionnel)
+            set_importance: Nouvelle importance des événements (optionnel)
+            shift_by: Décalage appliqué à la date des événements (optionnel)
+            dry_run: Compte les événements concernés sans les modifier (défaut: False)
+
+        Returns:
+            int: Nombre d'événements modifiés (ou concernés en mode dry_run)
+        """
+        start, end = utc_naive(start), utc_naive(end)
+        if start > end:
+            start, end = end, start
+
+        query = self._schema_query(start, end, importance=importance)
+        if dry_run:
+            return self._count(query)
+
+        if not shift_by and set_importance is None:
+            return 0
+
+        modified = 0
+        for version in self.read_versions:
+            version_query = schema.query(version, start, end, importance=importance)
+            update = self._bulk_update(version, set_importance, shift_by)
+            explain = {"update": self.events_collection.name,
+                       "updates": [{"q": version_query, "u": update, "multi": True}]}
+            with self._measure("update", version_query, explain):
+                modified += self.events_collection.update_many(version_query, update).modified_count
+        if modified and self.rollups_enabled:
+            self.rebuild_rollups(start, end)
+            if shift_by:
+                self.rebuild_rollups(start + shift_by, end + shift_by)
+        if modified and self.hot_window is not None:
+            # Un décalage peut faire entrer dans la fenêtre des événements qu'elle ne contient pas
+            if shift_by:
+                self.reload_hot_window()
+            else:
+                self.hot_window.apply(lambda events: events.update_events(start, end, importance=importance,
+                                                                          set_importance=set_importance))
+        return modified
+
+    @staticmethod
+    def _bulk_update(version: int, set_importance: Optional[str] = None,
+                     shift_by: Optional[datetime.timedelta] = None) -> Any:
+        """
+        Construit la mise à jour groupée d'une version de schéma.
+
+        Un décalage s'exprime par un pipeline, qui décale aussi la date de fin
+        des événements avec une durée (leur classe de durée ne change pas) et
+        recalcule le numéro du jour des documents v2 qui en ont un.
+        """
+        if not shift_by:
+            return schema.update_fields(version, importance=set_importance)
+
+        milliseconds = int(shift_by / datetime.timedelta(milliseconds=1))
+        date_key = schema.date_field(version)
+        end_key = schema.INTERVAL_FIELDS[version][0]
+        fields = {
+            date_key: {"$add": [f"${date_key}", milliseconds]},
+            end_key: {"$cond": [
+                {"$eq": [{"$type": f"${end_key}"}, "missing"]},
+                "$$REMOVE",
+                {"$add": [f"${end_key}", milliseconds]},
+            ]},
+        }
+        if version == schema.V2:
+            fields["d"] = {"$cond": [
+                {"$eq": [{"$type": "$d"}, "missing"]},
+                "$$REMOVE",
+                {"$floor": {"$divide": [{"$add": [{"$toLong": "$t"}, milliseconds]}, 86400000]}},
+            ]}
+        if set_importance is not None:
+            if version == schema.V1:
+                fields["importance"] = {"$literal": set_importance}
+            else:
+                code, text = schema.encode_importance(set_importance)
+                fields["i"] = {"$literal": code}
+                fields["s"] = "$$REMOVE" if text is None else {"$literal": text}
+        return [{"$set": fields}]
     
     def update_event(self, event_id: str, name: Optional[str] = None, 
                      at: Optional[datetime.datetime] = None, 
-                     importance: Optional[str] = None) -> Optional[Event]:
+                     importance: Optional[str] = None,
+                     end_at: Optional[datetime.datetime] = None) -> Optional[Event]:
         """
         Met à jour un événement existant.
         
+        La classe de durée d'un événement avec une durée dépend de ses deux
+        dates: si une seule change, l'autre est relue et la mise à jour n'a lieu
+        que si elle n'a pas été modifiée entre-temps.
+
         Args:
             event_id: Identifiant de l'événement à mettre à jour
             name: Nouveau nom (optionnel)
             at: Nouvelle date/heure (optionnel)
             importance: Nouvelle importance (optionnel)
+            end_at: Nouvelle date de fin (optionnel)
             
         Returns:
-            Event: L'événement mis à jour ou None si non trouvé
+            Event: L'événement mis à jour ou None si non trouvé; une mise à jour
+                ajoutée au journal local retourne un événement `spooled` qui ne
+                porte que les champs fournis
+
+        Raises:
+            ValueError: Si la date de fin obtenue précède la date de début
+            PyMongoError: Si MongoDB est injoignable et que le journal local n'est pas activé
         """
+        if name is None and at is None and importance is None and end_at is None:
+            return None
         try:
-            update_fields = {}
-            if name is not None:
-                update_fields["name"] = name
-            if at is not None:
-                update_fields["at"] = at
-            if importance is not None:
-                update_fields["importance"] = importance
-            
-            if not update_fields:
-                return None  
-            
-            result = self.events_collection.update_one(
-                {"_id": ObjectId(event_id)},
-                {"$set": update_fields}
-            )
+            object_id = ObjectId(event_id)
+        except (InvalidId, TypeError):
+            return None
+        at, end_at = utc_naive(at), utc_naive(end_at)
+        if at is not None and end_at is not None:
+            check_interval(at, end_at)
             
-            if result.modified_count == 0:
-                return None  
+        updated = None
+
+        def write():
+            nonlocal updated
+            updated = self._update_event(object_id, name, at, importance, end_at)
             
-            doc = self.events_collection.find_one({"_id": ObjectId(event_id)})
-            if doc:
-                return Event.from_document(doc)
+        operation = {"op": BATCH_UPDATE, "id": event_id, "at": at, "name": name,
+                     "importance": importance, "end_at": end_at}
+        if self._write_or_spool(operation, write):
+            event = Event(at, name, importance, event_id, end_at)
+            event.spooled = True
+            return event
+        if updated is None:
             return None
+        previous, event = updated
+        self._update_rollups([
+            (previous.at, previous.importance, -1),
+            (event.at, event.importance, 1),
+        ])
+        self._mirror([event])
+        return event
+
+    def _update_event(self, object_id: ObjectId, name: Optional[str], at: Optional[datetime.datetime],
+                      importance: Optional[str], end_at: Optional[datetime.datetime]) -> Optional[tuple]:
+        """
+        Applique une mise à jour dans la version de schéma du document.
+
+        Returns:
+            tuple: L'événement avant et après la mise à jour, ou None si introuvable ou inchangé
+        """
+        # Le document est modifié dans sa propre version; la migration le convertira
+        for version in self.read_versions:
+            query = {"_id": object_id, **schema.version_filter(version)}
+            interval = None
+            if at is not None or end_at is not None:
+                current = self.events_collection.find_one(query)
+                if current is None:
+                    continue
+                current_at, _, _ = schema.decode(current)
+                current_end = schema.decode_end(current)
+                new_end = end_at if end_at is not None else current_end
+                if new_end is not None:
+                    interval = (at if at is not None else current_at, new_end)
+                    check_interval(*interval)
+                    query[schema.date_field(version)] = current_at
+                    query[schema.INTERVAL_FIELDS[version][0]] = current_end
             
-        except Exception as e:
-            print(f"Erreur lors de la mise à jour de l'événement: {e}")
+            before = self.events_collection.find_one_and_update(
+                query,
+                schema.update_fields(version, at, name, importance, self.day_buckets, interval),
+                return_document=ReturnDocument.BEFORE
+            )
+            if before is not None:
+                break
+        else:
             return None
+
+        previous = Event.from_document(before)
+        updated = Event(
+            at if at is not None else previous.at,
+            name if name is not None else previous.name,
+            importance if importance is not None else previous.importance,
+            previous.id,
+            end_at if end_at is not None else previous.end_at
+        )
+        if ((updated.at, updated.name, updated.importance, updated.end_at)
+                == (previous.at, previous.name, previous.importance, previous.end_at)):
+            return None  
+        return previous, updated
     
     def get_event_by_id(self, event_id: str) -> Optional[Event]:
         """
@@ -201,17 +1397,301 @@ class DatetimeEventStore:
             event_id: Identifiant de l'événement
             
         Returns:
-            Event: L'événement trouvé ou None si non trouvé
+            Event: L'événement trouvé ou None si non trouvé (ou si l'ID est invalide)
+
+        Raises:
+            PyMongoError: Si MongoDB est injoignable ou que l'échéance de la lecture est dépassée
         """
         try:
-            doc = self.events_collection.find_one({"_id": ObjectId(event_id)})
-            if doc:
-                return Event.from_document(doc)
-            return None
-        except Exception as e:
-            print(f"Erreur lors de la récupération de l'événement: {e}")
+            object_id = ObjectId(event_id)
+        except (InvalidId, TypeError):
             return None
+        doc = self.events_collection.find_one({"_id": object_id}, max_time_ms=self._max_time_ms())
+        if doc:
+            return Event.from_document(doc)
+        return None
+
+    def get_events_by_ids(self, event_ids: Iterable[str]) -> List[Optional[Event]]:
+        """
+        Récupère plusieurs événements par leur ID en une seule requête.
+
+        Args:
+            event_ids: Identifiants des événements
+
+        Returns:
+            List: Les événements dans l'ordre des IDs demandés, None pour un ID introuvable ou invalide
+        """
+        event_ids = list(event_ids)
+        object_ids = {event_id: ObjectId(event_id) for event_id in event_ids if ObjectId.is_valid(event_id)}
+        found = {}
+        if object_ids:
+            query = {"_id": {"$in": list(set(object_ids.values()))}}
+            with self._measure("find", query, {"find": self.events_collection.name, "filter": query}):
+                found = {
+                    doc["_id"]: Event.from_document(doc)
+                    for doc in self.events_collection.find(query, max_time_ms=self._max_time_ms())
+                }
+        return [found.get(object_ids.get(event_id)) for event_id in event_ids]
+
+    def apply_batch(self, operations: Iterable[Dict], replay: bool = False) -> List[Dict]:
+        """
+        Applique un lot de créations, mises à jour et suppressions en une écriture groupée.
+
+        Chaque opération est un dictionnaire: {"op": "create", "at", "name",
+        ["importance"], ["end_at"], ["id"], ["idempotency_key"]}, {"op": "update",
+        "id", [champs modifiés]} ou {"op": "delete", "id"}. Les clés
+        d'idempotence des créations sont enregistrées en une écriture groupée
+        (voir store_event): une création dont la clé désigne déjà un autre
+        événement est rapportée unchanged avec cet événement. Les documents visés sont lus en une requête,
+        puis toutes les écritures partent dans un seul bulk_write non ordonné:
+        l'échec d'une opération n'empêche pas les autres. Un même ID ne peut
+        apparaître qu'une fois par lot. Une mise à jour ou une suppression ne
+        s'applique que si le document est resté tel qu'il a été lu; sinon elle
+        est rapportée en échec (ou not_found si le document a disparu) et
+        n'entre pas dans les agrégats.
+
+        Au rejeu du journal local, une création dont l'ID existe déjà avec le
+        même contenu est une écriture aboutie sans réponse: elle est rapportée
+        unchanged, reportée dans la fenêtre en mémoire, et les rollups de son
+        jour sont recalculés.
+
+        Args:
+            operations: Opérations à appliquer
+            replay: Vrai pour le rejeu du journal local
+
+        Returns:
+            List: Un résultat par opération, dans l'ordre (index, op, status, id, event, error);
+                status vaut created, updated, unchanged, deleted, not_found ou error
+        """
+        operations = list(operations)
+        results: List[Optional[Dict]] = [None] * len(operations)
+        targets = {}
+        seen = set()
+        for index, operation in enumerate(operations):
+            event_id = operation.get("id")
+            try:
+                op = check_batch_operation(operation)
+                if event_id is not None:
+                    if event_id in seen:
+                        raise ValueError("Un même ID ne peut apparaître qu'une fois par lot")
+                    seen.add(event_id)
+                    if op == BATCH_CREATE and not ObjectId.is_valid(event_id):
+                        raise ValueError(f"ID invalide: {event_id!r}")
+            except (TypeError, ValueError) as e:
+                results[index] = batch_result(index, operation.get("op"), FAILED, event_id, error=str(e))
+                continue
+            if op != BATCH_CREATE:
+                if ObjectId.is_valid(event_id):
+                    targets[index] = ObjectId(event_id)
+                else:
+                    results[index] = batch_result(index, op, NOT_FOUND, event_id)
+
+        create_ids = {
+            index: operation.get("id") or str(ObjectId())
+            for index, operation in enumerate(operations)
+            if results[index] is None and operation["op"] == BATCH_CREATE
+        }
+        self._claim_batch_keys(operations, create_ids, results)
+
+        docs = {}
+        if targets:
+            query = {"_id": {"$in": list(targets.values())}}
+            docs = {doc["_id"]: doc for doc in self.events_collection.find(query, max_time_ms=self._max_time_ms())}
+
+        requests = []
+        pending = []
+        for index, operation in enumerate(operations):
+            if results[index] is not None:
+                continue
+            op = operation["op"]
+            if op == BATCH_CREATE:
+                event = Event(operation["at"], operation["name"], operation.get("importance") or "normal",
+                              create_ids[index], operation.get("end_at"))
+                requests.append(InsertOne(event.to_document(self.schema_version, self.day_buckets)))
+                pending.append((index, op, CREATED, event, [(event.at, event.importance, 1)]))
+                continue
+
+            doc = docs.get(targets[index])
+            if doc is None:
+                results[index] = batch_result(index, op, NOT_FOUND, operation["id"])
+                continue
+            previous = Event.from_document(doc)
+            if op == BATCH_DELETE:
+                requests.append(DeleteOne(dict(doc)))
+                pending.append((index, op, DELETED, previous, [(previous.at, previous.importance, -1)]))
+                continue
+
+            try:
+                updated = apply_changes(previous, operation)
+            except (TypeError, ValueError) as e:
+                results[index] = batch_result(index, op, FAILED, previous.id, error=str(e))
+                continue
+            if _same_event(updated, previous):
+                results[index] = batch_result(index, op, UNCHANGED, previous.id, previous)
+                continue
+            version = schema.detect_version(doc)
+            interval = None
+            if updated.end_at is not None and (operation.get("at") is not None or operation.get("end_at") is not None):
+                interval = (updated.at, updated.end_at)
+            requests.append(UpdateOne(dict(doc), schema.update_fields(
+                version, operation.get("at"), operation.get("name"), operation.get("importance"),
+                self.day_buckets, interval
+            )))
+            pending.append((index, op, UPDATED, updated, [
+                (previous.at, previous.importance, -1),
+                (updated.at, updated.importance, 1),
+            ]))
+
+        failed = {}
+        matched = deleted = 0
+        if requests:
+            try:
+                with self._measure("bulk_write", {"operations": len(requests)}):
+                    written = self.events_collection.bulk_write(requests, ordered=False)
+                matched, deleted = written.matched_count, written.deleted_count
+            except BulkWriteError as e:
+                failed = {error["index"]: error for error in e.details.get("writeErrors", [])}
+                matched, deleted = e.details.get("nMatched", 0), e.details.get("nRemoved", 0)
+        conflicts = self._batch_conflicts(pending, failed, matched, deleted)
+        applied = self._applied_creates(pending, failed) if replay else set()
+
+        changes = []
+        for position, (index, op, status, event, change) in enumerate(pending):
+            if position in applied:
+                results[index] = batch_result(index, op, UNCHANGED, event.id, event)
+                continue
+            if position in failed:
+                key = operations[index].get("idempotency_key")
+                if key is not None and failed[position].get("code") != DUPLICATE_KEY_ERROR:
+                    self._release_idempotency_keys([key])
+                results[index] = batch_result(index, op, FAILED, event.id, error=failed[position].get("errmsg", ""))
+                continue
+            if position in conflicts:
+                if conflicts[position] is None:
+                    results[index] = batch_result(index, op, NOT_FOUND, event.id)
+                else:
+                    results[index] = batch_result(index, op, FAILED, event.id, error=conflicts[position])
+                continue
+            results[index] = batch_result(index, op, status, event.id, event)
+            changes.extend(change)
+        self._update_rollups(changes)
+        if self.rollups_enabled:
+            for day in {rollups.floor(pending[position][3].at, rollups.DAY) for position in applied}:
+                self.rebuild_rollups(day, day)
+        self._mirror(
+            [result["event"] for result in results if result["status"] in (CREATED, UPDATED)]
+            + [pending[position][3] for position in applied],
+            [result["id"] for result in results if result["status"] == DELETED]
+        )
+        return results
     
+    def _claim_batch_keys(self, operations: List[Dict], create_ids: Dict[int, str],
+                          results: List[Optional[Dict]]) -> None:
+        """
+        Enregistre les clés d'idempotence des créations d'un lot et remplit le
+        résultat de celles dont la clé désigne déjà un autre événement.
+
+        Une clé déjà enregistrée pour l'ID de la création elle-même vient d'une
+        tentative précédente de cette création (écriture ajoutée au journal
+        local après l'enregistrement de la clé): la création est poursuivie.
+        """
+        keyed = [index for index in create_ids if operations[index].get("idempotency_key") is not None]
+        if not keyed:
+            return
+        keys = [operations[index]["idempotency_key"] for index in keyed]
+        events = [
+            Event(operations[index]["at"], operations[index]["name"], operations[index].get("importance") or "normal",
+                  create_ids[index], operations[index].get("end_at"))
+            for index in keyed
+        ]
+        claimed = self._claim_idempotency_keys(keys, events, [event.id for event in events])
+        for position, record in claimed.items():
+            index, event = keyed[position], events[position]
+            if str(record["event_id"]) == event.id:
+                continue
+            try:
+                original = replayed_event(keys[position], recorded_event(record), event)
+            except ValueError as e:
+                results[index] = batch_result(index, BATCH_CREATE, FAILED, event.id, error=str(e))
+            else:
+                results[index] = batch_result(index, BATCH_CREATE, UNCHANGED, original.id, original)
+
+    def _applied_creates(self, pending: List[tuple], failed: Dict[int, Dict]) -> set:
+        """
+        Positions des créations refusées pour ID en double dont le document
+        existant est identique.
+        """
+        duplicates = {
+            position: pending[position][3]
+            for position, error in failed.items()
+            if pending[position][2] == CREATED and error.get("code") == 11000
+        }
+        if not duplicates:
+            return set()
+        query = {"_id": {"$in": [ObjectId(event.id) for event in duplicates.values()]}}
+        with self._measure("find", query, {"find": self.events_collection.name, "filter": query}):
+            existing = {
+                str(doc["_id"]): Event.from_document(doc)
+                for doc in self.events_collection.find(query, max_time_ms=self._max_time_ms())
+            }
+        return {
+            position for position, event in duplicates.items()
+            if event.id in existing and _same_event(existing[event.id], event)
+        }
+
+    def _batch_conflicts(self, pending: List[tuple], failed: Dict[int, str], matched: int,
+                         deleted: int) -> Dict[int, Optional[str]]:
+        """
+        Identifie les mises à jour et suppressions d'un lot dont le filtre n'a
+        pas retrouvé le document lu, modifié ou supprimé entre la lecture et
+        l'écriture.
+
+        Le résultat d'un bulk_write non ordonné ne donne que des totaux: s'ils
+        correspondent aux opérations envoyées, toutes ont trouvé leur document.
+        Sinon, les documents visés sont relus: une mise à jour a porté si le
+        document porte ses valeurs; un document encore présent n'a pas été
+        supprimé. Parmi les suppressions dont le document a disparu, le total
+        tranche: toutes ont porté ou aucune. Entre les deux, l'auteur de chaque
+        suppression est indéterminé: elles sont rapportées en échec.
+
+        Args:
+            pending: Opérations envoyées (index, op, statut, événement, deltas), dans l'ordre du bulk_write
+            failed: Erreurs d'écriture par position
+            matched: Nombre de documents trouvés par les mises à jour
+            deleted: Nombre de documents supprimés
+
+        Returns:
+            Dict: Pour chaque position sans effet (ou d'effet indéterminé), le message d'erreur,
+                ou None si le document a disparu
+        """
+        checked = [
+            (position, status, event)
+            for position, (_, _, status, event, _) in enumerate(pending)
+            if status in (UPDATED, DELETED) and position not in failed
+        ]
+        updates = sum(1 for _, status, _ in checked if status == UPDATED)
+        if updates == matched and len(checked) - updates == deleted:
+            return {}
+
+        query = {"_id": {"$in": [ObjectId(event.id) for _, _, event in checked]}}
+        with self._measure("find", query, {"find": self.events_collection.name, "filter": query}):
+            current = {
+                str(doc["_id"]): Event.from_document(doc)
+                for doc in self.events_collection.find(query, max_time_ms=self._max_time_ms())
+            }
+        conflicts = {}
+        gone = []
+        for position, status, event in checked:
+            found = current.get(event.id)
+            if status == DELETED and found is None:
+                gone.append(position)
+            elif status == DELETED or found is None or not _same_event(found, event):
+                conflicts[position] = "Événement modifié pendant le lot" if found is not None else None
+        if len(gone) != deleted:
+            for position in gone:
+                conflicts[position] = None if deleted == 0 else "Événement supprimé pendant le lot, effet indéterminé"
+        return conflicts
+
     def clear_all_events(self) -> int:
         """
         Supprime tous les événements de la collection.
@@ -220,32 +1700,334 @@ class DatetimeEventStore:
             int: Nombre d'événements supprimés
         """
         result = self.events_collection.delete_many({})
+        if self.rollups_enabled:
+            self.rollups_collection.delete_many({})
+        self.idempotency_collection.delete_many({})
+        self.reload_hot_window()
         return result.deleted_count
     
     def count_events(self, start: Optional[datetime.datetime] = None, 
-                     end: Optional[datetime.datetime] = None) -> int:
+                     end: Optional[datetime.datetime] = None,
+                     parallel: int = 1,
+                     importance: Optional[str] = None,
+                     approximate: bool = False) -> int:
         """
         Compte le nombre d'événements, éventuellement dans une plage de dates.
         
+        Lorsque les rollups sont activés et que les deux bornes sont fournies,
+        la partie alignée de la plage est comptée depuis les rollups et seuls
+        les bords (moins d'une minute de chaque côté) sont comptés sur les événements.
+
         Args:
             start: Date et heure de début (optionnel)
             end: Date et heure de fin (optionnel)
+            parallel: Nombre de sous-plages comptées en parallèle lorsque
+                les deux bornes sont fournies (défaut: 1)
+            importance: Ne compte que les événements de cette importance (optionnel)
+            approximate: Retourne une estimation peu coûteuse (ApproximateCount)
+                plutôt qu'un compte exact (défaut: False)
             
         Returns:
             int: Nombre d'événements
         """
-        query = {}
-        if start or end:
-            query["at"] = {}
-            if start:
-                query["at"]["$gte"] = start
-            if end:
-                query["at"]["$lte"] = end
+        start, end = utc_naive(start), utc_naive(end)
+        if approximate:
+            return self._estimate_count(start, end, importance)
+
+        if self.hot_window is not None and self.hot_window.covers(start):
+            return self.hot_window.events.count_events(start, end, importance=importance)
+
+        if self.rollups_enabled and start and end:
+            return self._count_from_rollups(start, end, importance)
+
+        if parallel > 1 and start and end and start < end:
+            counts = map_shards(
+                lambda lo, hi, last: self._count(self._schema_query(lo, hi, last, importance)),
+                self._split_range(start, end, parallel)
+            )
+            return sum(counts)
+
+        query = self._schema_query(start, end, importance=importance)
+
+        return self._count(query)
+
+    def _count_from_rollups(self, start: datetime.datetime, end: datetime.datetime,
+                            importance: Optional[str] = None) -> int:
+        """
+        Compte les événements d'une plage à partir des rollups et des bords non alignés.
+        """
+        if start > end:
+            return 0
+
+        buckets, edges = rollups.plan(start, end)
+
+        total = 0
+        if buckets:
+            pipeline = [
+                {"$match": rollups.bucket_filter(buckets, importance)},
+                {"$group": {"_id": None, "n": {"$sum": "$n"}}},
+            ]
+            for doc in self._aggregate(pipeline, self.rollups_collection):
+                total += doc["n"]
+
+        for lo, hi, include_end in edges:
+            total += self._count(self._schema_query(lo, hi, include_end, importance))
+
+        return total
+
+    def _estimate_count(self, start: Optional[datetime.datetime] = None,
+                        end: Optional[datetime.datetime] = None,
+                        importance: Optional[str] = None) -> ApproximateCount:
+        """
+        Estime le nombre d'événements sans parcourir la plage.
+
+        Sans filtre, le compte provient des métadonnées de la collection. Avec une
+        plage, il est exact si les rollups le permettent ou si la collection est
+        plus petite que l'échantillon; sinon il est extrapolé à partir d'un
+        échantillon aléatoire ($sample) filtré côté serveur.
+        """
+        if start is None and end is None and importance is None:
+            return ApproximateCount(self.events_collection.estimated_document_count())
+
+        if self.rollups_enabled and start and end:
+            return ApproximateCount(self._count_from_rollups(start, end, importance), exact=True)
+
+        population = self.events_collection.estimated_document_count()
+        if population <= ESTIMATE_SAMPLE_SIZE:
+            return ApproximateCount(self.count_events(start, end, importance=importance), exact=True)
+
+        query = self._schema_query(start, end, importance=importance)
+
+        pipeline = [
+            {"$sample": {"size": ESTIMATE_SAMPLE_SIZE}},
+            {"$match": query},
+            {"$count": "n"},
+        ]
+        hits = sum(doc["n"] for doc in self._aggregate(pipeline))
+        return estimate_from_sample(hits, ESTIMATE_SAMPLE_SIZE, population)
+
+    def name_sketch(self, start: datetime.datetime, end: datetime.datetime,
+                    parallel: int = 1) -> HyperLogLog:
+        """
+        Construit une esquisse HyperLogLog des noms d'événements d'une plage.
+
+        Les esquisses de plusieurs fenêtres peuvent être fusionnées avec `merge`.
+
+        Args:
+            start: Date et heure de début de la période
+            end: Date et heure de fin de la période
+            parallel: Nombre de sous-plages esquissées en parallèle (défaut: 1)
+
+        Returns:
+            HyperLogLog: Esquisse des noms de la plage
+        """
+        if start > end:
+            start, end = end, start
+
+        def sketch(lo, hi, include_end):
+            query = self._schema_query(lo, hi, include_end)
+            cursor = self.events_collection.find(query, projection={"_id": 0, "name": 1, "n": 1}).max_time_ms(
+                self._max_time_ms()
+            )
+            docs = self._measure_cursor(cursor, "find", query, {"find": self.events_collection.name, "filter": query})
+            return HyperLogLog().update(doc.get("name", doc.get("n")) for doc in docs)
+
+        if parallel > 1:
+            sketches = map_shards(sketch, self._split_range(start, end, parallel))
+            merged = sketches[0]
+            for other in sketches[1:]:
+                merged.merge(other)
+            return merged
+
+        return sketch(start, end, True)
+
+    def count_distinct_names(self, start: datetime.datetime, end: datetime.datetime,
+                             approximate: bool = True, parallel: int = 1) -> int:
+        """
+        Compte les noms d'événements distincts d'une plage.
+
+        Args:
+            start: Date et heure de début de la période
+            end: Date et heure de fin de la période
+            approximate: Estime la cardinalité avec une esquisse HyperLogLog,
+                en mémoire constante (défaut: True)
+            parallel: Nombre de sous-plages traitées en parallèle en mode approximatif (défaut: 1)
+
+        Returns:
+            int: Nombre de noms distincts (ApproximateCount en mode approximatif)
+        """
+        if approximate:
+            return self.name_sketch(start, end, parallel).count()
+
+        if start > end:
+            start, end = end, start
+
+        pipeline = [
+            {"$match": self._schema_query(start, end)},
+            {"$group": {"_id": self._field_expression(1)}},
+            {"$count": "n"},
+        ]
+        return sum(doc["n"] for doc in self._aggregate(pipeline))
+
+    def stats(self, start: Optional[datetime.datetime] = None,
+              end: Optional[datetime.datetime] = None) -> Dict:
+        """
+        Calcule les statistiques d'une plage en une seule agrégation.
+
+        Un étage $facet calcule sur les mêmes documents le nombre d'événements
+        par importance, les dates extrêmes et le nombre d'événements par jour
+        (UTC): un seul aller-retour et un seul parcours de la plage.
+
+        Args:
+            start: Date et heure de début (optionnel)
+            end: Date et heure de fin (optionnel)
+
+        Returns:
+            Dict: total, first et last (dates extrêmes, None si la plage est vide),
+                by_importance (compte par importance) et per_day (compte par jour, trié)
+        """
+        if start and end and start > end:
+            start, end = end, start
+
+        date = self._field_expression(0)
+        importance = {}
+        for version in self.read_versions:
+            if version == schema.V1:
+                importance["importance"] = "$importance"
+            else:
+                importance.update({"i": "$i", "s": "$s"})
+        pipeline = [
+            {"$match": self._schema_query(start, end)},
+            {"$facet": {
+                "bounds": [{"$group": {"_id": None, "n": {"$sum": 1},
+                                       "first": {"$min": date}, "last": {"$max": date}}}],
+                "importance": [{"$group": {"_id": importance, "n": {"$sum": 1}}}],
+                "days": [
+                    {"$group": {"_id": {"$dateToString": {"format": "%Y-%m-%d", "date": date}},
+                                "n": {"$sum": 1}}},
+                    {"$sort": {"_id": 1}},
+                ],
+            }},
+        ]
+        facets = self._aggregate(pipeline)[0]
+
+        bounds = facets["bounds"][0] if facets["bounds"] else {"n": 0, "first": None, "last": None}
+        by_importance = collections.Counter()
+        for doc in facets["importance"]:
+            key = doc["_id"]
+            if key.get("importance") is not None:
+                name = key["importance"]
+            else:
+                name = schema.decode_importance(key["i"], key.get("s"))
+            by_importance[name] += doc["n"]
+        return {
+            "total": bounds["n"],
+            "first": bounds["first"],
+            "last": bounds["last"],
+            "by_importance": dict(by_importance),
+            "per_day": {datetime.date.fromisoformat(doc["_id"]): doc["n"] for doc in facets["days"]},
+        }
+
+    def get_calendar(self, year: int, month: int, per_day: int = 3,
+                     tz: Union[str, datetime.tzinfo, None] = "UTC") -> List[Dict]:
+        """
+        Regroupe les événements d'un mois par jour, en ne gardant que les plus importants.
+
+        Le regroupement par jour local, le classement (importance décroissante
+        puis date) et la troncature sont faits par MongoDB ($topN, MongoDB 5.2+):
+        la réponse contient au plus `per_day` événements par jour, quel que soit
+        le nombre d'événements du mois.
+
+        Args:
+            year: Année
+            month: Mois (1 à 12)
+            per_day: Nombre maximal d'événements retournés par jour (défaut: 3)
+            tz: Fuseau horaire des jours et des bornes du mois (défaut: "UTC")
+
+        Returns:
+            List: Jours ayant au moins un événement, triés, chacun avec day (date),
+                total, events (les plus importants) et more (événements non retournés)
+        """
+        tzinfo, tz_name = resolve_timezone(tz)
+        start, end = month_range(year, month, tzinfo)
+
+        date = self._field_expression(0)
+        day = {"$dateToString": {"format": "%Y-%m-%d", "date": "$_at", "timezone": tz_name}}
+        group = {"_id": day, "total": {"$sum": 1}}
+        if per_day > 0:
+            group["top"] = {"$topN": {
+                "n": per_day,
+                "sortBy": {"_rank": -1, "_at": 1},
+                "output": "$$ROOT",
+            }}
+        pipeline = [
+            {"$match": self._schema_query(start, end, include_end=False)},
+            {"$set": {"_at": date, "_rank": schema.importance_rank_expression(self.read_versions)}},
+            {"$group": group},
+            {"$sort": {"_id": 1}},
+        ]
+        return [
+            calendar_day(
+                datetime.date.fromisoformat(doc["_id"]),
+                doc["total"],
+                [Event.from_document(top) for top in doc.get("top", [])]
+            )
+            for doc in self._aggregate(pipeline)
+        ]
+
+    def _update_rollups(self, changes: List) -> None:
+        """
+        Répercute sur les rollups une liste de changements (date, importance, delta).
+        """
+        if not self.rollups_enabled:
+            return
+
+        operations = [
+            operation
+            for at, importance, delta in changes
+            for operation in rollups.increments(at, importance, delta)
+        ]
+        if operations:
+            self.rollups_collection.bulk_write(operations, ordered=False)
+
+    def rebuild_rollups(self, start: Optional[datetime.datetime] = None,
+                        end: Optional[datetime.datetime] = None) -> int:
+        """
+        Recalcule les rollups à partir des événements.
+
+        Sans bornes, tous les rollups sont reconstruits; sinon seuls les jours
+        couvrant [start, end] le sont. Les écritures concurrentes pendant la
+        reconstruction peuvent introduire un écart, corrigé par une nouvelle reconstruction.
+
+        Args:
+            start: Date de début de la zone à reconstruire (optionnel)
+            end: Date de fin de la zone à reconstruire (optionnel)
+
+        Returns:
+            int: Nombre de documents de rollups écrits
+        """
+        match = {}
+        bucket_query = {}
+        if start is not None and end is not None:
+            if start > end:
+                start, end = end, start
+            lo = rollups.floor(start, rollups.DAY)
+            hi = rollups.floor(end, rollups.DAY) + datetime.timedelta(days=1)
+            match = self._schema_query(lo, hi, include_end=False)
+            bucket_query = {"t": {"$gte": lo, "$lt": hi}}
+
+        self.rollups_collection.delete_many(bucket_query)
         
-        return self.events_collection.count_documents(query)
+        pipeline = rollups.minute_pipeline(match, self.read_versions)
+        docs = rollups.build_documents(self._aggregate(pipeline))
+        if docs:
+            self.rollups_collection.insert_many(docs, ordered=False)
+        return len(docs)
     
     def close(self):
         """
         Ferme la connexion à MongoDB.
         """
+        if self.slow_queries is not None:
+            self.slow_queries.close()
         self.client.close()
\ No newline at end of file
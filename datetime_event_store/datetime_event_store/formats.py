@@ -0,0 +1,213 @@
+"""
+Sérialisation en flux des événements aux formats NDJSON, CSV et Parquet.
+
+L'export produit des morceaux d'octets au fil de la lecture et l'import lit
+les enregistrements un à un, de sorte que la mémoire utilisée ne dépend que
+de la taille des morceaux, pas du nombre d'événements. Le format Parquet
+nécessite `pyarrow`, importé uniquement à l'usage.
+"""
+
+import csv
+import datetime
+import io
+import json
+from typing import BinaryIO, Dict, Iterable, Iterator, List
+
+NDJSON = "ndjson"
+CSV = "csv"
+PARQUET = "parquet"
+
+FORMATS = (NDJSON, CSV, PARQUET)
+
+MEDIA_TYPES = {
+    NDJSON: "application/x-ndjson",
+    CSV: "text/csv",
+    PARQUET: "application/vnd.apache.parquet",
+}
+
+FIELDS = ("id", "at", "name", "importance", "end_at")
+
+DEFAULT_CHUNK_SIZE = 1000
+
+
+def _check_format(fmt: str) -> None:
+    if fmt not in FORMATS:
+        raise ValueError(f"Format inconnu: {fmt!r} (formats acceptés: {', '.join(FORMATS)})")
+
+
+def _chunks(events: Iterable, chunk_size: int) -> Iterator[List]:
+    chunk = []
+    for event in events:
+        chunk.append(event)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _record(event) -> Dict:
+    return {
+        "id": event.id,
+        "at": event.at.isoformat(),
+        "name": event.name,
+        "importance": event.importance,
+        "end_at": event.end_at.isoformat() if event.end_at is not None else None,
+    }
+
+
+def _export_ndjson(events: Iterable, chunk_size: int) -> Iterator[bytes]:
+    for chunk in _chunks(events, chunk_size):
+        yield "".join(json.dumps(_record(event), ensure_ascii=False) + "\n" for event in chunk).encode("utf-8")
+
+
+def _export_csv(events: Iterable, chunk_size: int) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=FIELDS)
+    writer.writeheader()
+    for chunk in _chunks(events, chunk_size):
+        writer.writerows(_record(event) for event in chunk)
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+class _ChunkSink(io.RawIOBase):
+    """
+    Destination d'écriture qui accumule les octets jusqu'à leur récupération.
+
+    La position reste celle du flux complet, ce dont le writer Parquet a besoin
+    pour calculer les offsets du pied de fichier.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._pending = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._pending.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._pending)
+        self._pending.clear()
+        return data
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise ImportError("Le format parquet nécessite pyarrow (pip install pyarrow)") from None
+    return pyarrow, pyarrow.parquet
+
+
+def _export_parquet(events: Iterable, chunk_size: int) -> Iterator[bytes]:
+    pa, pq = _require_pyarrow()
+    schema = pa.schema([
+        ("id", pa.string()),
+        ("at", pa.timestamp("ms")),
+        ("name", pa.string()),
+        ("importance", pa.string()),
+        ("end_at", pa.timestamp("ms")),
+    ])
+
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema)
+    try:
+        for chunk in _chunks(events, chunk_size):
+            writer.write_table(pa.table({
+                "id": [event.id for event in chunk],
+                "at": [event.at for event in chunk],
+                "name": [event.name for event in chunk],
+                "importance": [event.importance for event in chunk],
+                "end_at": [event.end_at for event in chunk],
+            }, schema=schema))
+            data = sink.drain()
+            if data:
+                yield data
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+def iter_export(events: Iterable, fmt: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[bytes]:
+    """
+    Sérialise des événements en morceaux d'octets.
+
+    Args:
+        events: Événements à exporter, dans l'ordre souhaité
+        fmt: Format de sortie ("ndjson", "csv" ou "parquet")
+        chunk_size: Nombre d'événements par morceau (ou par row group Parquet)
+
+    Returns:
+        Iterator: Morceaux d'octets à écrire à la suite
+    """
+    _check_format(fmt)
+    if fmt == NDJSON:
+        return _export_ndjson(events, chunk_size)
+    if fmt == CSV:
+        return _export_csv(events, chunk_size)
+    return _export_parquet(events, chunk_size)
+
+
+def _parse_date(value):
+    if isinstance(value, str):
+        return datetime.datetime.fromisoformat(value)
+    return value
+
+
+def _parse_record(record: Dict) -> Dict:
+    return {
+        "id": record.get("id") or None,
+        "at": _parse_date(record["at"]),
+        "name": record["name"],
+        "importance": record.get("importance") or "normal",
+        "end_at": _parse_date(record.get("end_at") or None),
+    }
+
+
+def _text_lines(fileobj: BinaryIO) -> Iterator[str]:
+    text = io.TextIOWrapper(fileobj, encoding="utf-8", newline="")
+    try:
+        yield from text
+    finally:
+        text.detach()
+
+
+def iter_import(fileobj: BinaryIO, fmt: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[Dict]:
+    """
+    Lit des enregistrements d'événements depuis un fichier binaire.
+
+    Args:
+        fileobj: Fichier ouvert en lecture binaire
+        fmt: Format d'entrée ("ndjson", "csv" ou "parquet")
+        chunk_size: Nombre de lignes lues à la fois pour le format Parquet
+
+    Returns:
+        Iterator: Dictionnaires avec les clés id (ou None), at, name, importance et end_at (ou None)
+    """
+    _check_format(fmt)
+    if fmt == NDJSON:
+        for line in _text_lines(fileobj):
+            if line.strip():
+                yield _parse_record(json.loads(line))
+    elif fmt == CSV:
+        for record in csv.DictReader(_text_lines(fileobj)):
+            yield _parse_record(record)
+    else:
+        _, pq = _require_pyarrow()
+        for batch in pq.ParquetFile(fileobj).iter_batches(batch_size=chunk_size):
+            for record in batch.to_pylist():
+                yield _parse_record(record)
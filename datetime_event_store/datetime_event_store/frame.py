@@ -0,0 +1,253 @@
+"""
+Lecture des événements en colonnes NumPy, pour l'analyse.
+
+Les documents du curseur sont décodés directement en colonnes, sans créer
+d'objet Event par ligne: `at` et `end_at` en datetime64[ms] (NaT pour un
+événement ponctuel), `importance` en codes de catégorie, `name` et `id` en
+tableaux d'objets. Le résultat est un DataFrame pandas si pandas est installé,
+sinon un dictionnaire de tableaux NumPy. NumPy et pandas ne sont importés
+qu'à l'usage.
+
+`resample_counts` et `rolling_counts` calculent des comptes par intervalle et
+sur une fenêtre glissante, de façon vectorisée.
+"""
+
+import datetime
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from . import schema
+
+COLUMNS = ("id", "at", "name", "importance", "end_at")
+DEFAULT_COLUMNS = ("at", "name", "importance")
+
+# Catégories d'importance connues, par code croissant; les autres sont ajoutées à la lecture
+IMPORTANCE_CATEGORIES = tuple(sorted(schema.IMPORTANCE_CODES, key=schema.IMPORTANCE_CODES.get))
+
+_MS = datetime.timedelta(milliseconds=1)
+
+
+def _require_numpy():
+    try:
+        import numpy
+    except ImportError:
+        raise ImportError("La lecture en colonnes nécessite numpy (pip install numpy)") from None
+    return numpy
+
+
+def _optional_pandas():
+    try:
+        import pandas
+    except ImportError:
+        return None
+    return pandas
+
+
+def check_columns(columns: Iterable[str]) -> Tuple[str, ...]:
+    """
+    Vérifie les colonnes demandées.
+
+    Raises:
+        ValueError: Si une colonne est inconnue
+    """
+    columns = tuple(columns)
+    unknown = [column for column in columns if column not in COLUMNS]
+    if unknown or not columns:
+        raise ValueError(f"Colonnes inconnues: {unknown!r} (colonnes acceptées: {', '.join(COLUMNS)})")
+    return columns
+
+
+def projection(version: int, columns: Sequence[str]) -> Dict:
+    """
+    Construit la projection MongoDB qui ne lit que les champs des colonnes demandées.
+    """
+    date_key, name_key, importance_key = schema.FIELDS[version]
+    fields = {date_key: 1}
+    if version == schema.V2:
+        fields["v"] = 1
+    if "name" in columns:
+        fields[name_key] = 1
+    if "importance" in columns:
+        fields[importance_key] = 1
+        if version == schema.V2:
+            fields["s"] = 1
+    if "end_at" in columns:
+        fields[schema.INTERVAL_FIELDS[version][0]] = 1
+    if "id" not in columns:
+        fields["_id"] = 0
+    return fields
+
+
+def document_date(doc: Dict) -> datetime.datetime:
+    """
+    Retourne la date d'un document de l'une ou l'autre version (clé de fusion).
+    """
+    return doc[schema.date_field(schema.detect_version(doc))]
+
+
+class FrameBuilder:
+    """
+    Accumule des événements colonne par colonne puis les convertit en tableaux.
+    """
+
+    def __init__(self, columns: Sequence[str] = DEFAULT_COLUMNS):
+        self.columns = check_columns(columns)
+        self._values: Dict[str, List] = {column: [] for column in self.columns}
+        self._categories = {name: code for code, name in enumerate(IMPORTANCE_CATEGORIES)}
+        self._codes_v2 = {schema.IMPORTANCE_CODES[name]: code for name, code in self._categories.items()}
+
+    def _category(self, importance: str) -> int:
+        code = self._categories.get(importance)
+        if code is None:
+            code = self._categories[importance] = len(self._categories)
+        return code
+
+    def add(self, at: datetime.datetime, name: Optional[str] = None, importance: Optional[str] = None,
+            event_id: Optional[str] = None, end_at: Optional[datetime.datetime] = None) -> None:
+        """
+        Ajoute un événement décodé.
+        """
+        values = self._values
+        if "at" in values:
+            values["at"].append(at)
+        if "name" in values:
+            values["name"].append(name)
+        if "importance" in values:
+            values["importance"].append(self._category(importance))
+        if "id" in values:
+            values["id"].append(event_id)
+        if "end_at" in values:
+            values["end_at"].append(end_at)
+
+    def add_document(self, doc: Dict) -> None:
+        """
+        Ajoute un document MongoDB de l'une ou l'autre version, lu avec `projection`.
+        """
+        version = schema.detect_version(doc)
+        date_key, name_key, importance_key = schema.FIELDS[version]
+        values = self._values
+        if "at" in values:
+            values["at"].append(doc[date_key])
+        if "name" in values:
+            values["name"].append(doc.get(name_key))
+        if "importance" in values:
+            if version == schema.V2:
+                code = self._codes_v2.get(doc[importance_key])
+                if code is None:
+                    code = self._category(schema.decode_importance(doc[importance_key], doc.get("s")))
+            else:
+                code = self._category(doc[importance_key])
+            values["importance"].append(code)
+        if "id" in values:
+            values["id"].append(str(doc["_id"]))
+        if "end_at" in values:
+            values["end_at"].append(doc.get(schema.INTERVAL_FIELDS[version][0]))
+
+    @property
+    def categories(self) -> List[str]:
+        """
+        Catégories d'importance, dans l'ordre de leurs codes.
+        """
+        return sorted(self._categories, key=self._categories.get)
+
+    def arrays(self) -> Dict:
+        """
+        Convertit les colonnes en tableaux NumPy; `importance` contient les codes de `categories`.
+        """
+        np = _require_numpy()
+        arrays = {}
+        for column, values in self._values.items():
+            if column in ("at", "end_at"):
+                arrays[column] = np.array(values, dtype="datetime64[ms]")
+            elif column == "importance":
+                arrays[column] = np.array(values, dtype=np.int16)
+            else:
+                arrays[column] = np.array(values, dtype=object)
+        return arrays
+
+    def build(self):
+        """
+        Retourne un DataFrame pandas si pandas est installé, sinon un dictionnaire de tableaux NumPy
+        (avec les noms des catégories d'importance sous la clé `importance_categories`).
+        """
+        arrays = self.arrays()
+        pd = _optional_pandas()
+        if pd is None:
+            if "importance" in arrays:
+                arrays["importance_categories"] = self.categories
+            return arrays
+        if "importance" in arrays:
+            arrays["importance"] = pd.Categorical.from_codes(arrays["importance"], self.categories)
+        return pd.DataFrame(arrays, columns=list(self.columns))
+
+
+def _dates(frame):
+    np = _require_numpy()
+    return np.asarray(frame["at"], dtype="datetime64[ms]")
+
+
+def _milliseconds(delta: datetime.timedelta):
+    np = _require_numpy()
+    if delta <= datetime.timedelta(0):
+        raise ValueError("La durée doit être strictement positive")
+    return np.timedelta64(delta // _MS, "ms")
+
+
+def _is_dataframe(frame) -> bool:
+    pd = _optional_pandas()
+    return pd is not None and isinstance(frame, pd.DataFrame)
+
+
+def resample_counts(frame, step: datetime.timedelta, origin: Optional[datetime.datetime] = None):
+    """
+    Compte les événements par intervalle de durée fixe, intervalles vides compris.
+
+    Args:
+        frame: Résultat de get_events_frame (DataFrame ou dictionnaire de tableaux)
+        step: Largeur des intervalles
+        origin: Début du premier intervalle (défaut: date du premier événement arrondie à `step`
+            depuis 1970-01-01)
+
+    Returns:
+        Série pandas indexée par début d'intervalle pour un DataFrame, sinon
+        un tuple (débuts des intervalles, comptes) de tableaux NumPy
+    """
+    np = _require_numpy()
+    at = _dates(frame)
+    step = _milliseconds(step)
+    if len(at):
+        if origin is None:
+            first = at.min().astype(np.int64)
+            origin = (first - first % step.astype(np.int64)).astype("datetime64[ms]")
+        else:
+            origin = np.datetime64(origin, "ms")
+        at = at[at >= origin]
+    if len(at):
+        counts = np.bincount(((at - origin) // step).astype(np.int64))
+        starts = origin + np.arange(len(counts)) * step
+    else:
+        counts = np.zeros(0, dtype=np.int64)
+        starts = np.zeros(0, dtype="datetime64[ms]")
+
+    if _is_dataframe(frame):
+        pd = _optional_pandas()
+        return pd.Series(counts, index=pd.DatetimeIndex(starts, name="at"), name="count")
+    return starts, counts
+
+
+def rolling_counts(frame, window: datetime.timedelta):
+    """
+    Compte, pour chaque événement, les événements de la fenêtre ]at - window, at].
+
+    Les dates doivent être triées, ce qui est le cas du résultat de get_events_frame.
+
+    Returns:
+        Série pandas alignée sur le DataFrame, sinon tableau NumPy
+    """
+    np = _require_numpy()
+    at = _dates(frame)
+    counts = np.searchsorted(at, at, side="right") - np.searchsorted(at, at - _milliseconds(window), side="right")
+
+    if _is_dataframe(frame):
+        pd = _optional_pandas()
+        return pd.Series(counts, index=frame.index, name="count")
+    return counts
@@ -0,0 +1,296 @@
+"""
+Copie en mémoire des événements récents d'un DatetimeEventStore.
+
+La plupart des lectures portent sur les derniers jours. Le magasin peut garder
+les événements d'une fenêtre glissante (les `window` dernières, événements
+futurs compris) dans un InMemoryEventStore: une lecture ou un comptage dont le
+début est dans la fenêtre est servi depuis la mémoire, les autres sont lus
+dans MongoDB.
+
+La copie est chargée à la création du magasin, tenue à jour par ses propres
+écritures et, pour les écritures d'autres processus, par le flux de
+changements de MongoDB (replica set) ou à défaut par un rechargement
+périodique (HotWindowRefresher). Les écritures reçues pendant un rechargement
+sont rejouées sur la nouvelle copie. Le début de la fenêtre avance au fil des
+lectures; les événements qui en sont sortis sont écartés par le
+rafraîchissement, hors du chemin des requêtes.
+"""
+
+import datetime
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional
+
+from pymongo.errors import OperationFailure, PyMongoError
+
+from .event_store import Event
+from .memory import InMemoryEventStore
+
+DEFAULT_REFRESH_INTERVAL = 60.0
+
+# Erreur d'un flux de changements demandé hors replica set
+CHANGE_STREAM_NOT_SUPPORTED = 40573
+
+
+class HotWindow:
+    """
+    Événements d'une fenêtre glissante, triés par date, avec les statistiques de lecture.
+    """
+
+    def __init__(self, window: datetime.timedelta, clock: Optional[Callable[[], datetime.datetime]] = None):
+        """
+        Initialise une fenêtre vide, qui ne sert aucune lecture avant son chargement.
+
+        Args:
+            window: Durée de la fenêtre
+            clock: Heure courante UTC naïve (défaut: datetime.datetime.utcnow)
+        """
+        if window <= datetime.timedelta(0):
+            raise ValueError("La durée de la fenêtre doit être strictement positive")
+        self.window = window
+        self._clock = clock or datetime.datetime.utcnow
+        self._events = InMemoryEventStore()
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        # Modifications reçues pendant un chargement, rejouées sur la nouvelle copie
+        self._pending: Optional[List[Callable[[InMemoryEventStore], object]]] = None
+        self.start: Optional[datetime.datetime] = None
+        self.loaded_at: Optional[datetime.datetime] = None
+        self.hits = 0
+        self.misses = 0
+
+    def cutoff(self) -> datetime.datetime:
+        """
+        Début de la fenêtre à l'heure courante.
+        """
+        return self._clock() - self.window
+
+    def load(self, events: Iterable[Event], start: datetime.datetime) -> None:
+        """
+        Remplace le contenu de la fenêtre par les événements postérieurs à `start`.
+
+        `events` peut être un curseur: les modifications reçues pendant sa
+        lecture sont rejouées sur la nouvelle copie avant qu'elle ne serve.
+        """
+        with self._load_lock:
+            with self._lock:
+                self._pending = []
+            mirror = InMemoryEventStore()
+            try:
+                mirror.store_events(events)
+            except BaseException:
+                with self._lock:
+                    self._pending = None
+                raise
+            with self._lock:
+                for change in self._pending:
+                    change(mirror)
+                self._pending = None
+                self._events = mirror
+                self.start = start
+                self.loaded_at = self._clock()
+
+    def invalidate(self) -> None:
+        """
+        Ne sert plus aucune lecture jusqu'au prochain chargement.
+        """
+        with self._lock:
+            self.start = None
+
+    def _advance(self) -> Optional[datetime.datetime]:
+        # Appelé avec self._lock: le début avance sans toucher aux événements
+        cutoff = self.cutoff()
+        if self.start is not None and cutoff > self.start:
+            self.start = cutoff
+        return self.start
+
+    def evict(self) -> int:
+        """
+        Écarte les événements sortis de la fenêtre (appelé par le rafraîchissement).
+
+        Returns:
+            int: Nombre d'événements écartés
+        """
+        with self._lock:
+            start = self._advance()
+            events = self._events
+        if start is None:
+            return 0
+        return events.delete_events(datetime.datetime.min, start - datetime.timedelta(microseconds=1))
+
+    def covers(self, start: Optional[datetime.datetime]) -> bool:
+        """
+        Indique si une lecture commençant à `start` peut être servie depuis la fenêtre, et la comptabilise.
+
+        Les événements antérieurs au début de la fenêtre, pas encore écartés,
+        sont hors de la plage d'une lecture servie.
+        """
+        with self._lock:
+            window_start = self._advance()
+            hit = window_start is not None and start is not None and start >= window_start
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+        return hit
+
+    @property
+    def events(self) -> InMemoryEventStore:
+        """
+        Événements de la fenêtre.
+        """
+        return self._events
+
+    def apply(self, change: Callable[[InMemoryEventStore], object]) -> None:
+        """
+        Applique une modification aux événements de la fenêtre; pendant un
+        chargement, elle est aussi rejouée sur la nouvelle copie.
+
+        Args:
+            change: Fonction recevant l'InMemoryEventStore de la fenêtre
+        """
+        with self._lock:
+            change(self._events)
+            if self._pending is not None:
+                self._pending.append(change)
+
+    def upsert(self, event: Event) -> None:
+        """
+        Ajoute ou remplace un événement s'il est dans la fenêtre, sinon le retire.
+        """
+        def change(events: InMemoryEventStore) -> None:
+            if self.start is not None and event.at >= self.start:
+                events.replace_event(event)
+            else:
+                events.delete_event(event.id)
+
+        self.apply(change)
+
+    def remove(self, event_id: str) -> None:
+        """
+        Retire un événement de la fenêtre.
+        """
+        self.apply(lambda events: events.delete_event(event_id))
+
+    def memory_bytes(self) -> int:
+        """
+        Estime la mémoire occupée par les événements de la fenêtre (objets et index triés).
+
+        L'estimation est tenue à jour par le magasin en mémoire: la lire ne parcourt pas les événements.
+        """
+        return self._events.memory_bytes()
+
+    def stats(self) -> Dict:
+        """
+        Retourne l'état de la fenêtre, son taux de lectures servies et son empreinte mémoire.
+        """
+        with self._lock:
+            hits, misses, start, loaded_at = self.hits, self.misses, self.start, self.loaded_at
+        reads = hits + misses
+        return {
+            "window_seconds": self.window.total_seconds(),
+            "start": start,
+            "loaded_at": loaded_at,
+            "events": self._events.count_events(),
+            "hits": hits,
+            "misses": misses,
+            "hit_ratio": hits / reads if reads else 0.0,
+            "memory_bytes": self.memory_bytes(),
+        }
+
+
+class HotWindowRefresher:
+    """
+    Tient à jour la fenêtre d'un magasin avec les écritures des autres processus.
+
+    Suit le flux de changements de la collection quand MongoDB le permet
+    (replica set), sinon recharge la fenêtre à intervalle régulier.
+    """
+
+    def __init__(self, store, interval: float = DEFAULT_REFRESH_INTERVAL):
+        """
+        Initialise le rafraîchissement.
+
+        Args:
+            store: DatetimeEventStore dont la fenêtre est tenue à jour
+            interval: Période de rechargement en secondes, sans flux de changements
+        """
+        self.store = store
+        self.hot_window: HotWindow = store.hot_window
+        self.interval = interval
+        self.mode: Optional[str] = None
+        self.error: Optional[BaseException] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def apply_change(self, change: Dict) -> None:
+        """
+        Applique un événement du flux de changements à la fenêtre.
+        """
+        operation = change.get("operationType")
+        if operation in ("insert", "replace", "update"):
+            doc = change.get("fullDocument")
+            if doc is None:
+                self.hot_window.remove(str(change["documentKey"]["_id"]))
+            else:
+                self.hot_window.upsert(Event.from_document(doc))
+        elif operation == "delete":
+            self.hot_window.remove(str(change["documentKey"]["_id"]))
+        elif operation in ("drop", "rename", "dropDatabase", "invalidate"):
+            self.store.reload_hot_window()
+
+    def _follow_changes(self) -> None:
+        with self.store.events_collection.watch(full_document="updateLookup", max_await_time_ms=1000) as stream:
+            # Le rechargement après l'ouverture du flux couvre les écritures faites avant
+            self.store.reload_hot_window()
+            self.mode = "change_stream"
+            next_eviction = time.monotonic() + self.interval
+            while not self._stop.is_set():
+                change = stream.try_next()
+                if change is not None:
+                    self.apply_change(change)
+                if time.monotonic() >= next_eviction:
+                    self.hot_window.evict()
+                    next_eviction = time.monotonic() + self.interval
+
+    def _poll(self) -> None:
+        self.mode = "polling"
+        while not self._stop.wait(self.interval):
+            try:
+                self.store.reload_hot_window()
+                self.error = None
+            except PyMongoError as e:
+                self.error = e
+
+    def run(self) -> None:
+        """
+        Suit le flux de changements, ou recharge périodiquement la fenêtre, jusqu'à l'arrêt.
+        """
+        while not self._stop.is_set():
+            try:
+                self._follow_changes()
+            except OperationFailure as e:
+                if e.code != CHANGE_STREAM_NOT_SUPPORTED:
+                    self.error = e
+                    self._stop.wait(self.interval)
+                    continue
+                self._poll()
+            except PyMongoError as e:
+                self.error = e
+                self._stop.wait(self.interval)
+
+    def start(self) -> None:
+        """
+        Démarre le rafraîchissement dans un thread d'arrière-plan.
+        """
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.run, name="hot-window-refresher", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """
+        Arrête le rafraîchissement.
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
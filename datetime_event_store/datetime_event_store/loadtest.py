@@ -0,0 +1,377 @@
+"""
+Générateur de charge HTTP pour l'API DatetimeEvents.
+
+Le générateur mélange créations, listes sur des plages de largeurs variées,
+lectures, mises à jour et suppressions selon des proportions configurables,
+à un débit cible, et rapporte le débit et les latences p50/p95/p99/max par route.
+
+Il cible soit l'application FastAPI chargée dans le processus (par défaut avec
+le backend en mémoire, sans MongoDB), soit une URL:
+
+    datetime-event-store loadtest --app-dir fastApi --duration 30 --rate 200
+    datetime-event-store loadtest --url http://localhost:8000 --duration 60 --concurrency 32
+
+Les latences sont mesurées depuis l'instant prévu de chaque requête et non
+depuis son envoi effectif, pour que les retards d'un serveur saturé
+apparaissent dans les percentiles au lieu de ralentir silencieusement la charge.
+"""
+
+import datetime
+import http.client
+import importlib
+import itertools
+import json
+import math
+import os
+import random
+import sys
+import threading
+import time
+import urllib.parse
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+OPERATIONS = ("create", "list", "get", "update", "delete")
+
+DEFAULT_MIX = {"create": 20, "list": 35, "get": 25, "update": 12, "delete": 8}
+
+LIST_WIDTHS = (
+    ("1h", datetime.timedelta(hours=1), 40),
+    ("1d", datetime.timedelta(days=1), 35),
+    ("7d", datetime.timedelta(days=7), 20),
+    ("30d", datetime.timedelta(days=30), 5),
+)
+
+IMPORTANCES = ("basse", "normale", "haute", "critique")
+
+EVENT_SPREAD = datetime.timedelta(days=30)
+
+
+def parse_mix(value: str) -> Dict[str, float]:
+    """
+    Analyse des proportions de la forme "create=20,list=35,get=25".
+
+    Les opérations absentes ont un poids nul.
+    """
+    mix = {}
+    for item in value.split(","):
+        name, _, weight = item.partition("=")
+        name = name.strip()
+        if name not in OPERATIONS:
+            raise ValueError(f"Opération inconnue: {name!r} (opérations: {', '.join(OPERATIONS)})")
+        mix[name] = float(weight)
+    if not any(weight > 0 for weight in mix.values()):
+        raise ValueError("Au moins une opération doit avoir un poids positif")
+    return mix
+
+
+def percentile(sorted_values: Sequence[float], q: float) -> float:
+    """
+    Percentile par rang le plus proche d'une liste triée.
+    """
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(q / 100.0 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+class LatencyRecorder:
+    """
+    Collecte les latences et les erreurs par route.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._latencies: Dict[str, List[float]] = {}
+        self._errors: Dict[str, int] = {}
+
+    def record(self, route: str, latency: float, ok: bool) -> None:
+        with self._lock:
+            self._latencies.setdefault(route, []).append(latency)
+            if not ok:
+                self._errors[route] = self._errors.get(route, 0) + 1
+
+    def summary(self, elapsed: float) -> List[Dict]:
+        """
+        Résumé par route: nombre, erreurs, débit et percentiles de latence en millisecondes.
+        """
+        rows = []
+        with self._lock:
+            for route in sorted(self._latencies):
+                values = sorted(self._latencies[route])
+                rows.append({
+                    "route": route,
+                    "count": len(values),
+                    "errors": self._errors.get(route, 0),
+                    "throughput": len(values) / elapsed if elapsed > 0 else 0.0,
+                    "p50_ms": percentile(values, 50) * 1000,
+                    "p95_ms": percentile(values, 95) * 1000,
+                    "p99_ms": percentile(values, 99) * 1000,
+                    "max_ms": values[-1] * 1000,
+                })
+        return rows
+
+
+class InProcessTransport:
+    """
+    Envoie les requêtes à une application ASGI chargée dans le processus.
+    """
+
+    def __init__(self, app):
+        from starlette.testclient import TestClient
+
+        self._client = TestClient(app)
+
+    def __enter__(self):
+        self._client.__enter__()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._client.__exit__(*exc_info)
+
+    def request(self, method: str, path: str, body: Optional[Dict] = None) -> Tuple[int, Optional[Dict]]:
+        response = self._client.request(method, path, json=body)
+        return response.status_code, response.json() if response.content else None
+
+
+class HttpTransport:
+    """
+    Envoie les requêtes à une URL, avec une connexion persistante par thread.
+    """
+
+    def __init__(self, url: str, timeout: float = 30.0):
+        parsed = urllib.parse.urlsplit(url)
+        self._connection_class = (http.client.HTTPSConnection if parsed.scheme == "https"
+                                  else http.client.HTTPConnection)
+        self._netloc = parsed.netloc
+        self._prefix = parsed.path.rstrip("/")
+        self._timeout = timeout
+        self._local = threading.local()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        pass
+
+    def _connection(self) -> http.client.HTTPConnection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = self._connection_class(self._netloc, timeout=self._timeout)
+            self._local.connection = connection
+        return connection
+
+    def request(self, method: str, path: str, body: Optional[Dict] = None) -> Tuple[int, Optional[Dict]]:
+        payload = json.dumps(body).encode("utf-8") if body is not None else None
+        headers = {"Content-Type": "application/json"} if payload is not None else {}
+        connection = self._connection()
+        try:
+            connection.request(method, self._prefix + path, body=payload, headers=headers)
+            response = connection.getresponse()
+            data = response.read()
+        except (OSError, http.client.HTTPException):
+            connection.close()
+            self._local.connection = None
+            raise
+        return response.status, json.loads(data) if data else None
+
+
+def load_app(target: str, app_dir: str = ".", backend: Optional[str] = "memory"):
+    """
+    Importe une application ASGI désignée par "module:attribut".
+
+    Args:
+        target: Application à importer, par exemple "main:app"
+        app_dir: Répertoire ajouté au chemin d'import
+        backend: Backend du service (variable EVENT_STORE_BACKEND), None pour ne pas le forcer
+    """
+    if backend is not None:
+        os.environ["EVENT_STORE_BACKEND"] = backend
+    sys.path.insert(0, os.path.abspath(app_dir))
+    module_name, _, attribute = target.partition(":")
+    return getattr(importlib.import_module(module_name), attribute or "app")
+
+
+class LoadGenerator:
+    """
+    Exécute un mélange d'opérations sur l'API à un débit cible.
+    """
+
+    def __init__(self, transport, mix: Optional[Dict[str, float]] = None, rate: float = 100.0,
+                 concurrency: int = 8, skew: float = 1.2, seed: Optional[int] = None,
+                 clock: Callable[[], float] = time.perf_counter):
+        """
+        Initialise le générateur.
+
+        Args:
+            transport: Transport HTTP (InProcessTransport ou HttpTransport)
+            mix: Poids relatifs des opérations (défaut: DEFAULT_MIX)
+            rate: Débit cible en requêtes par seconde (0 pour enchaîner sans pause)
+            concurrency: Nombre de threads émetteurs
+            skew: Concentration des lectures/écritures sur les événements récents (1 = uniforme)
+            seed: Graine aléatoire pour rejouer une séquence (optionnel)
+            clock: Horloge monotone utilisée pour les mesures
+        """
+        self.transport = transport
+        self.mix = mix or DEFAULT_MIX
+        self.rate = rate
+        self.concurrency = max(1, concurrency)
+        self.skew = max(1.0, skew)
+        self.recorder = LatencyRecorder()
+        self._random = random.Random(seed)
+        self._random_lock = threading.Lock()
+        self._ids: List[str] = []
+        self._ids_lock = threading.Lock()
+        self._clock = clock
+        self._now = datetime.datetime.utcnow()
+
+    def _pick_operation(self) -> str:
+        with self._random_lock:
+            names = [name for name in OPERATIONS if self.mix.get(name, 0) > 0]
+            return self._random.choices(names, weights=[self.mix[name] for name in names])[0]
+
+    def _pick_id(self, remove: bool = False) -> Optional[str]:
+        with self._ids_lock:
+            if not self._ids:
+                return None
+            with self._random_lock:
+                offset = int(len(self._ids) * self._random.random() ** self.skew)
+            index = len(self._ids) - 1 - offset
+            return self._ids.pop(index) if remove else self._ids[index]
+
+    def _random_event(self) -> Dict:
+        with self._random_lock:
+            at = self._now + EVENT_SPREAD * (2 * self._random.random() - 1)
+            importance = self._random.choice(IMPORTANCES)
+            number = self._random.randrange(1_000_000)
+        return {"name": f"Événement de charge {number}", "importance": importance, "at": at.isoformat()}
+
+    def _list_request(self) -> Tuple[str, str]:
+        with self._random_lock:
+            label, width, _ = self._random.choices(LIST_WIDTHS, weights=[w for _, _, w in LIST_WIDTHS])[0]
+            start = self._now + EVENT_SPREAD * (2 * self._random.random() - 1) - width / 2
+        query = urllib.parse.urlencode({"start": start.isoformat(), "end": (start + width).isoformat()})
+        return f"GET /api/events [{label}]", f"/api/events?{query}"
+
+    def _execute(self, operation: str) -> Tuple[str, bool]:
+        if operation in ("get", "update", "delete"):
+            event_id = self._pick_id(remove=operation == "delete")
+            if event_id is None:
+                operation = "create"
+
+        if operation == "create":
+            status, body = self.transport.request("POST", "/api/events", self._random_event())
+            if status == 201 and body:
+                with self._ids_lock:
+                    self._ids.append(body["id"])
+            return "POST /api/events", status == 201
+        if operation == "list":
+            route, path = self._list_request()
+            status, _ = self.transport.request("GET", path)
+            return route, status == 200
+        if operation == "get":
+            status, _ = self.transport.request("GET", f"/api/events/{event_id}")
+            return "GET /api/events/{id}", status in (200, 404)
+        if operation == "update":
+            status, _ = self.transport.request("PUT", f"/api/events/{event_id}", {"name": self._random_event()["name"]})
+            return "PUT /api/events/{id}", status in (200, 404)
+
+        status, _ = self.transport.request("DELETE", f"/api/events/{event_id}")
+        return "DELETE /api/events/{id}", status in (204, 404)
+
+    def preload(self, count: int) -> None:
+        """
+        Crée des événements initiaux, hors mesures, pour alimenter lectures et mises à jour.
+        """
+        for _ in range(count):
+            status, body = self.transport.request("POST", "/api/events", self._random_event())
+            if status == 201 and body:
+                self._ids.append(body["id"])
+
+    def run(self, duration: Optional[float] = None, requests: Optional[int] = None) -> List[Dict]:
+        """
+        Exécute la charge jusqu'à la durée ou au nombre de requêtes demandé.
+
+        Args:
+            duration: Durée de la charge en secondes (optionnel)
+            requests: Nombre total de requêtes (optionnel)
+
+        Returns:
+            List: Résumé par route (voir LatencyRecorder.summary)
+        """
+        if duration is None and requests is None:
+            raise ValueError("Il faut préciser une durée ou un nombre de requêtes")
+
+        started = self._clock()
+        deadline = started + duration if duration is not None else None
+        interval = 1.0 / self.rate if self.rate > 0 else 0.0
+        slots = iter(range(requests)) if requests is not None else itertools.count()
+        slots_lock = threading.Lock()
+
+        def worker():
+            while True:
+                with slots_lock:
+                    slot = next(slots, None)
+                if slot is None:
+                    return
+                scheduled = started + slot * interval if interval else self._clock()
+                if deadline is not None and scheduled >= deadline:
+                    return
+                delay = scheduled - self._clock()
+                if delay > 0:
+                    time.sleep(delay)
+
+                operation = self._pick_operation()
+                try:
+                    route, ok = self._execute(operation)
+                except Exception:
+                    route, ok = operation, False
+                self.recorder.record(route, self._clock() - scheduled, ok)
+
+        threads = [threading.Thread(target=worker, daemon=True) for _ in range(self.concurrency)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        return self.recorder.summary(self._clock() - started)
+
+
+def format_report(rows: List[Dict]) -> str:
+    """
+    Met en forme le résumé sous forme de tableau.
+    """
+    header = f"{'route':<28} {'count':>7} {'errors':>6} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}"
+    lines = [header, "-" * len(header)]
+    for row in rows:
+        lines.append(
+            f"{row['route']:<28} {row['count']:>7} {row['errors']:>6} {row['throughput']:>8.1f} "
+            f"{row['p50_ms']:>8.2f} {row['p95_ms']:>8.2f} {row['p99_ms']:>8.2f} {row['max_ms']:>8.2f}"
+        )
+    total = sum(row["count"] for row in rows)
+    throughput = sum(row["throughput"] for row in rows)
+    lines.append(f"{'total':<28} {total:>7} {sum(row['errors'] for row in rows):>6} {throughput:>8.1f}")
+    return "\n".join(lines)
+
+
+def run_from_args(args) -> int:
+    """
+    Exécute la charge à partir des arguments de la sous-commande `loadtest`.
+    """
+    mix = parse_mix(args.mix) if args.mix else None
+
+    if args.url:
+        transport = HttpTransport(args.url)
+    else:
+        transport = InProcessTransport(load_app(args.app, args.app_dir, args.backend))
+
+    with transport:
+        generator = LoadGenerator(transport, mix=mix, rate=args.rate, concurrency=args.concurrency,
+                                  skew=args.skew, seed=args.seed)
+        generator.preload(args.preload)
+        rows = generator.run(duration=args.duration, requests=args.requests)
+
+    if args.json:
+        print(json.dumps(rows, indent=2))
+    else:
+        print(format_report(rows))
+    return 0
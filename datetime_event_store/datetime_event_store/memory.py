@@ -0,0 +1,599 @@
+"""
+Stockage d'événements en mémoire, sans MongoDB.
+
+InMemoryEventStore expose les opérations de base de DatetimeEventStore avec des
+listes triées et une recherche binaire. Il sert de backend local pour les tests
+de charge et le développement hors ligne; les données ne sont pas persistées.
+
+Les événements avec une durée sont aussi rangés dans une liste triée par classe
+de durée (voir schema.duration_class), comme l'index (classe, date) du store
+MongoDB, pour que `overlapping` ne parcoure pas tous les intervalles longs.
+"""
+
+import bisect
+import collections
+import datetime
+import heapq
+import itertools
+import sys
+import threading
+import uuid
+from typing import Dict, Generator, Iterable, List, Optional, Tuple, Union
+
+from . import frame, schema
+from .event_store import (
+    BATCH_CREATE, BATCH_DELETE, CREATED, DEFAULT_IDEMPOTENCY_TTL, DELETED, FAILED, NOT_FOUND, SORT_AT,
+    SORT_AT_DESC, UNCHANGED, UPDATED, Event, apply_changes, batch_result, calendar_day, check_batch_operation,
+    check_interval, check_sort, idempotency_record, merge_nearest, month_range, recorded_event, replayed_event,
+    resolve_timezone, sort_key, utc_naive
+)
+
+# Par événement: références dans les deux listes triées et l'index par ID
+_REFERENCES_BYTES = 3 * 8
+
+
+def event_bytes(event: Event) -> int:
+    """
+    Estime la mémoire occupée par un événement rangé dans le magasin (objet, champs, clé de tri et références).
+    """
+    total = sys.getsizeof(event) + sys.getsizeof(event.__dict__)
+    total += sum(sys.getsizeof(value) for value in (event.at, event.name, event.importance, event.id))
+    return total + sys.getsizeof((event.at, 0)) + _REFERENCES_BYTES
+
+
+class InMemoryEventStore:
+    """
+    Classe pour stocker et récupérer des événements liés à des dates, en mémoire.
+    """
+
+    def __init__(self, idempotency_ttl: datetime.timedelta = DEFAULT_IDEMPOTENCY_TTL):
+        """
+        Initialise un magasin d'événements vide.
+
+        Args:
+            idempotency_ttl: Durée de conservation des clés d'idempotence (défaut: 1 jour)
+        """
+        self.idempotency_ttl = idempotency_ttl
+        self._idempotency: Dict[str, Dict] = {}
+        self._lock = threading.RLock()
+        self._sequence = itertools.count()
+        self._keys: List[Tuple[datetime.datetime, int]] = []
+        self._ordered: List[Event] = []
+        self._keys_by_id: Dict[str, Tuple[datetime.datetime, int]] = {}
+        self._interval_keys: Dict[int, List[Tuple[datetime.datetime, int]]] = {}
+        self._interval_events: Dict[int, List[Event]] = {}
+        self._bytes = 0
+
+    @staticmethod
+    def _copy(event: Event) -> Event:
+        return Event(event.at, event.name, event.importance, event.id, event.end_at)
+
+    def _insert(self, event: Event) -> None:
+        key = (event.at, next(self._sequence))
+        index = bisect.bisect_right(self._keys, key)
+        self._keys.insert(index, key)
+        self._ordered.insert(index, event)
+        self._keys_by_id[event.id] = key
+        self._bytes += event_bytes(event)
+        if event.end_at is not None:
+            k = schema.duration_class(event.at, event.end_at)
+            keys = self._interval_keys.setdefault(k, [])
+            index = bisect.bisect_right(keys, key)
+            keys.insert(index, key)
+            self._interval_events.setdefault(k, []).insert(index, event)
+
+    def _remove(self, event_id: str) -> Optional[Event]:
+        key = self._keys_by_id.pop(event_id, None)
+        if key is None:
+            return None
+        index = bisect.bisect_left(self._keys, key)
+        del self._keys[index]
+        event = self._ordered.pop(index)
+        self._bytes -= event_bytes(event)
+        if event.end_at is not None:
+            k = schema.duration_class(event.at, event.end_at)
+            keys = self._interval_keys[k]
+            index = bisect.bisect_left(keys, key)
+            del keys[index]
+            del self._interval_events[k][index]
+            if not keys:
+                del self._interval_keys[k], self._interval_events[k]
+        return event
+
+    def _slice(self, start: Optional[datetime.datetime], end: Optional[datetime.datetime]) -> List[Event]:
+        start, end = utc_naive(start), utc_naive(end)
+        lo = 0 if start is None else bisect.bisect_left(self._keys, (start,))
+        hi = len(self._keys) if end is None else bisect.bisect_right(self._keys, (end, float("inf")))
+        return self._ordered[lo:hi]
+
+    def _idempotency_record(self, key: str, now: datetime.datetime) -> Optional[Dict]:
+        # Les clés sont rangées par date d'enregistrement: les expirées sont en tête
+        while self._idempotency:
+            oldest = next(iter(self._idempotency))
+            if now - self._idempotency[oldest]["created_at"] < self.idempotency_ttl:
+                break
+            del self._idempotency[oldest]
+        return self._idempotency.get(key)
+
+    def store_event(self, at: datetime.datetime, name: str, importance: str = "normal",
+                    end_at: Optional[datetime.datetime] = None, idempotency_key: Optional[str] = None) -> Event:
+        """
+        Stocke un événement associé à une date et heure.
+
+        Args:
+            at: Date et heure de l'événement
+            name: Nom ou description de l'événement
+            importance: Niveau d'importance de l'événement (défaut: "normal")
+            end_at: Date et heure de fin, pour un événement avec une durée (optionnel)
+            idempotency_key: Clé fournie par le client, unique par création (optionnel)
+
+        Returns:
+            Event: L'événement créé avec son ID, ou celui déjà créé avec la même clé
+
+        Raises:
+            ValueError: Si la clé a déjà été utilisée pour un autre événement
+        """
+        if not isinstance(at, datetime.datetime):
+            raise TypeError("Le paramètre 'at' doit être une instance de datetime.datetime")
+        check_interval(at, end_at)
+
+        event = Event(at, name, importance, uuid.uuid4().hex[:24], end_at)
+        with self._lock:
+            if idempotency_key is not None:
+                now = datetime.datetime.utcnow()
+                record = self._idempotency_record(idempotency_key, now)
+                if record is not None:
+                    return replayed_event(idempotency_key, recorded_event(record), event)
+                self._idempotency[idempotency_key] = idempotency_record(event.id, event, now)
+            self._insert(event)
+        return self._copy(event)
+
+    def store_events(self, events: Iterable[Event],
+                     idempotency_keys: Optional[Iterable[Optional[str]]] = None) -> List[Event]:
+        """
+        Stocke plusieurs événements; ceux dont l'ID existe déjà ou dont la clé
+        d'idempotence est déjà enregistrée sont ignorés.
+
+        Args:
+            events: Événements à stocker (avec ou sans ID)
+            idempotency_keys: Clé d'idempotence de chaque événement, None pour aucune (optionnel)
+
+        Returns:
+            List: Les événements effectivement insérés, avec leur ID
+        """
+        events = list(events)
+        keys = list(idempotency_keys) if idempotency_keys is not None else [None] * len(events)
+        if len(keys) != len(events):
+            raise ValueError("Il faut une clé d'idempotence (ou None) par événement")
+        now = datetime.datetime.utcnow()
+        stored = []
+        with self._lock:
+            for event, key in zip(events, keys):
+                if not isinstance(event.at, datetime.datetime):
+                    raise TypeError("Le paramètre 'at' doit être une instance de datetime.datetime")
+                check_interval(event.at, event.end_at)
+                event_id = event.id or uuid.uuid4().hex[:24]
+                if event_id in self._keys_by_id:
+                    continue
+                if key is not None:
+                    if self._idempotency_record(key, now) is not None:
+                        continue
+                    self._idempotency[key] = idempotency_record(event_id, event, now)
+                event.id = event_id
+                self._insert(self._copy(event))
+                stored.append(event)
+        return stored
+
+    def get_events(self, start: datetime.datetime, end: datetime.datetime,
+                   parallel: int = 1, sort: str = SORT_AT,
+                   limit: Optional[int] = None) -> Generator[Event, None, None]:
+        """
+        Récupère les événements dans une plage de dates spécifiée.
+
+        Args:
+            start: Date et heure de début de la période
+            end: Date et heure de fin de la période
+            parallel: Ignoré, accepté pour la compatibilité avec DatetimeEventStore
+            sort: Ordre des événements, parmi event_store.SORTS (défaut: date croissante)
+            limit: Nombre maximal d'événements retournés (défaut: None, tous)
+
+        Returns:
+            Generator: Générateur d'événements dans la plage spécifiée
+        """
+        check_sort(sort, limit)
+        if start > end:
+            start, end = end, start
+
+        with self._lock:
+            events = self._slice(start, end)
+        if sort == SORT_AT_DESC:
+            events = events[::-1]
+        elif sort != SORT_AT:
+            key, reverse = sort_key(sort)
+            if limit is None:
+                events = sorted(events, key=key, reverse=reverse)
+            else:
+                events = (heapq.nlargest if reverse else heapq.nsmallest)(limit, events, key=key)
+        if limit is not None:
+            events = events[:limit]
+        for event in events:
+            yield self._copy(event)
+
+    def overlapping(self, start: datetime.datetime, end: datetime.datetime) -> Generator[Event, None, None]:
+        """
+        Récupère les événements qui chevauchent une fenêtre, triés par date de début.
+
+        Returns:
+            Generator: Générateur des événements qui chevauchent la fenêtre
+        """
+        if start > end:
+            start, end = end, start
+
+        with self._lock:
+            lo = bisect.bisect_left(self._keys, (start,))
+            hi = bisect.bisect_right(self._keys, (end, float("inf")))
+            found = list(zip(self._keys[lo:hi], self._ordered[lo:hi]))
+            for k, keys in self._interval_keys.items():
+                earliest = schema.earliest_start(start, k)
+                lo = 0 if earliest is None else bisect.bisect_left(keys, (earliest,))
+                hi = bisect.bisect_left(keys, (start,))
+                events = self._interval_events[k]
+                found.extend((keys[i], events[i]) for i in range(lo, hi) if events[i].end_at >= start)
+        found.sort(key=lambda item: item[0])
+        for _, event in found:
+            yield self._copy(event)
+
+    def get_next_events(self, after: datetime.datetime, n: int, importance: Optional[str] = None,
+                        inclusive: bool = False) -> List[Event]:
+        """
+        Récupère les n premiers événements postérieurs à une date.
+
+        Returns:
+            List: Les événements, du plus proche au plus éloigné
+        """
+        with self._lock:
+            if inclusive:
+                lo = bisect.bisect_left(self._keys, (after,))
+            else:
+                lo = bisect.bisect_right(self._keys, (after, float("inf")))
+            return self._take(range(lo, len(self._ordered)), n, importance)
+
+    def get_previous_events(self, before: datetime.datetime, n: int, importance: Optional[str] = None,
+                            inclusive: bool = False) -> List[Event]:
+        """
+        Récupère les n derniers événements antérieurs à une date.
+
+        Returns:
+            List: Les événements, du plus proche au plus éloigné (dates décroissantes)
+        """
+        with self._lock:
+            if inclusive:
+                hi = bisect.bisect_right(self._keys, (before, float("inf")))
+            else:
+                hi = bisect.bisect_left(self._keys, (before,))
+            return self._take(range(hi - 1, -1, -1), n, importance)
+
+    def get_nearest_events(self, at: datetime.datetime, n: int,
+                           importance: Optional[str] = None) -> List[Event]:
+        """
+        Récupère les n événements les plus proches d'une date, avant ou après.
+
+        Returns:
+            List: Les événements, par distance croissante à `at`
+        """
+        later = self.get_next_events(at, n, importance, inclusive=True)
+        earlier = self.get_previous_events(at, n, importance)
+        return merge_nearest(at, later, earlier, n)
+
+    def _take(self, indexes: Iterable[int], n: int, importance: Optional[str]) -> List[Event]:
+        if n <= 0:
+            return []
+        events = (self._ordered[index] for index in indexes)
+        matching = (e for e in events if importance is None or e.importance == importance)
+        return [self._copy(event) for event in itertools.islice(matching, n)]
+
+    def get_events_frame(self, start: datetime.datetime, end: datetime.datetime,
+                         columns: Iterable[str] = frame.DEFAULT_COLUMNS):
+        """
+        Lit les événements d'une plage en colonnes NumPy, triés par date (voir le module frame).
+        """
+        if start > end:
+            start, end = end, start
+        builder = frame.FrameBuilder(columns)
+        with self._lock:
+            for event in self._slice(start, end):
+                builder.add(event.at, event.name, event.importance, event.id, event.end_at)
+        return builder.build()
+
+    def get_event_by_id(self, event_id: str) -> Optional[Event]:
+        """
+        Récupère un événement par son ID.
+
+        Args:
+            event_id: Identifiant de l'événement
+
+        Returns:
+            Event: L'événement trouvé ou None si non trouvé
+        """
+        with self._lock:
+            key = self._keys_by_id.get(event_id)
+            if key is None:
+                return None
+            return self._copy(self._ordered[bisect.bisect_left(self._keys, key)])
+
+    def get_events_by_ids(self, event_ids: Iterable[str]) -> List[Optional[Event]]:
+        """
+        Récupère plusieurs événements par leur ID.
+
+        Returns:
+            List: Les événements dans l'ordre des IDs demandés, None pour un ID introuvable
+        """
+        with self._lock:
+            return [self.get_event_by_id(event_id) for event_id in event_ids]
+
+    def apply_batch(self, operations: Iterable[Dict]) -> List[Dict]:
+        """
+        Applique un lot de créations, mises à jour et suppressions.
+
+        Mêmes opérations et mêmes résultats que DatetimeEventStore.apply_batch,
+        appliqués dans l'ordre sous le verrou.
+        """
+        results = []
+        seen = set()
+        with self._lock:
+            for index, operation in enumerate(operations):
+                op = operation.get("op")
+                event_id = operation.get("id")
+                try:
+                    check_batch_operation(operation)
+                    if event_id is not None:
+                        if event_id in seen:
+                            raise ValueError("Un même ID ne peut apparaître qu'une fois par lot")
+                        seen.add(event_id)
+                        if op == BATCH_CREATE and event_id in self._keys_by_id:
+                            raise ValueError(f"ID déjà présent: {event_id!r}")
+                except (TypeError, ValueError) as e:
+                    results.append(batch_result(index, op, FAILED, event_id, error=str(e)))
+                    continue
+
+                if op == BATCH_CREATE:
+                    event = Event(operation["at"], operation["name"], operation.get("importance") or "normal",
+                                  event_id or uuid.uuid4().hex[:24], operation.get("end_at"))
+                    self._insert(event)
+                    results.append(batch_result(index, op, CREATED, event.id, self._copy(event)))
+                    continue
+
+                key = self._keys_by_id.get(event_id)
+                if key is None:
+                    results.append(batch_result(index, op, NOT_FOUND, event_id))
+                    continue
+                previous = self._ordered[bisect.bisect_left(self._keys, key)]
+                if op == BATCH_DELETE:
+                    self._remove(event_id)
+                    results.append(batch_result(index, op, DELETED, event_id, self._copy(previous)))
+                    continue
+
+                try:
+                    updated = apply_changes(previous, operation)
+                except (TypeError, ValueError) as e:
+                    results.append(batch_result(index, op, FAILED, event_id, error=str(e)))
+                    continue
+                if ((updated.at, updated.name, updated.importance, updated.end_at)
+                        == (previous.at, previous.name, previous.importance, previous.end_at)):
+                    results.append(batch_result(index, op, UNCHANGED, event_id, self._copy(previous)))
+                    continue
+                self._remove(event_id)
+                self._insert(updated)
+                results.append(batch_result(index, op, UPDATED, event_id, self._copy(updated)))
+        return results
+
+    def update_event(self, event_id: str, name: Optional[str] = None,
+                     at: Optional[datetime.datetime] = None,
+                     importance: Optional[str] = None,
+                     end_at: Optional[datetime.datetime] = None) -> Optional[Event]:
+        """
+        Met à jour un événement existant.
+
+        Args:
+            event_id: Identifiant de l'événement à mettre à jour
+            name: Nouveau nom (optionnel)
+            at: Nouvelle date/heure (optionnel)
+            importance: Nouvelle importance (optionnel)
+            end_at: Nouvelle date de fin (optionnel)
+
+        Returns:
+            Event: L'événement mis à jour ou None si non trouvé ou inchangé
+        """
+        with self._lock:
+            key = self._keys_by_id.get(event_id)
+            if key is None:
+                return None
+            event = self._ordered[bisect.bisect_left(self._keys, key)]
+
+            updated = Event(
+                at if at is not None else event.at,
+                name if name is not None else event.name,
+                importance if importance is not None else event.importance,
+                event_id,
+                end_at if end_at is not None else event.end_at
+            )
+            check_interval(updated.at, updated.end_at)
+            self._remove(event_id)
+            self._insert(updated)
+
+            if ((updated.at, updated.name, updated.importance, updated.end_at)
+                    == (event.at, event.name, event.importance, event.end_at)):
+                return None
+            return self._copy(updated)
+
+    def replace_event(self, event: Event) -> None:
+        """
+        Ajoute un événement ou remplace celui de même ID, en une seule opération.
+
+        Args:
+            event: Événement avec son ID
+        """
+        check_interval(event.at, event.end_at)
+        with self._lock:
+            self._remove(event.id)
+            self._insert(self._copy(event))
+
+    def delete_event(self, event_id: str) -> bool:
+        """
+        Supprime un événement par son ID.
+
+        Args:
+            event_id: Identifiant de l'événement à supprimer
+
+        Returns:
+            bool: True si l'événement a été supprimé, False sinon
+        """
+        with self._lock:
+            return self._remove(event_id) is not None
+
+    def delete_events(self, start: datetime.datetime, end: datetime.datetime,
+                      importance: Optional[str] = None, dry_run: bool = False) -> int:
+        """
+        Supprime tous les événements d'une plage de dates.
+
+        Returns:
+            int: Nombre d'événements supprimés (ou qui le seraient en mode dry_run)
+        """
+        if start > end:
+            start, end = end, start
+
+        with self._lock:
+            matching = [e for e in self._slice(start, end) if importance is None or e.importance == importance]
+            if not dry_run:
+                for event in matching:
+                    self._remove(event.id)
+        return len(matching)
+
+    def update_events(self, start: datetime.datetime, end: datetime.datetime,
+                      importance: Optional[str] = None,
+                      set_importance: Optional[str] = None,
+                      shift_by: Optional[datetime.timedelta] = None,
+                      dry_run: bool = False) -> int:
+        """
+        Met à jour tous les événements d'une plage de dates.
+
+        Returns:
+            int: Nombre d'événements modifiés (ou concernés en mode dry_run)
+        """
+        if start > end:
+            start, end = end, start
+
+        with self._lock:
+            matching = [e for e in self._slice(start, end) if importance is None or e.importance == importance]
+            if dry_run:
+                return len(matching)
+
+            modified = 0
+            for event in matching:
+                updated = self.update_event(
+                    event.id,
+                    at=event.at + shift_by if shift_by else None,
+                    importance=set_importance,
+                    end_at=event.end_at + shift_by if shift_by and event.end_at is not None else None
+                )
+                modified += updated is not None
+        return modified
+
+    def count_events(self, start: Optional[datetime.datetime] = None,
+                     end: Optional[datetime.datetime] = None,
+                     parallel: int = 1,
+                     importance: Optional[str] = None,
+                     approximate: bool = False) -> int:
+        """
+        Compte le nombre d'événements, éventuellement dans une plage de dates.
+
+        Les comptes sont toujours exacts; `parallel` et `approximate` sont
+        acceptés pour la compatibilité avec DatetimeEventStore.
+
+        Returns:
+            int: Nombre d'événements
+        """
+        with self._lock:
+            events = self._slice(start, end)
+            if importance is None:
+                return len(events)
+            return sum(1 for event in events if event.importance == importance)
+
+    def stats(self, start: Optional[datetime.datetime] = None,
+              end: Optional[datetime.datetime] = None) -> Dict:
+        """
+        Calcule les statistiques d'une plage.
+
+        Returns:
+            Dict: total, first, last, by_importance et per_day, comme DatetimeEventStore.stats
+        """
+        if start and end and start > end:
+            start, end = end, start
+
+        with self._lock:
+            events = self._slice(start, end)
+            by_importance = collections.Counter(event.importance for event in events)
+            per_day = collections.Counter(event.at.date() for event in events)
+        return {
+            "total": len(events),
+            "first": events[0].at if events else None,
+            "last": events[-1].at if events else None,
+            "by_importance": dict(by_importance),
+            "per_day": dict(sorted(per_day.items())),
+        }
+
+    def get_calendar(self, year: int, month: int, per_day: int = 3,
+                     tz: Union[str, datetime.tzinfo, None] = "UTC") -> List[Dict]:
+        """
+        Regroupe les événements d'un mois par jour, en ne gardant que les plus importants.
+
+        Returns:
+            List: Jours ayant au moins un événement, comme DatetimeEventStore.get_calendar
+        """
+        tzinfo, _ = resolve_timezone(tz)
+        start, end = month_range(year, month, tzinfo)
+
+        days = collections.defaultdict(list)
+        with self._lock:
+            lo = bisect.bisect_left(self._keys, (start,))
+            hi = bisect.bisect_left(self._keys, (end,))
+            for event in self._ordered[lo:hi]:
+                local = event.at.replace(tzinfo=datetime.timezone.utc).astimezone(tzinfo)
+                days[local.date()].append(event)
+
+        def rank(event):
+            return -schema.importance_rank(event.importance), event.at
+
+        return [
+            calendar_day(day, len(events), [self._copy(e) for e in heapq.nsmallest(max(per_day, 0), events, key=rank)])
+            for day, events in sorted(days.items())
+        ]
+
+    def clear_all_events(self) -> int:
+        """
+        Supprime tous les événements.
+
+        Returns:
+            int: Nombre d'événements supprimés
+        """
+        with self._lock:
+            count = len(self._ordered)
+            self._keys.clear()
+            self._ordered.clear()
+            self._keys_by_id.clear()
+            self._interval_keys.clear()
+            self._interval_events.clear()
+            self._idempotency.clear()
+            self._bytes = 0
+        return count
+
+    def memory_bytes(self) -> int:
+        """
+        Estimation de la mémoire occupée par les événements, tenue à jour à chaque ajout et retrait.
+        """
+        return self._bytes
+
+    def close(self):
+        """
+        Sans effet, présent pour la compatibilité avec DatetimeEventStore.
+        """
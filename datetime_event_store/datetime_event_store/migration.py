@@ -0,0 +1,173 @@
+"""
+Migration en ligne des documents d'événements d'une version de schéma à l'autre.
+
+Le migrateur parcourt la collection par _id croissant et réécrit les documents
+de l'ancienne version par lots. Chaque remplacement est conditionné aux valeurs
+lues: un document modifié entre la lecture et l'écriture est laissé tel quel et
+repris au passage suivant. La position atteinte est enregistrée après chaque lot
+dans la collection `<collection>_meta`, ce qui permet de reprendre une migration
+interrompue. Pendant la migration, le magasin lit les deux versions.
+"""
+
+import datetime
+import threading
+from typing import Dict, Optional
+
+from pymongo import ReplaceOne
+
+from . import schema
+
+CHECKPOINT_ID = "schema_migration"
+DEFAULT_BATCH_SIZE = 500
+
+
+class SchemaMigrator:
+    """
+    Réécrit par lots les documents d'une collection dans une version de schéma cible.
+    """
+
+    def __init__(self, store, target_version: Optional[int] = None,
+                 batch_size: int = DEFAULT_BATCH_SIZE, pause: float = 0.0):
+        """
+        Initialise le migrateur.
+
+        Args:
+            store: DatetimeEventStore dont la collection est migrée
+            target_version: Version cible (défaut: version d'écriture du magasin)
+            batch_size: Nombre de documents réécrits par lot
+            pause: Attente en secondes entre deux lots, pour limiter la charge (défaut: 0)
+        """
+        self.store = store
+        self.target_version = schema.check_version(target_version or store.schema_version)
+        self.source_version = schema.V1 if self.target_version == schema.V2 else schema.V2
+        self.batch_size = batch_size
+        self.pause = pause
+        self.collection = store.events_collection
+        self.meta_collection = store.db[f"{store.events_collection.name}_meta"]
+        self.error: Optional[BaseException] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _load_checkpoint(self) -> Dict:
+        checkpoint = self.meta_collection.find_one({"_id": CHECKPOINT_ID})
+        if checkpoint is None or checkpoint.get("target") != self.target_version:
+            checkpoint = {
+                "_id": CHECKPOINT_ID,
+                "target": self.target_version,
+                "last_id": None,
+                "migrated": 0,
+                "skipped": 0,
+                "passes": 1,
+                "completed": False,
+                "started": datetime.datetime.utcnow(),
+            }
+        return checkpoint
+
+    def _save_checkpoint(self, checkpoint: Dict) -> None:
+        checkpoint["updated"] = datetime.datetime.utcnow()
+        self.meta_collection.replace_one({"_id": CHECKPOINT_ID}, checkpoint, upsert=True)
+
+    def _migrate_batch(self, checkpoint: Dict) -> int:
+        """
+        Réécrit le lot suivant et avance la position enregistrée.
+
+        Returns:
+            int: Nombre de documents lus (0 en fin de passage)
+        """
+        query = schema.version_filter(self.source_version)
+        if checkpoint["last_id"] is not None:
+            query["_id"] = {"$gt": checkpoint["last_id"]}
+
+        docs = list(self.collection.find(query).sort("_id", 1).limit(self.batch_size))
+        if not docs:
+            return 0
+
+        operations = [
+            ReplaceOne(doc, schema.convert(doc, self.target_version, self.store.day_buckets))
+            for doc in docs
+        ]
+        matched = self.collection.bulk_write(operations, ordered=False).matched_count
+
+        checkpoint["last_id"] = docs[-1]["_id"]
+        checkpoint["migrated"] += matched
+        checkpoint["skipped"] += len(docs) - matched
+        return len(docs)
+
+    def run(self) -> Dict:
+        """
+        Migre la collection jusqu'à ce qu'il ne reste aucun document de l'ancienne version,
+        ou jusqu'à l'appel de `stop`.
+
+        Returns:
+            Dict: État de la migration (voir `progress`)
+        """
+        self.store.ensure_schema_index(self.target_version)
+        self.store.refresh_schema()
+        if self.target_version not in self.store.read_versions:
+            self.store.read_versions += (self.target_version,)
+
+        checkpoint = self._load_checkpoint()
+        while not checkpoint["completed"] and not self._stop.is_set():
+            if not self._migrate_batch(checkpoint):
+                # Fin de passage: les documents modifiés pendant le passage ou écrits
+                # entre-temps dans l'ancienne version sont repris depuis le début
+                if self.collection.find_one(schema.presence_filter(self.source_version), projection={"_id": 1}) is None:
+                    checkpoint["completed"] = True
+                else:
+                    checkpoint["last_id"] = None
+                    checkpoint["passes"] += 1
+            self._save_checkpoint(checkpoint)
+            if self.pause:
+                self._stop.wait(self.pause)
+
+        if checkpoint["completed"]:
+            self.store.refresh_schema()
+        return self.progress()
+
+    def progress(self) -> Dict:
+        """
+        Retourne l'état enregistré de la migration.
+
+        Returns:
+            Dict: Version cible, documents migrés et ignorés, nombre de passages,
+                position atteinte et indicateur de fin
+        """
+        checkpoint = self._load_checkpoint()
+        checkpoint.pop("_id")
+        checkpoint["running"] = self.running
+        return checkpoint
+
+    @property
+    def running(self) -> bool:
+        """
+        True si la migration s'exécute en arrière-plan.
+        """
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        """
+        Lance la migration dans un thread d'arrière-plan.
+        """
+        if self.running:
+            return
+        self._stop.clear()
+        self.error = None
+        self._thread = threading.Thread(target=self._run_in_background, name="schema-migration", daemon=True)
+        self._thread.start()
+
+    def _run_in_background(self) -> None:
+        try:
+            self.run()
+        except BaseException as e:
+            self.error = e
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """
+        Interrompt la migration après le lot en cours; elle reprendra à la position enregistrée.
+
+        Args:
+            timeout: Attente maximale de l'arrêt du thread, en secondes (défaut: illimitée)
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
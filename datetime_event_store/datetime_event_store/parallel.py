@@ -0,0 +1,154 @@
+"""
+Outils pour exécuter une requête par plage de dates en parallèle.
+
+La plage est découpée en sous-plages contiguës (une par shard), chaque shard
+est lu sur un thread, et les résultats sont fusionnés dans l'ordre via un
+tas (k-way merge) avec un tampon borné par shard.
+
+Chaque shard s'exécute dans une copie du contexte de l'appelant, pour que
+l'échéance de la requête (module deadline) s'applique aussi aux sous-plages.
+"""
+
+import contextvars
+import datetime
+import heapq
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Iterable, Iterator, List, Sequence, Tuple
+
+SAMPLES_PER_SHARD = 32
+DEFAULT_BUFFER_SIZE = 1000
+
+_DONE = object()
+
+
+class _ShardFailure:
+    """
+    Enveloppe une exception levée par un shard pour la relancer côté consommateur.
+    """
+
+    def __init__(self, exc: BaseException):
+        self.exc = exc
+
+
+def split_range(start: datetime.datetime, end: datetime.datetime, shards: int,
+                samples: Sequence[datetime.datetime] = ()) -> List[Tuple[datetime.datetime, datetime.datetime, bool]]:
+    """
+    Découpe la plage [start, end] en sous-plages contiguës et disjointes.
+
+    Les bornes sont prises aux quantiles des dates échantillonnées lorsqu'il y en
+    a assez, sinon la plage est découpée en parts de largeur égale.
+
+    Args:
+        start: Date de début de la plage
+        end: Date de fin de la plage (incluse)
+        shards: Nombre de sous-plages souhaité
+        samples: Dates échantillonnées dans la collection (optionnel)
+
+    Returns:
+        List: Tuples (début, fin, fin_incluse); seule la dernière sous-plage inclut sa fin
+    """
+    shards = max(1, shards)
+    in_range = sorted(at for at in samples if start <= at <= end)
+
+    if len(in_range) >= shards:
+        cuts = [in_range[i * len(in_range) // shards] for i in range(1, shards)]
+    else:
+        width = end - start
+        cuts = [start + width * i / shards for i in range(1, shards)]
+
+    bounds = [start]
+    for cut in cuts:
+        if bounds[-1] < cut < end:
+            bounds.append(cut)
+    bounds.append(end)
+
+    return [(bounds[i], bounds[i + 1], i == len(bounds) - 2) for i in range(len(bounds) - 1)]
+
+
+class _ShardBuffer:
+    """
+    File bornée alimentée par un shard et consommée par la fusion.
+    """
+
+    def __init__(self, maxsize: int, stop: threading.Event):
+        self._queue = queue.Queue(maxsize)
+        self._stop = stop
+
+    def _put(self, item: Any) -> bool:
+        while not self._stop.is_set():
+            try:
+                self._queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def fill(self, source: Callable[[], Iterable[Any]]) -> None:
+        """
+        Lit le shard et remplit la file; s'exécute sur un thread du pool.
+        """
+        iterator = None
+        try:
+            iterator = iter(source())
+            for item in iterator:
+                if not self._put(item):
+                    return
+        except BaseException as exc:
+            self._put(_ShardFailure(exc))
+        finally:
+            close = getattr(iterator, "close", None)
+            if close is not None:
+                close()
+            self._put(_DONE)
+
+    def __iter__(self) -> Iterator[Any]:
+        while True:
+            item = self._queue.get()
+            if item is _DONE:
+                return
+            if isinstance(item, _ShardFailure):
+                raise item.exc
+            yield item
+
+
+def merge_shards(sources: Sequence[Callable[[], Iterable[Any]]], key: Callable[[Any], Any],
+                 buffer_size: int = DEFAULT_BUFFER_SIZE) -> Iterator[Any]:
+    """
+    Exécute les shards en parallèle et fusionne leurs résultats triés.
+
+    Args:
+        sources: Fonctions retournant chacune un itérable trié selon `key`
+        key: Clé de tri utilisée pour la fusion
+        buffer_size: Nombre maximal d'éléments en attente par shard
+
+    Returns:
+        Iterator: Flux unique trié selon `key`
+    """
+    stop = threading.Event()
+    buffers = [_ShardBuffer(buffer_size, stop) for _ in sources]
+    executor = ThreadPoolExecutor(max_workers=max(1, len(sources)))
+    try:
+        for buffer, source in zip(buffers, sources):
+            executor.submit(contextvars.copy_context().run, buffer.fill, source)
+        yield from heapq.merge(*buffers, key=key)
+    finally:
+        stop.set()
+        executor.shutdown(wait=False)
+
+
+def map_shards(function: Callable[..., Any], shards: Sequence[Tuple]) -> List[Any]:
+    """
+    Applique `function` à chaque sous-plage en parallèle.
+
+    Args:
+        function: Fonction appelée avec les éléments de chaque tuple de sous-plage
+        shards: Sous-plages retournées par `split_range`
+
+    Returns:
+        List: Résultats dans l'ordre des sous-plages
+    """
+    with ThreadPoolExecutor(max_workers=max(1, len(shards))) as executor:
+        futures = [executor.submit(contextvars.copy_context().run, function, *shard) for shard in shards]
+        return [future.result() for future in futures]
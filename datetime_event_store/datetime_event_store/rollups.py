@@ -0,0 +1,158 @@
+"""
+Agrégats de comptage (rollups) par minute, heure et jour, ventilés par importance.
+
+Chaque document de la collection de rollups a la forme
+{"g": granularité, "t": début du créneau, "i": importance, "n": nombre}.
+Une plage [start, end] est décomposée en créneaux alignés, comptés depuis les
+rollups, et en bords non alignés (moins d'une minute de chaque côté) comptés
+directement sur les événements.
+"""
+
+import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from pymongo import UpdateOne
+
+from . import schema
+
+DAY = "d"
+HOUR = "h"
+MINUTE = "m"
+
+GRANULARITIES = (DAY, HOUR, MINUTE)
+
+_STEPS = {
+    DAY: datetime.timedelta(days=1),
+    HOUR: datetime.timedelta(hours=1),
+    MINUTE: datetime.timedelta(minutes=1),
+}
+
+MINUTE_FORMAT = "%Y-%m-%dT%H:%M"
+
+
+def floor(at: datetime.datetime, unit: str) -> datetime.datetime:
+    """
+    Arrondit une date au début de son créneau.
+    """
+    at = at.replace(second=0, microsecond=0)
+    if unit in (HOUR, DAY):
+        at = at.replace(minute=0)
+    if unit == DAY:
+        at = at.replace(hour=0)
+    return at
+
+
+def ceil(at: datetime.datetime, unit: str) -> datetime.datetime:
+    """
+    Arrondit une date au début du créneau suivant, sauf si elle est déjà alignée.
+    """
+    start = floor(at, unit)
+    return start if start == at else start + _STEPS[unit]
+
+
+def _cover(start: datetime.datetime, end: datetime.datetime,
+           units: Tuple[str, ...]) -> List[Tuple[str, datetime.datetime, datetime.datetime]]:
+    """
+    Couvre [start, end[ (bornes alignées à la minute) avec le moins de créneaux possible.
+    """
+    unit, finer = units[0], units[1:]
+    if not finer:
+        return [(unit, start, end)] if start < end else []
+
+    aligned_start = ceil(start, unit)
+    aligned_end = floor(end, unit)
+    if aligned_start >= aligned_end:
+        return _cover(start, end, finer)
+
+    return (_cover(start, aligned_start, finer)
+            + [(unit, aligned_start, aligned_end)]
+            + _cover(aligned_end, end, finer))
+
+
+def plan(start: datetime.datetime, end: datetime.datetime) -> Tuple[List[Tuple[str, datetime.datetime, datetime.datetime]],
+                                                                    List[Tuple[datetime.datetime, datetime.datetime, bool]]]:
+    """
+    Décompose la plage [start, end] en créneaux de rollups et en bords bruts.
+
+    Args:
+        start: Date de début de la plage
+        end: Date de fin de la plage (incluse)
+
+    Returns:
+        Tuple: (créneaux (granularité, début, fin exclue), bords (début, fin, fin_incluse))
+    """
+    aligned_start = ceil(start, MINUTE)
+    aligned_end = floor(end, MINUTE)
+    if aligned_start >= aligned_end:
+        return [], [(start, end, True)]
+
+    edges = []
+    if start < aligned_start:
+        edges.append((start, aligned_start, False))
+    edges.append((aligned_end, end, True))
+
+    return _cover(aligned_start, aligned_end, GRANULARITIES), edges
+
+
+def bucket_filter(buckets: Iterable[Tuple[str, datetime.datetime, datetime.datetime]],
+                  importance: Optional[str] = None) -> Dict:
+    """
+    Construit le filtre sélectionnant les rollups des créneaux donnés.
+    """
+    query = {"$or": [{"g": unit, "t": {"$gte": lo, "$lt": hi}} for unit, lo, hi in buckets]}
+    if importance is not None:
+        query["i"] = importance
+    return query
+
+
+def increments(at: datetime.datetime, importance: str, delta: int) -> List[UpdateOne]:
+    """
+    Opérations d'incrément des rollups pour un événement ajouté (+1) ou retiré (-1).
+    """
+    return [
+        UpdateOne({"g": unit, "t": floor(at, unit), "i": importance}, {"$inc": {"n": delta}}, upsert=True)
+        for unit in GRANULARITIES
+    ]
+
+
+def minute_pipeline(match: Dict, versions: Iterable[int] = (schema.V1,)) -> List[Dict]:
+    """
+    Pipeline d'agrégation comptant les événements par minute et par importance.
+
+    Les versions de schéma lues déterminent les champs groupés: texte de
+    l'importance en v1, code (et texte hors table) en v2.
+    """
+    versions = tuple(versions)
+    dates = [f"${schema.date_field(version)}" for version in versions]
+    key = {"t": {"$dateToString": {
+        "format": MINUTE_FORMAT,
+        "date": dates[0] if len(dates) == 1 else {"$ifNull": dates},
+    }}}
+    if schema.V1 in versions:
+        key["i"] = "$importance"
+    if schema.V2 in versions:
+        key["c"] = "$i"
+        key["s"] = "$s"
+
+    return [
+        {"$match": match},
+        {"$group": {"_id": key, "n": {"$sum": 1}}},
+    ]
+
+
+def build_documents(minute_groups: Iterable[Dict]) -> List[Dict]:
+    """
+    Construit les documents de rollups de toutes les granularités à partir des comptes par minute.
+    """
+    counts = {}
+    for group in minute_groups:
+        key = group["_id"]
+        minute = datetime.datetime.strptime(key["t"], MINUTE_FORMAT)
+        importance = key.get("i")
+        if importance is None:
+            importance = schema.decode_importance(key["c"], key.get("s"))
+        for unit in GRANULARITIES:
+            bucket = (unit, floor(minute, unit), importance)
+            counts[bucket] = counts.get(bucket, 0) + group["n"]
+
+    return [{"g": unit, "t": t, "i": importance, "n": n} for (unit, t, importance), n in counts.items()]
@@ -0,0 +1,349 @@
+"""
+Versions du schéma des documents d'événements.
+
+Schéma v1 (historique):
+    {"_id", "at": date, "name": texte, "importance": texte,
+     ["end_at": date, "duration_class": classe]}
+
+Schéma v2 (compact):
+    {"_id", "v": 2, "t": date, "n": texte, "i": code entier, ["s": texte], ["d": jour],
+     ["e": date, "k": classe]}
+
+En v2, l'importance est un petit entier (voir IMPORTANCE_CODES); une importance
+hors de cette table est stockée avec le code 0 et son texte dans "s". Le champ
+optionnel "d" est le numéro du jour UTC depuis le 1er janvier 1970.
+Un document sans champ "v" est en v1.
+
+Un événement avec une durée porte sa date de fin et sa classe de durée: le plus
+petit k tel que la durée ne dépasse pas DURATION_CLASS_BASE * DURATION_CLASS_FACTOR**k.
+Les intervalles d'une même classe ayant une durée bornée, ceux qui chevauchent
+une fenêtre commencent au plus tôt à cette borne avant la fenêtre, ce qui permet
+de les trouver par l'index (classe, date) sans parcourir les intervalles longs.
+"""
+
+import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+V1 = 1
+V2 = 2
+
+VERSIONS = (V1, V2)
+
+# Les codes vont par dizaines: la dizaine est le rang de tri, l'unité distingue
+# les graphies d'une même importance ("normal" et "normale").
+IMPORTANCE_CODES = {
+    "basse": 10,
+    "normal": 20,
+    "normale": 21,
+    "haute": 30,
+    "critique": 40,
+}
+
+IMPORTANCE_NAMES = {code: name for name, code in IMPORTANCE_CODES.items()}
+
+RANK_STEP = 10
+
+OTHER_IMPORTANCE = 0
+
+# Noms des champs (date, nom, importance) de chaque version
+FIELDS = {
+    V1: ("at", "name", "importance"),
+    V2: ("t", "n", "i"),
+}
+
+# Noms des champs (date de fin, classe de durée) des événements avec une durée
+INTERVAL_FIELDS = {
+    V1: ("end_at", "duration_class"),
+    V2: ("e", "k"),
+}
+
+# Ensemble des champs propres à chaque version
+KEYS = {
+    V1: ("at", "name", "importance", "end_at", "duration_class"),
+    V2: ("v", "t", "n", "i", "s", "d", "e", "k"),
+}
+
+DURATION_CLASS_BASE = datetime.timedelta(minutes=1)
+DURATION_CLASS_FACTOR = 4
+
+_EPOCH = datetime.date(1970, 1, 1)
+_MIN_DATE = datetime.datetime(1, 1, 1)
+
+
+def check_version(version: int) -> int:
+    """
+    Vérifie qu'une version de schéma est connue.
+    """
+    if version not in VERSIONS:
+        raise ValueError(f"Version de schéma inconnue: {version!r} (versions acceptées: 1, 2)")
+    return version
+
+
+def detect_version(doc: Dict) -> int:
+    """
+    Détermine la version de schéma d'un document.
+    """
+    return doc.get("v", V1)
+
+
+def date_field(version: int) -> str:
+    """
+    Nom du champ de date d'une version.
+    """
+    return FIELDS[version][0]
+
+
+def encode_importance(importance: str) -> Tuple[int, Optional[str]]:
+    """
+    Convertit une importance en (code, texte), le texte n'étant conservé que pour les importances hors table.
+    """
+    code = IMPORTANCE_CODES.get(importance)
+    if code is None:
+        return OTHER_IMPORTANCE, importance
+    return code, None
+
+
+def importance_rank(importance: str) -> int:
+    """
+    Rang d'une importance pour le tri (dizaine de son code, 0 hors table): plus il est grand, plus
+    l'événement est important.
+    """
+    return IMPORTANCE_CODES.get(importance, OTHER_IMPORTANCE) // RANK_STEP
+
+
+def importance_groups() -> List[List[str]]:
+    """
+    Importances de la table groupées par rang, du plus haut au plus bas.
+    """
+    groups: Dict[int, List[str]] = {}
+    for name in IMPORTANCE_CODES:
+        groups.setdefault(importance_rank(name), []).append(name)
+    return [groups[rank] for rank in sorted(groups, reverse=True)]
+
+
+def decode_importance(code: int, text: Optional[str] = None) -> str:
+    """
+    Retrouve le texte d'une importance à partir de son code (et du texte stocké pour le code 0).
+    """
+    if code == OTHER_IMPORTANCE:
+        return text if text is not None else ""
+    return IMPORTANCE_NAMES.get(code, str(code))
+
+
+def day_bucket(at: datetime.datetime) -> int:
+    """
+    Numéro du jour UTC d'une date, compté depuis le 1er janvier 1970.
+    """
+    if at.tzinfo is not None:
+        at = at.astimezone(datetime.timezone.utc)
+    return (at.date() - _EPOCH).days
+
+
+def duration_class(at: datetime.datetime, end_at: datetime.datetime) -> int:
+    """
+    Classe de durée d'un intervalle (0 pour une durée d'au plus DURATION_CLASS_BASE).
+    """
+    duration = end_at - at
+    bound = DURATION_CLASS_BASE
+    k = 0
+    while duration > bound:
+        bound *= DURATION_CLASS_FACTOR
+        k += 1
+    return k
+
+
+def earliest_start(start: datetime.datetime, k: int) -> Optional[datetime.datetime]:
+    """
+    Date de début la plus ancienne d'un intervalle de classe k qui atteint `start`,
+    ou None si elle sort des dates représentables.
+    """
+    try:
+        return start - DURATION_CLASS_BASE * DURATION_CLASS_FACTOR ** k
+    except OverflowError:
+        return None
+
+
+def importance_code_expression(versions: Iterable[int]) -> Dict:
+    """
+    Expression d'agrégation donnant le code d'importance (0 hors table) quelle que soit la version lue.
+    """
+    expressions = []
+    for version in versions:
+        if version == V1:
+            expressions.append({"$switch": {
+                "branches": [
+                    {"case": {"$eq": ["$importance", name]}, "then": code}
+                    for name, code in IMPORTANCE_CODES.items()
+                ],
+                "default": OTHER_IMPORTANCE,
+            }})
+        else:
+            expressions.append("$i")
+    if len(expressions) == 1:
+        return expressions[0]
+    return {"$ifNull": expressions}
+
+
+def importance_rank_expression(versions: Iterable[int]) -> Dict:
+    """
+    Expression d'agrégation ordonnée comme importance_rank: le code d'importance arrondi à sa dizaine.
+    """
+    code = importance_code_expression(versions)
+    return {"$subtract": [code, {"$mod": [code, RANK_STEP]}]}
+
+
+def decode(doc: Dict) -> Tuple[datetime.datetime, str, str]:
+    """
+    Extrait (date, nom, importance) d'un document de l'une ou l'autre version.
+    """
+    if detect_version(doc) == V2:
+        return doc["t"], doc["n"], decode_importance(doc["i"], doc.get("s"))
+    return doc["at"], doc["name"], doc["importance"]
+
+
+def decode_end(doc: Dict) -> Optional[datetime.datetime]:
+    """
+    Extrait la date de fin d'un document, ou None pour un événement ponctuel.
+    """
+    return doc.get(INTERVAL_FIELDS[detect_version(doc)][0])
+
+
+def _interval_fields(version: int, at: datetime.datetime, end_at: datetime.datetime) -> Dict:
+    end_key, class_key = INTERVAL_FIELDS[version]
+    return {end_key: end_at, class_key: duration_class(at, end_at)}
+
+
+def encode(at: datetime.datetime, name: str, importance: str, version: int = V1,
+           with_day: bool = False, end_at: Optional[datetime.datetime] = None) -> Dict:
+    """
+    Construit les champs d'un document (sans _id) dans la version demandée.
+    """
+    if version == V1:
+        doc = {"at": at, "name": name, "importance": importance}
+    else:
+        code, text = encode_importance(importance)
+        doc = {"v": V2, "t": at, "n": name, "i": code}
+        if text is not None:
+            doc["s"] = text
+        if with_day:
+            doc["d"] = day_bucket(at)
+    if end_at is not None:
+        doc.update(_interval_fields(version, at, end_at))
+    return doc
+
+
+def convert(doc: Dict, version: int, with_day: bool = False) -> Dict:
+    """
+    Réécrit un document dans une autre version, en conservant _id et les champs hors schéma.
+    """
+    at, name, importance = decode(doc)
+    converted = {key: value for key, value in doc.items() if key not in KEYS[detect_version(doc)]}
+    converted.update(encode(at, name, importance, version, with_day, decode_end(doc)))
+    return converted
+
+
+def version_filter(version: int) -> Dict:
+    """
+    Filtre sélectionnant les documents d'une version.
+    """
+    if version == V2:
+        return {"v": V2}
+    return {"v": {"$exists": False}}
+
+
+def presence_filter(version: int) -> Dict:
+    """
+    Filtre trouvant un document d'une version à l'aide de l'index sur son champ de date.
+
+    La borne sur les dates exclut les documents sans ce champ, qu'un index non
+    clairsemé range parmi les valeurs nulles.
+    """
+    return {date_field(version): {"$gte": _MIN_DATE}}
+
+
+def importance_filter(importance: str, version: int) -> Dict:
+    """
+    Filtre d'égalité sur l'importance dans une version.
+    """
+    if version == V1:
+        return {"importance": importance}
+    code, text = encode_importance(importance)
+    if text is None:
+        return {"i": code}
+    return {"i": code, "s": text}
+
+
+def query(version: int, start: Optional[datetime.datetime] = None,
+          end: Optional[datetime.datetime] = None, include_end: bool = True,
+          importance: Optional[str] = None, include_start: bool = True) -> Dict:
+    """
+    Construit le filtre d'une plage (bornes optionnelles) et d'une importance dans une version.
+    """
+    result = {}
+    bounds = {}
+    if start is not None:
+        bounds["$gte" if include_start else "$gt"] = start
+    if end is not None:
+        bounds["$lte" if include_end else "$lt"] = end
+    if bounds:
+        result[date_field(version)] = bounds
+    if importance is not None:
+        result.update(importance_filter(importance, version))
+    return result
+
+
+def overlap_queries(version: int, start: datetime.datetime, end: datetime.datetime,
+                    classes: Iterable[int]) -> List[Dict]:
+    """
+    Construit les filtres des événements d'une version qui chevauchent [start, end].
+
+    Le premier filtre retient les événements qui commencent dans la fenêtre
+    (ponctuels ou non); chacun des suivants, les intervalles d'une classe de
+    durée commencés avant la fenêtre, dans la limite de la durée de leur classe.
+    """
+    date_key = date_field(version)
+    end_key, class_key = INTERVAL_FIELDS[version]
+    queries = [query(version, start, end)]
+    for k in sorted(classes):
+        bounds = {"$lt": start}
+        lower = earliest_start(start, k)
+        if lower is not None:
+            bounds["$gte"] = lower
+        queries.append({class_key: k, date_key: bounds, end_key: {"$gte": start}})
+    return queries
+
+
+def update_fields(version: int, at: Optional[datetime.datetime] = None, name: Optional[str] = None,
+                  importance: Optional[str] = None, with_day: bool = False,
+                  interval: Optional[Tuple[datetime.datetime, datetime.datetime]] = None) -> Dict:
+    """
+    Construit la mise à jour ($set/$unset) des champs fournis dans une version.
+
+    `interval` (début, fin) réécrit la date de fin et la classe de durée.
+    """
+    date_key, name_key, importance_key = FIELDS[version]
+    fields = {}
+    unset = {}
+    if at is not None:
+        fields[date_key] = at
+        if version == V2 and with_day:
+            fields["d"] = day_bucket(at)
+    if name is not None:
+        fields[name_key] = name
+    if importance is not None:
+        if version == V1:
+            fields[importance_key] = importance
+        else:
+            code, text = encode_importance(importance)
+            fields["i"] = code
+            if text is None:
+                unset["s"] = ""
+            else:
+                fields["s"] = text
+    if interval is not None:
+        fields.update(_interval_fields(version, *interval))
+
+    update = {"$set": fields}
+    if unset:
+        update["$unset"] = unset
+    return update
@@ -0,0 +1,183 @@
+"""
+Journal des opérations lentes du DatetimeEventStore.
+
+Toute opération dont la durée dépasse le seuil est enregistrée dans un tampon
+circulaire borné, avec son filtre et sa durée. Le plan d'exécution et le nombre
+de documents examinés sont obtenus ensuite par un `explain` exécuté en
+arrière-plan, pour ne pas allonger la requête déjà lente. Un seul explain est
+en cours à la fois: ceux des opérations lentes survenues entre-temps sont
+abandonnés, pour ne pas charger davantage un serveur déjà lent.
+
+Pour une lecture en flux, `measure_iter` ne compte que le temps passé à obtenir
+les documents du curseur, pas celui que l'appelant passe entre deux documents.
+"""
+
+import collections
+import datetime
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+DEFAULT_LOG_SIZE = 100
+
+
+def _find_key(document: Any, key: str) -> Any:
+    """
+    Cherche récursivement la première valeur d'une clé dans un résultat d'explain.
+    """
+    if isinstance(document, dict):
+        if key in document:
+            return document[key]
+        children = document.values()
+    elif isinstance(document, list):
+        children = document
+    else:
+        return None
+    for child in children:
+        found = _find_key(child, key)
+        if found is not None:
+            return found
+    return None
+
+
+class SlowQueryLog:
+    """
+    Tampon circulaire des opérations plus longues qu'un seuil.
+    """
+
+    def __init__(self, threshold_ms: float, size: int = DEFAULT_LOG_SIZE,
+                 explain: Optional[Callable[[Dict], Dict]] = None):
+        """
+        Initialise le journal.
+
+        Args:
+            threshold_ms: Durée à partir de laquelle une opération est enregistrée, en millisecondes
+            size: Nombre maximal d'entrées conservées (les plus anciennes sont écartées)
+            explain: Fonction exécutant une commande explain (optionnelle)
+        """
+        self.threshold_ms = threshold_ms
+        self.size = size
+        self._explain = explain
+        self._entries = collections.deque(maxlen=size)
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._explain_pending = False
+        self.explains_skipped = 0
+
+    @contextmanager
+    def measure(self, operation: str, collection: str, query: Any,
+                explain_command: Optional[Dict] = None) -> Iterator[None]:
+        """
+        Mesure la durée du bloc et l'enregistre si elle dépasse le seuil.
+
+        Args:
+            operation: Nom de l'opération (find, count, aggregate, update, delete)
+            collection: Nom de la collection interrogée
+            query: Filtre ou pipeline de l'opération
+            explain_command: Commande à expliquer si l'opération est lente (optionnelle)
+        """
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            duration_ms = (time.perf_counter() - started) * 1000
+            if duration_ms >= self.threshold_ms:
+                self.record(operation, collection, query, duration_ms, explain_command)
+
+    def measure_iter(self, operation: str, collection: str, query: Any, iterable: Iterable,
+                     explain_command: Optional[Dict] = None) -> Iterator:
+        """
+        Parcourt `iterable` en ne mesurant que le temps passé à obtenir ses éléments,
+        et enregistre l'opération à la fin du parcours si ce temps dépasse le seuil.
+
+        Args:
+            operation: Nom de l'opération
+            collection: Nom de la collection interrogée
+            query: Filtre de l'opération
+            iterable: Curseur (ou tout itérable) à parcourir
+            explain_command: Commande à expliquer si l'opération est lente (optionnelle)
+        """
+        elapsed = 0.0
+        iterator = iter(iterable)
+        try:
+            while True:
+                started = time.perf_counter()
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+                finally:
+                    elapsed += time.perf_counter() - started
+                yield item
+        finally:
+            duration_ms = elapsed * 1000
+            if duration_ms >= self.threshold_ms:
+                self.record(operation, collection, query, duration_ms, explain_command)
+
+    def record(self, operation: str, collection: str, query: Any, duration_ms: float,
+               explain_command: Optional[Dict] = None) -> Dict:
+        """
+        Ajoute une entrée au journal et lance, s'il y a lieu, l'explain de l'opération
+        (sauf si un explain est déjà en cours).
+        """
+        entry = {
+            "at": datetime.datetime.utcnow(),
+            "operation": operation,
+            "collection": collection,
+            "filter": query,
+            "duration_ms": round(duration_ms, 3),
+            "docs_examined": None,
+            "keys_examined": None,
+            "plan": None,
+        }
+        with self._lock:
+            self._entries.append(entry)
+            if explain_command is not None and self._explain is not None:
+                if self._explain_pending:
+                    self.explains_skipped += 1
+                else:
+                    if self._executor is None:
+                        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="slow-query-explain")
+                    self._explain_pending = True
+                    self._executor.submit(self._fill_plan, entry, explain_command)
+        return entry
+
+    def _fill_plan(self, entry: Dict, explain_command: Dict) -> None:
+        try:
+            result = self._explain(explain_command)
+        except Exception as e:
+            entry["explain_error"] = str(e)
+            return
+        finally:
+            with self._lock:
+                self._explain_pending = False
+        stats = _find_key(result, "executionStats") or {}
+        entry["docs_examined"] = stats.get("totalDocsExamined")
+        entry["keys_examined"] = stats.get("totalKeysExamined")
+        entry["plan"] = _find_key(result, "winningPlan")
+
+    def entries(self) -> List[Dict]:
+        """
+        Retourne les entrées du journal, de la plus ancienne à la plus récente.
+        """
+        with self._lock:
+            return [dict(entry) for entry in self._entries]
+
+    def clear(self) -> None:
+        """
+        Vide le journal.
+        """
+        with self._lock:
+            self._entries.clear()
+
+    def close(self) -> None:
+        """
+        Arrête le thread des explains en attente.
+        """
+        with self._lock:
+            executor, self._executor = self._executor, None
+            self._explain_pending = False
+        if executor is not None:
+            executor.shutdown(wait=False)
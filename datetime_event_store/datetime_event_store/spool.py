@@ -0,0 +1,287 @@
+"""
+Journal local des écritures, pour absorber les pannes et ralentissements de MongoDB.
+
+Quand le backend est lent ou injoignable, le magasin ajoute l'écriture à un
+journal NDJSON sur disque (une opération par ligne, synchronisée par fsync
+avant l'acquittement) au lieu de bloquer la requête. Le rejoueur relit ensuite
+le journal dans l'ordre et l'applique par lots (apply_batch) dès que le backend
+répond.
+
+La position rejouée est enregistrée dans un fichier `<journal>.offset`,
+remplacé atomiquement après chaque lot: un redémarrage reprend au premier lot
+non confirmé. Rejouer un lot deux fois est sans effet, car les créations
+portent un ID attribué à l'écriture (une insertion déjà faite est refusée),
+les mises à jour fixent des valeurs et les suppressions sont idempotentes. Une
+ligne incomplète en fin de journal (arrêt pendant l'écriture, donc jamais
+acquittée) est supprimée à l'ouverture. Le journal est vidé quand tout a été
+rejoué.
+
+Les créations en attente qui portent une clé d'idempotence sont indexées par
+clé: un réessai arrivé avant le rejeu retrouve la création du journal au lieu
+d'en ajouter une seconde (pending_create). Le rejeu enregistre ensuite la clé
+comme une création directe.
+"""
+
+import datetime
+import json
+import os
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from pymongo.errors import PyMongoError
+
+DEFAULT_BATCH_SIZE = 500
+DATE_KEYS = ("at", "end_at")
+
+
+def _encode(operation: Dict) -> str:
+    record = {key: value for key, value in operation.items() if value is not None}
+    for key in DATE_KEYS:
+        if key in record:
+            record[key] = record[key].isoformat()
+    return json.dumps(record, ensure_ascii=False)
+
+
+def _decode(line: bytes) -> Dict:
+    operation = json.loads(line)
+    for key in DATE_KEYS:
+        if key in operation:
+            operation[key] = datetime.datetime.fromisoformat(operation[key])
+    return operation
+
+
+class WriteSpool:
+    """
+    Journal d'écritures en attente, persistant et ordonné.
+    """
+
+    def __init__(self, path: str, fsync: bool = True):
+        """
+        Ouvre (ou crée) le journal.
+
+        Args:
+            path: Chemin du fichier journal
+            fsync: Synchronise le disque à chaque ajout (défaut: True)
+        """
+        self.path = path
+        self.offset_path = f"{path}.offset"
+        self.fsync = fsync
+        self._lock = threading.Lock()
+        self._pending_keys: Dict[str, Tuple[Dict, int]] = {}
+        self._offset = self._read_offset()
+        self._depth = self._recover()
+        self._file = open(self.path, "ab")
+
+    def _read_offset(self) -> int:
+        try:
+            with open(self.offset_path, "rb") as f:
+                return int(f.read() or 0)
+        except FileNotFoundError:
+            return 0
+
+    def _write_offset(self, offset: int) -> None:
+        tmp_path = f"{self.offset_path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(str(offset).encode())
+            f.flush()
+            if self.fsync:
+                os.fsync(f.fileno())
+        os.replace(tmp_path, self.offset_path)
+        self._offset = offset
+
+    def _recover(self) -> int:
+        """
+        Supprime une ligne incomplète en fin de journal et compte les opérations à rejouer.
+        """
+        if not os.path.exists(self.path):
+            return 0
+        with open(self.path, "rb+") as f:
+            data = f.read()
+            complete = data.rfind(b"\n") + 1
+            if complete < len(data):
+                f.truncate(complete)
+        if self._offset > complete:
+            self._offset = 0
+        position = self._offset
+        for line in data[self._offset:complete].splitlines(keepends=True):
+            position += len(line)
+            self._track_key(_decode(line), position)
+        return data.count(b"\n", self._offset, complete)
+
+    def _track_key(self, operation: Dict, end: int) -> None:
+        key = operation.get("idempotency_key")
+        if key is not None and operation.get("op") == "create":
+            self._pending_keys[key] = (operation, end)
+
+    @property
+    def depth(self) -> int:
+        """
+        Nombre d'opérations en attente de rejeu.
+        """
+        return self._depth
+
+    def append(self, operation: Dict) -> None:
+        """
+        Ajoute une opération au journal; elle est sur disque au retour de l'appel.
+
+        Args:
+            operation: Opération au format de apply_batch
+        """
+        line = (_encode(operation) + "\n").encode("utf-8")
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+            if self.fsync:
+                os.fsync(self._file.fileno())
+            self._depth += 1
+            self._track_key(_decode(line), self._file.tell())
+
+    def pending_create(self, key: str) -> Optional[Dict]:
+        """
+        Création en attente de rejeu enregistrée avec une clé d'idempotence.
+
+        Args:
+            key: Clé d'idempotence
+
+        Returns:
+            Optional[Dict]: L'opération du journal, None si aucune création en attente ne porte cette clé
+        """
+        with self._lock:
+            pending = self._pending_keys.get(key)
+        return pending[0] if pending is not None else None
+
+    def pending(self, limit: int = DEFAULT_BATCH_SIZE) -> Tuple[List[Dict], int]:
+        """
+        Lit les prochaines opérations à rejouer.
+
+        Un lot s'arrête avant un ID déjà présent, pour respecter la règle d'un ID
+        par lot de apply_batch sans changer l'ordre des opérations.
+
+        Returns:
+            Tuple: (opérations, position du journal après la dernière opération lue)
+        """
+        operations = []
+        ids = set()
+        with open(self.path, "rb") as f:
+            f.seek(self._offset)
+            position = self._offset
+            for line in f:
+                if not line.endswith(b"\n") or len(operations) >= limit:
+                    break
+                operation = _decode(line)
+                event_id = operation.get("id")
+                if event_id is not None and event_id in ids:
+                    break
+                ids.add(event_id)
+                operations.append(operation)
+                position += len(line)
+        return operations, position
+
+    def commit(self, count: int, position: int) -> None:
+        """
+        Confirme le rejeu des opérations jusqu'à une position; vide le journal s'il est entièrement rejoué.
+        """
+        with self._lock:
+            self._write_offset(position)
+            self._depth -= count
+            self._pending_keys = {
+                key: pending for key, pending in self._pending_keys.items() if pending[1] > position
+            }
+            if self._depth == 0:
+                self._file.truncate(0)
+                self._file.flush()
+                if self.fsync:
+                    os.fsync(self._file.fileno())
+                self._write_offset(0)
+
+    def close(self) -> None:
+        with self._lock:
+            self._file.close()
+
+
+class SpoolReplayer:
+    """
+    Rejoue en arrière-plan le journal d'écritures d'un magasin, par lots et dans l'ordre.
+    """
+
+    def __init__(self, store, batch_size: int = DEFAULT_BATCH_SIZE, interval: float = 1.0):
+        """
+        Initialise le rejoueur.
+
+        Args:
+            store: DatetimeEventStore dont le journal est rejoué
+            batch_size: Nombre d'opérations par lot
+            interval: Attente en secondes entre deux tentatives quand le backend ne répond pas
+        """
+        self.store = store
+        self.spool: WriteSpool = store.spool
+        self.batch_size = batch_size
+        self.interval = interval
+        self.replayed = 0
+        self.failed = 0
+        self.error: Optional[BaseException] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def replay(self) -> int:
+        """
+        Rejoue le journal jusqu'à le vider.
+
+        Les opérations refusées par le magasin (ID déjà pris par un autre
+        événement, événement modifié entre-temps) sont comptées dans `failed` et
+        ne sont pas rejouées. Une création déjà appliquée à l'identique, dont la
+        réponse s'était perdue, est comptée comme rejouée.
+
+        Returns:
+            int: Nombre d'opérations rejouées
+
+        Raises:
+            PyMongoError: Si le backend ne répond toujours pas; le lot sera rejoué plus tard
+        """
+        replayed = 0
+        while self.spool.depth and not self._stop.is_set():
+            operations, position = self.spool.pending(self.batch_size)
+            if not operations:
+                break
+            results = self.store.apply_batch(operations, replay=True)
+            self.failed += sum(result["status"] == "error" for result in results)
+            self.spool.commit(len(operations), position)
+            replayed += len(operations)
+        self.replayed += replayed
+        return replayed
+
+    def run(self) -> None:
+        """
+        Rejoue le journal tant que le rejoueur n'est pas arrêté.
+        """
+        while not self._stop.is_set():
+            try:
+                self.replay()
+                self.error = None
+            except PyMongoError as e:
+                self.error = e
+            self._stop.wait(self.interval)
+
+    def start(self) -> None:
+        """
+        Démarre le rejeu dans un thread d'arrière-plan.
+        """
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.run, name="spool-replayer", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """
+        Arrête le rejeu; les opérations restantes seront rejouées au prochain démarrage.
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def stats(self) -> Dict:
+        return {
+            "depth": self.spool.depth,
+            "replayed": self.replayed,
+            "failed": self.failed,
+            "error": str(self.error) if self.error is not None else None,
+        }
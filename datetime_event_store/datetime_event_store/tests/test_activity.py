@@ -0,0 +1,74 @@
+"""
+Tests unitaires du suivi des réponses de MongoDB et des erreurs des lectures ponctuelles.
+"""
+
+import datetime
+import unittest
+from unittest.mock import patch
+
+from pymongo.errors import ServerSelectionTimeoutError
+
+from datetime_event_store import DatetimeEventStore
+from datetime_event_store.activity import record_reply, track
+from datetime_event_store.event_store import _ReplyListener
+from datetime_event_store.parallel import map_shards
+
+
+class TestActivity(unittest.TestCase):
+    """
+    Tests du comptage des réponses de MongoDB d'une opération.
+    """
+
+    def test_replies_are_counted_inside_track_only(self):
+        """
+        Test que seules les réponses reçues dans le bloc, threads des lectures parallèles compris, sont comptées.
+        """
+        record_reply()
+        with track() as activity:
+            self.assertFalse(activity.contacted)
+            _ReplyListener().failed(None)
+            self.assertFalse(activity.contacted)
+            map_shards(lambda start, end: _ReplyListener().succeeded(None), [(0, 1), (1, 2)])
+
+        self.assertEqual(activity.replies, 2)
+        record_reply()
+        self.assertEqual(activity.replies, 2)
+
+
+class TestPointOperationErrors(unittest.TestCase):
+    """
+    Tests des erreurs du backend sur les opérations par ID.
+    """
+
+    def setUp(self):
+        self.store = DatetimeEventStore(db_name="datetime_events_activity")
+        self.store.clear_all_events()
+        self.event = self.store.store_event(datetime.datetime(2024, 1, 1), "Événement")
+
+    def test_backend_errors_propagate(self):
+        """
+        Test qu'une panne de MongoDB n'est pas confondue avec un événement introuvable.
+        """
+        outage = ServerSelectionTimeoutError("No servers found")
+        collection = self.store.events_collection
+        with patch.object(collection, "find_one", side_effect=outage):
+            with self.assertRaises(ServerSelectionTimeoutError):
+                self.store.get_event_by_id(self.event.id)
+        with patch.object(collection, "find_one_and_delete", side_effect=outage):
+            with self.assertRaises(ServerSelectionTimeoutError):
+                self.store.delete_event(self.event.id)
+        with patch.object(collection, "find_one_and_update", side_effect=outage):
+            with self.assertRaises(ServerSelectionTimeoutError):
+                self.store.update_event(self.event.id, name="Renommé")
+
+    def test_invalid_ids_are_not_found(self):
+        """
+        Test qu'un ID invalide reste traité comme un événement introuvable.
+        """
+        self.assertIsNone(self.store.get_event_by_id("invalide"))
+        self.assertFalse(self.store.delete_event("invalide"))
+        self.assertIsNone(self.store.update_event("invalide", name="Renommé"))
+
+
+if __name__ == "__main__":
+    unittest.main()
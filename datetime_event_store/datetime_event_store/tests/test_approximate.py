@@ -0,0 +1,94 @@
+"""
+Tests unitaires pour les estimateurs de comptes approximatifs.
+"""
+
+import unittest
+from datetime_event_store.approximate import ApproximateCount, HyperLogLog, estimate_from_sample
+
+
+class TestEstimateFromSample(unittest.TestCase):
+    """
+    Tests de l'extrapolation d'un compte à partir d'un échantillon.
+    """
+
+    def test_estimate_and_bound(self):
+        """
+        Test que l'estimation suit la proportion observée et que la borne la contient.
+        """
+        count = estimate_from_sample(250, 1000, 100000)
+
+        self.assertEqual(count, 25000)
+        self.assertFalse(count.exact)
+        self.assertTrue(2000 < count.error_bound < 3500)
+
+    def test_zero_hits_has_positive_bound(self):
+        """
+        Test qu'un échantillon sans correspondance conserve une borne d'erreur non nulle.
+        """
+        count = estimate_from_sample(0, 1000, 100000)
+
+        self.assertEqual(count, 0)
+        self.assertGreater(count.error_bound, 0)
+
+    def test_approximate_count_is_int(self):
+        """
+        Test que le compte approximatif s'utilise comme un entier.
+        """
+        count = ApproximateCount(42, exact=True)
+
+        self.assertEqual(count + 1, 43)
+        self.assertEqual(count.error_bound, 0)
+
+
+class TestHyperLogLog(unittest.TestCase):
+    """
+    Tests de l'esquisse de cardinalité HyperLogLog.
+    """
+
+    def test_cardinality_within_error(self):
+        """
+        Test que l'estimation reste proche de la cardinalité réelle.
+        """
+        sketch = HyperLogLog().update(f"event-{i % 20000}" for i in range(60000))
+        count = sketch.count()
+
+        self.assertLess(abs(count - 20000), 20000 * 4 * sketch.relative_error)
+
+    def test_small_cardinality(self):
+        """
+        Test de la précision sur de petites cardinalités.
+        """
+        sketch = HyperLogLog().update(["a", "b", "c", "a"])
+
+        self.assertEqual(sketch.count(), 3)
+
+    def test_merge(self):
+        """
+        Test que la fusion de deux esquisses estime l'union des valeurs.
+        """
+        first = HyperLogLog().update(f"n{i}" for i in range(0, 3000))
+        second = HyperLogLog().update(f"n{i}" for i in range(2000, 5000))
+        count = first.merge(second).count()
+
+        self.assertLess(abs(count - 5000), 5000 * 4 * first.relative_error)
+
+    def test_serialization(self):
+        """
+        Test de la sérialisation et du rechargement d'une esquisse.
+        """
+        sketch = HyperLogLog(precision=10).update(["x", "y"])
+        restored = HyperLogLog.from_bytes(sketch.to_bytes())
+
+        self.assertEqual(restored.precision, 10)
+        self.assertEqual(restored.count(), sketch.count())
+
+    def test_merge_requires_same_precision(self):
+        """
+        Test que la fusion d'esquisses de précisions différentes est refusée.
+        """
+        with self.assertRaises(ValueError):
+            HyperLogLog(precision=10).merge(HyperLogLog(precision=12))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,111 @@
+"""
+Tests unitaires des échéances des opérations et de leur transmission à MongoDB.
+"""
+
+import datetime
+import unittest
+from unittest.mock import MagicMock, patch
+
+from pymongo.errors import ExecutionTimeout
+
+from datetime_event_store import DatetimeEventStore
+from datetime_event_store.deadline import deadline, remaining
+from datetime_event_store.parallel import map_shards
+
+
+class TestDeadline(unittest.TestCase):
+    """
+    Tests de la portée des échéances.
+    """
+
+    def test_nested_deadlines_can_only_shorten(self):
+        """
+        Test qu'une échéance imbriquée ne peut pas repousser celle du bloc englobant.
+        """
+        self.assertIsNone(remaining())
+        with deadline(1):
+            with deadline(60):
+                self.assertLessEqual(remaining(), 1)
+            with deadline(0.5):
+                self.assertLessEqual(remaining(), 0.5)
+            with deadline(None):
+                self.assertGreater(remaining(), 0.5)
+        self.assertIsNone(remaining())
+
+    def test_deadline_follows_parallel_shards(self):
+        """
+        Test que l'échéance est visible dans les threads des lectures parallèles.
+        """
+        with deadline(5):
+            left = map_shards(lambda start, end: remaining(), [(0, 1), (1, 2)])
+
+        self.assertTrue(all(0 < value <= 5 for value in left))
+
+
+class TestStoreDeadline(unittest.TestCase):
+    """
+    Tests de l'échéance transmise aux lectures du DatetimeEventStore.
+    """
+
+    def setUp(self):
+        self.store = DatetimeEventStore(db_name="datetime_events_deadline")
+        self.store.clear_all_events()
+        self.start = datetime.datetime(2024, 1, 1)
+        self.store.store_event(self.start, "Événement", "normal")
+
+    def test_reads_carry_the_remaining_time(self):
+        """
+        Test que les comptages reçoivent le temps restant comme maxTimeMS, et rien sans échéance.
+        """
+        collection = self.store.events_collection
+        with patch.object(collection, "count_documents", wraps=collection.count_documents) as count:
+            self.store.count_events(self.start)
+            with deadline(2):
+                self.assertEqual(self.store.count_events(self.start), 1)
+
+        self.assertNotIn("maxTimeMS", count.call_args_list[0].kwargs)
+        self.assertTrue(0 < count.call_args_list[1].kwargs["maxTimeMS"] <= 2000)
+
+    def test_id_batch_and_overlap_reads_carry_the_remaining_time(self):
+        """
+        Test que la lecture par IDs, la lecture préalable d'un lot et la recherche de chevauchements
+        reçoivent le temps restant.
+        """
+        event = next(self.store.get_events(self.start, self.start))
+        self.store.store_event(self.start, "Intervalle", "normal", end_at=self.start + datetime.timedelta(hours=1))
+        collection = self.store.events_collection
+        with patch.object(collection, "find", wraps=collection.find) as find:
+            with deadline(2):
+                self.assertEqual(self.store.get_events_by_ids([event.id])[0].name, "Événement")
+                self.store.apply_batch([{"op": "update", "id": event.id, "name": "Renommé"}])
+
+        # Les deux premières lectures sont celles par IDs et celle qui précède le lot
+        for call in find.call_args_list[:2]:
+            self.assertTrue(0 < call.kwargs["max_time_ms"] <= 2000)
+
+        find = collection.find
+        cursors = []
+
+        def spy(*args, **kwargs):
+            cursors.append(MagicMock(wraps=find(*args, **kwargs)))
+            return cursors[-1]
+
+        with patch.object(collection, "find", side_effect=spy):
+            with deadline(2):
+                self.assertEqual(len(list(self.store.overlapping(self.start, self.start))), 2)
+
+        # La première lecture est celle des classes de durée présentes (distinct)
+        self.assertTrue(0 < cursors[0].max_time_ms.call_args.args[0] <= 2000)
+
+    def test_expired_deadline_fails_before_reading(self):
+        """
+        Test qu'une lecture lancée après l'échéance échoue sans interroger MongoDB.
+        """
+        with deadline(-1):
+            with self.assertRaises(ExecutionTimeout):
+                list(self.store.get_events(self.start, self.start + datetime.timedelta(days=1)))
+        self.assertEqual(len(list(self.store.get_events(self.start, self.start + datetime.timedelta(days=1)))), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -6,9 +6,13 @@ de la classe DatetimeEventStore. Les tests couvrent les fonctionnalités
 de base ainsi que des cas limites et des scénarios de performance.
 """
 
+import io
 import unittest
 import datetime
-from datetime_event_store import DatetimeEventStore
+from unittest.mock import patch
+from bson import ObjectId
+from datetime_event_store import DatetimeEventStore, Event, schema
+from datetime_event_store.migration import SchemaMigrator
 
 class TestDatetimeEventStore(unittest.TestCase):
     """
@@ -162,5 +166,432 @@ class TestDatetimeEventStore(unittest.TestCase):
         self.assertEqual(events[2].name, "Event 3")
         self.assertEqual(events[2].importance, "haute")
 
+    def test_parallel_get_events_matches_sequential(self):
+        """
+        Test que la lecture parallèle retourne les mêmes événements, dans le même ordre
+        """
+        store = DatetimeEventStore()
+
+        for day in range(1, 29):
+            store.store_event(datetime.datetime(2021, 2, day, 8), f"Event {day}", "normal")
+
+        start = datetime.datetime(2021, 2, 1)
+        end = datetime.datetime(2021, 2, 28, 23)
+
+        sequential = [event.id for event in store.get_events(start, end)]
+        parallel = [event.id for event in store.get_events(start, end, parallel=4)]
+
+        self.assertEqual(len(sequential), 28)
+        self.assertEqual(parallel, sequential)
+        self.assertEqual(store.count_events(start, end, parallel=4), 28)
+
+    def test_count_events_with_rollups(self):
+        """
+        Test que les comptes issus des rollups suivent les ajouts, mises à jour et suppressions
+        """
+        store = DatetimeEventStore(rollups_enabled=True)
+
+        first = store.store_event(datetime.datetime(2021, 6, 1, 10, 15, 30), "Event A", "haute")
+        store.store_event(datetime.datetime(2021, 6, 2, 23, 59, 59), "Event B", "basse")
+        store.store_event(datetime.datetime(2021, 6, 5, 0, 0), "Event C", "haute")
+
+        start = datetime.datetime(2021, 6, 1, 10, 15, 10)
+        end = datetime.datetime(2021, 6, 5)
+
+        self.assertEqual(store.count_events(start, end), 3)
+        self.assertEqual(store.count_events(start, end, importance="haute"), 2)
+
+        store.update_event(first.id, at=datetime.datetime(2021, 7, 1))
+        self.assertEqual(store.count_events(start, end), 2)
+
+        store.delete_event(first.id)
+        store.rebuild_rollups()
+        self.assertEqual(store.count_events(datetime.datetime(2021, 1, 1), datetime.datetime(2021, 12, 31)), 2)
+
+    def test_approximate_counts(self):
+        """
+        Test des comptes approximatifs et du compte de noms distincts
+        """
+        count = self.store.count_events(approximate=True)
+        self.assertEqual(count, 5)
+        self.assertFalse(count.exact)
+
+        count = self.store.count_events(datetime.datetime(2019, 2, 1), datetime.datetime(2019, 4, 30), approximate=True)
+        self.assertEqual(count, 3)
+        self.assertTrue(count.exact)
+
+        start = datetime.datetime(2019, 1, 1)
+        end = datetime.datetime(2019, 12, 31)
+        self.store.store_event(datetime.datetime(2019, 6, 1), "Test event 0", "normal")
+
+        self.assertEqual(self.store.count_distinct_names(start, end), 5)
+        self.assertEqual(self.store.count_distinct_names(start, end, approximate=False), 5)
+
+    def test_delete_events_in_range(self):
+        """
+        Test de la suppression groupée d'une plage, avec et sans dry_run
+        """
+        start = datetime.datetime(2019, 2, 1)
+        end = datetime.datetime(2019, 4, 30)
+
+        self.assertEqual(self.store.delete_events(start, end, dry_run=True), 3)
+        self.assertEqual(self.store.count_events(), 5)
+
+        self.assertEqual(self.store.delete_events(start, end, importance="haute"), 1)
+        self.assertEqual(self.store.delete_events(start, end), 2)
+        self.assertEqual(self.store.count_events(), 2)
+
+    def test_update_events_in_range(self):
+        """
+        Test de la mise à jour groupée de l'importance et du décalage des dates
+        """
+        start = datetime.datetime(2019, 2, 1)
+        end = datetime.datetime(2019, 4, 30)
+
+        self.assertEqual(self.store.update_events(start, end, set_importance="critique", dry_run=True), 3)
+        self.assertEqual(self.store.update_events(start, end, set_importance="critique"), 2)
+        self.assertEqual(self.store.count_events(importance="critique"), 3)
+
+        shifted = self.store.update_events(start, end, shift_by=datetime.timedelta(days=365))
+        self.assertEqual(shifted, 3)
+        self.assertEqual(self.store.count_events(start, end), 0)
+        self.assertEqual(self.store.count_events(datetime.datetime(2020, 1, 1), datetime.datetime(2020, 12, 31)), 3)
+
+    def test_export_import_roundtrip(self):
+        """
+        Test qu'un export réimporté dans un autre store conserve les événements et leurs IDs
+        """
+        buffer = io.BytesIO()
+        start = datetime.datetime(2019, 1, 1)
+        end = datetime.datetime(2019, 12, 31)
+
+        self.assertEqual(self.store.export(start, end, "ndjson", buffer), 5)
+
+        target = DatetimeEventStore(db_name="datetime_events_import")
+        target.clear_all_events()
+        buffer.seek(0)
+        self.assertEqual(target.import_(buffer, "ndjson", batch_size=2), 5)
+
+        buffer.seek(0)
+        self.assertEqual(target.import_(buffer, "ndjson"), 0)
+
+        source_events = [(e.id, e.at, e.name) for e in self.store.get_events(start, end)]
+        target_events = [(e.id, e.at, e.name) for e in target.get_events(start, end)]
+        self.assertEqual(target_events, source_events)
+
+    def test_slow_query_log(self):
+        """
+        Test que les opérations au-delà du seuil sont journalisées avec leur filtre
+        """
+        store = DatetimeEventStore(slow_query_ms=0, slow_query_log_size=2)
+
+        list(store.get_events(datetime.datetime(2019, 1, 1), datetime.datetime(2019, 12, 31)))
+        store.count_events(datetime.datetime(2019, 1, 1), datetime.datetime(2019, 12, 31))
+        store.count_events(importance="haute")
+
+        entries = store.slow_queries.entries()
+        self.assertEqual([entry["operation"] for entry in entries], ["count", "count"])
+        self.assertEqual(entries[1]["filter"], {"importance": "haute"})
+        self.assertGreaterEqual(entries[1]["duration_ms"], 0)
+        self.assertIsNone(DatetimeEventStore().slow_queries)
+        store.close()
+
+    def test_nearest_events(self):
+        """
+        Test des lectures des n événements suivants, précédents et les plus proches d'une date
+        """
+        store = DatetimeEventStore(db_name="datetime_events_nearest")
+        store.clear_all_events()
+        for i, date in enumerate(self.dates):
+            store.store_event(date, f"Test event {i}", "haute" if i % 2 else "normal")
+
+        after = store.get_next_events(self.dates[1], 2)
+        self.assertEqual([e.at for e in after], self.dates[2:4])
+        inclusive = store.get_next_events(self.dates[1], 1, inclusive=True)
+        self.assertEqual([e.at for e in inclusive], [self.dates[1]])
+
+        before = store.get_previous_events(self.dates[3], 5)
+        self.assertEqual([e.at for e in before], self.dates[2::-1])
+        self.assertEqual([e.at for e in store.get_previous_events(self.dates[3], 5, importance="haute")],
+                         [self.dates[1]])
+
+        nearest = store.get_nearest_events(datetime.datetime(2019, 3, 10), 3)
+        self.assertEqual([e.at for e in nearest], [self.dates[2], self.dates[3], self.dates[1]])
+        self.assertEqual(store.get_nearest_events(self.dates[0], 0), [])
+        store.clear_all_events()
+        store.close()
+
+    def test_overlapping_intervals(self):
+        """
+        Test que la recherche de chevauchement retrouve les intervalles en cours sans lire les autres
+        """
+        store = DatetimeEventStore(db_name="datetime_events_intervals")
+        store.clear_all_events()
+        window = (datetime.datetime(2019, 2, 10), datetime.datetime(2019, 2, 11))
+        incident = store.store_event(datetime.datetime(2019, 1, 15), "Incident",
+                                     end_at=datetime.datetime(2019, 2, 10, 6))
+        store.store_event(datetime.datetime(2019, 2, 9), "Maintenance", end_at=datetime.datetime(2019, 2, 9, 23))
+        store.store_event(datetime.datetime(2019, 2, 12), "Plus tard", end_at=datetime.datetime(2019, 2, 13))
+        point = store.store_event(datetime.datetime(2019, 2, 10, 12), "Ponctuel")
+
+        events = list(store.overlapping(*window))
+
+        self.assertEqual([e.id for e in events], [incident.id, point.id])
+        self.assertEqual(events[0].end_at, datetime.datetime(2019, 2, 10, 6))
+        updated = store.update_event(incident.id, end_at=datetime.datetime(2019, 2, 1))
+        self.assertEqual(updated.end_at, datetime.datetime(2019, 2, 1))
+        self.assertEqual([e.id for e in store.overlapping(*window)], [point.id])
+        with self.assertRaises(ValueError):
+            store.store_event(datetime.datetime(2019, 2, 1), "Invalide", end_at=datetime.datetime(2019, 1, 1))
+        with self.assertRaises(ValueError):
+            store.update_event(incident.id, at=datetime.datetime(2019, 3, 1))
+        store.clear_all_events()
+        store.close()
+
+    def test_stats(self):
+        """
+        Test des statistiques d'une plage calculées en une agrégation, dans les deux versions de schéma
+        """
+        for version in (1, 2):
+            store = DatetimeEventStore(db_name="datetime_events_stats", schema_version=version)
+            store.clear_all_events()
+            for i, date in enumerate(self.dates):
+                store.store_event(date, f"Test event {i}", "urgente" if i == 4 else "haute")
+            store.store_event(self.dates[1] + datetime.timedelta(hours=3), "Même jour", "basse")
+
+            stats = store.stats(datetime.datetime(2019, 2, 1), datetime.datetime(2019, 12, 31))
+
+            self.assertEqual(stats["total"], 5)
+            self.assertEqual((stats["first"], stats["last"]), (self.dates[1], self.dates[4]))
+            self.assertEqual(stats["by_importance"], {"haute": 3, "basse": 1, "urgente": 1})
+            self.assertEqual(stats["per_day"][datetime.date(2019, 2, 1)], 2)
+            self.assertEqual(list(stats["per_day"]), sorted(stats["per_day"]))
+            self.assertEqual(store.stats(datetime.datetime(2030, 1, 1), datetime.datetime(2031, 1, 1))["total"], 0)
+            store.clear_all_events()
+            store.close()
+
+    def test_calendar(self):
+        """
+        Test du calendrier d'un mois: regroupement par jour local, classement et troncature (MongoDB 5.2+)
+        """
+        store = DatetimeEventStore(db_name="datetime_events_calendar")
+        store.clear_all_events()
+        store.store_event(datetime.datetime(2024, 3, 5, 9, 0), "Matin", "normal")
+        store.store_event(datetime.datetime(2024, 3, 5, 10, 0), "Incident", "critique")
+        store.store_event(datetime.datetime(2024, 3, 5, 11, 0), "Revue", "haute")
+        store.store_event(datetime.datetime(2024, 3, 31, 22, 30), "Avril à Paris", "normal")
+
+        days = store.get_calendar(2024, 3, per_day=2)
+
+        self.assertEqual([day["day"] for day in days], [datetime.date(2024, 3, 5), datetime.date(2024, 3, 31)])
+        self.assertEqual([e.name for e in days[0]["events"]], ["Incident", "Revue"])
+        self.assertEqual((days[0]["total"], days[0]["more"]), (3, 1))
+        self.assertEqual(len(store.get_calendar(2024, 3, tz="Europe/Paris")), 1)
+        self.assertEqual(store.get_calendar(2024, 4, tz="Europe/Paris")[0]["day"], datetime.date(2024, 4, 1))
+        store.clear_all_events()
+        store.close()
+
+    def test_sorted_top_k(self):
+        """
+        Test des tris par date décroissante, importance et nom, avec une limite, dans les deux schémas
+        """
+        for version in (1, 2):
+            store = DatetimeEventStore(db_name="datetime_events_sort", schema_version=version)
+            store.clear_all_events()
+            for day, name, importance in [(1, "Delta", "critique"), (2, "Alpha", "basse"), (3, "Charlie", "urgente"),
+                                          (4, "Bravo", "critique"), (5, "Alpha", "haute")]:
+                store.store_event(datetime.datetime(2024, 1, day), name, importance)
+            start, end = datetime.datetime(2024, 1, 1), datetime.datetime(2024, 1, 31)
+
+            def names(**options):
+                return [(e.name, e.importance) for e in store.get_events(start, end, **options)]
+
+            self.assertEqual(names(sort="importance"), [("Bravo", "critique"), ("Delta", "critique"),
+                                                        ("Alpha", "haute"), ("Alpha", "basse"),
+                                                        ("Charlie", "urgente")])
+            self.assertEqual(names(sort="importance", limit=3), names(sort="importance")[:3])
+            self.assertEqual([e.at.day for e in store.get_events(start, end, sort="-at", limit=2)], [5, 4])
+            self.assertEqual([(e.name, e.at.day) for e in store.get_events(start, end, sort="name")][:2],
+                             [("Alpha", 2), ("Alpha", 5)])
+            self.assertEqual(names(limit=0), [])
+            with self.assertRaises(ValueError):
+                list(store.get_events(start, end, sort="importance_desc"))
+
+            # "normal" et "normale" ont le même rang: la date les départage
+            store.store_event(datetime.datetime(2024, 1, 6), "Echo", "normale")
+            store.store_event(datetime.datetime(2024, 1, 7), "Foxtrot", "normal")
+            self.assertEqual(names(sort="importance")[3:5], [("Foxtrot", "normal"), ("Echo", "normale")])
+            # Le tri par nom a son index (nom, date)
+            name_key, date_key = schema.FIELDS[version][1], schema.FIELDS[version][0]
+            keys = [index["key"] for index in store.events_collection.index_information().values()]
+            self.assertIn([(name_key, 1), (date_key, 1)], keys)
+
+    def test_idempotent_store_event(self):
+        """
+        Test qu'un réessai avec la même clé d'idempotence retourne l'événement d'origine sans le réinsérer
+        """
+        store = DatetimeEventStore(db_name="datetime_events_idempotency")
+        store.clear_all_events()
+        at = datetime.datetime(2024, 1, 1, 9)
+
+        # Les clés expirent au bout d'un jour (index TTL)
+        indexes = store.idempotency_collection.index_information()
+        self.assertEqual(indexes["created_at_1"]["expireAfterSeconds"], 86400)
+
+        created = store.store_event(at, "Commande", "haute", idempotency_key="commande-1")
+        retried = store.store_event(at, "Commande", "haute", idempotency_key="commande-1")
+        self.assertEqual(retried.id, created.id)
+        # Le réessai est comparé à la création d'origine, même après une mise à jour de l'événement
+        store.update_event(created.id, name="Commande modifiée")
+        self.assertEqual(store.store_event(at, "Commande", "haute", idempotency_key="commande-1").id, created.id)
+        with self.assertRaises(ValueError):
+            store.store_event(at, "Autre commande", "haute", idempotency_key="commande-1")
+
+        stored = store.store_events(
+            [Event(at, "Lot A"), Event(at, "Lot B"), Event(at, "Lot C"), Event(at, "Commande", "haute")],
+            idempotency_keys=["lot-a", "lot-b", "lot-a", "commande-1"]
+        )
+        self.assertEqual([e.name for e in stored], ["Lot A", "Lot B"])
+        self.assertEqual(store.store_events([Event(at, "Lot A")], idempotency_keys=["lot-a"]), [])
+        self.assertEqual(store.count_events(), 3)
+
+        # La clé survit à l'événement jusqu'à son expiration
+        store.delete_event(created.id)
+        self.assertEqual(store.store_event(at, "Commande", "haute", idempotency_key="commande-1").id, created.id)
+        self.assertEqual(store.count_events(), 2)
+        store.idempotency_collection.delete_many({})
+        self.assertEqual(store.store_event(at, "Autre commande", "haute", idempotency_key="commande-1").name,
+                         "Autre commande")
+
+    def test_batch_operations(self):
+        """
+        Test de la lecture groupée par IDs et d'un lot mixte de créations, mises à jour et suppressions
+        """
+        for version in (1, 2):
+            store = DatetimeEventStore(db_name="datetime_events_batch", schema_version=version)
+            store.clear_all_events()
+            first = store.store_event(datetime.datetime(2024, 1, 1, 9), "Premier", "basse")
+            second = store.store_event(datetime.datetime(2024, 1, 2, 9), "Second", "haute")
+
+            found = store.get_events_by_ids([second.id, "inconnu", "65e2f0a0c3b1a2d4e5f60718", first.id])
+            self.assertEqual([e.name if e else None for e in found], ["Second", None, None, "Premier"])
+
+            results = store.apply_batch([
+                {"op": "create", "at": datetime.datetime(2024, 1, 3, 9), "name": "Nouveau"},
+                {"op": "update", "id": first.id, "name": "Premier modifié", "importance": "critique"},
+                {"op": "delete", "id": second.id},
+                {"op": "delete", "id": "65e2f0a0c3b1a2d4e5f60718"},
+                {"op": "update", "id": first.id, "name": "Encore"},
+                {"op": "create", "at": datetime.datetime(2024, 1, 3, 9), "name": "Intervalle",
+                 "end_at": datetime.datetime(2024, 1, 3, 8)},
+            ])
+            self.assertEqual([r["index"] for r in results], list(range(6)))
+            self.assertEqual([r["status"] for r in results],
+                             ["created", "updated", "deleted", "not_found", "error", "error"])
+            self.assertEqual(results[1]["event"].importance, "critique")
+
+            events = list(store.get_events(datetime.datetime(2024, 1, 1), datetime.datetime(2024, 1, 31)))
+            self.assertEqual([(e.name, e.importance) for e in events],
+                             [("Premier modifié", "critique"), ("Nouveau", "normal")])
+            self.assertEqual(events[1].id, results[0]["id"])
+
+            unchanged = store.apply_batch([{"op": "update", "id": first.id, "name": "Premier modifié"}])
+            self.assertEqual(unchanged[0]["status"], "unchanged")
+
+    def test_batch_concurrent_changes(self):
+        """
+        Test qu'une opération de lot dont le document change après la lecture n'est ni appliquée ni comptée
+        """
+        store = DatetimeEventStore(db_name="datetime_events_batch", rollups_enabled=True)
+        store.clear_all_events()
+        first = store.store_event(datetime.datetime(2024, 1, 1, 9), "Premier", "basse")
+        second = store.store_event(datetime.datetime(2024, 1, 2, 9), "Second", "haute")
+        third = store.store_event(datetime.datetime(2024, 1, 3, 9), "Troisième", "basse")
+        find = store.events_collection.find
+        reads = []
+
+        def racing_find(*args, **kwargs):
+            docs = list(find(*args, **kwargs))
+            if not reads:
+                reads.append(args)
+                store.events_collection.update_one({"_id": ObjectId(first.id)}, {"$set": {"name": "Concurrent"}})
+                store.events_collection.delete_one({"_id": ObjectId(second.id)})
+            return docs
+
+        with patch.object(store.events_collection, "find", side_effect=racing_find):
+            results = store.apply_batch([
+                {"op": "update", "id": first.id, "importance": "critique"},
+                {"op": "delete", "id": second.id},
+                {"op": "update", "id": third.id, "importance": "haute"},
+            ])
+
+        self.assertEqual([r["status"] for r in results], ["error", "not_found", "updated"])
+        self.assertEqual(store.get_event_by_id(first.id).importance, "basse")
+        start, end = datetime.datetime(2024, 1, 1), datetime.datetime(2024, 1, 31)
+        self.assertEqual(store.count_events(start, end, importance="critique"), 0)
+        self.assertEqual(store.count_events(start, end, importance="haute"), 2)
+
+    def test_events_frame(self):
+        """
+        Test de la lecture en colonnes d'une collection contenant les deux versions de schéma
+        """
+        try:
+            import numpy
+        except ImportError:
+            self.skipTest("numpy n'est pas installé")
+        legacy = DatetimeEventStore(db_name="datetime_events_frame")
+        legacy.clear_all_events()
+        legacy.store_event(datetime.datetime(2024, 1, 1, 9), "v1", "haute")
+        legacy.store_event(datetime.datetime(2024, 1, 3, 9), "v1 hors table", "maintenance",
+                           end_at=datetime.datetime(2024, 1, 3, 10))
+        store = DatetimeEventStore(db_name="datetime_events_frame", schema_version=2)
+        store.store_event(datetime.datetime(2024, 1, 2, 9), "v2", "critique")
+
+        result = store.get_events_frame(datetime.datetime(2024, 1, 1), datetime.datetime(2024, 1, 31),
+                                        columns=("at", "name", "importance", "end_at"))
+
+        self.assertEqual(list(result["name"]), ["v1", "v2", "v1 hors table"])
+        self.assertEqual([str(importance) for importance in result["importance"]], ["haute", "critique", "maintenance"])
+        self.assertEqual(numpy.asarray(result["end_at"], dtype="datetime64[ms]")[2],
+                         numpy.datetime64("2024-01-03T10:00"))
+
+    def test_online_schema_migration(self):
+        """
+        Test que les deux versions de schéma sont lues pendant la migration et qu'elle peut reprendre
+        """
+        legacy = DatetimeEventStore(db_name="datetime_events_migration", rollups_enabled=True)
+        legacy.clear_all_events()
+        legacy.db["events_meta"].delete_many({})
+        for day in range(1, 11):
+            legacy.store_event(datetime.datetime(2023, 5, day, 9), f"Event {day}", "haute" if day % 2 else "urgente")
+
+        store = DatetimeEventStore(db_name="datetime_events_migration", rollups_enabled=True,
+                                   schema_version=2, day_buckets=True)
+        self.assertEqual(store.read_versions, (2, 1))
+        store.store_event(datetime.datetime(2023, 5, 5, 12), "Event v2", "critique")
+
+        start = datetime.datetime(2023, 5, 1)
+        end = datetime.datetime(2023, 5, 31)
+        before = [(e.id, e.at, e.name, e.importance) for e in store.get_events(start, end)]
+        self.assertEqual(len(before), 11)
+        self.assertEqual(before[5][2], "Event v2")
+
+        migrator = SchemaMigrator(store, batch_size=4)
+        migrator.stop()
+        self.assertFalse(migrator.run()["completed"])
+
+        migrator = SchemaMigrator(store, batch_size=4)
+        progress = migrator.run()
+        self.assertTrue(progress["completed"])
+        self.assertEqual(progress["migrated"], 10)
+        self.assertEqual(store.read_versions, (2,))
+        self.assertEqual(store.events_collection.count_documents({"v": 2, "d": {"$exists": True}}), 11)
+
+        after = [(e.id, e.at, e.name, e.importance) for e in store.get_events(start, end)]
+        self.assertEqual(after, before)
+        self.assertEqual(store.count_events(start, end, importance="urgente"), 5)
+        store.rebuild_rollups()
+        self.assertEqual(store.count_events(start, end, importance="haute"), 5)
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
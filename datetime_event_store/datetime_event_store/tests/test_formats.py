@@ -0,0 +1,86 @@
+"""
+Tests unitaires pour la sérialisation en flux des événements.
+"""
+
+import io
+import unittest
+import datetime
+from datetime_event_store import Event
+from datetime_event_store import formats
+
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
+
+class TestFormats(unittest.TestCase):
+    """
+    Tests de l'export et de l'import aux différents formats.
+    """
+
+    def setUp(self):
+        self.events = [
+            Event(datetime.datetime(2023, 5, 1, 8, 30), f"Événement, n°{i}", "haute", f"{i:024x}")
+            for i in range(5)
+        ]
+        self.events[1].end_at = datetime.datetime(2023, 5, 1, 9, 45)
+
+    def roundtrip(self, fmt):
+        data = b"".join(formats.iter_export(self.events, fmt, chunk_size=2))
+        return data, list(formats.iter_import(io.BytesIO(data), fmt, chunk_size=2))
+
+    def assert_records_match(self, records):
+        self.assertEqual(len(records), len(self.events))
+        for record, event in zip(records, self.events):
+            self.assertEqual(record["id"], event.id)
+            self.assertEqual(record["at"], event.at)
+            self.assertEqual(record["name"], event.name)
+            self.assertEqual(record["importance"], event.importance)
+            self.assertEqual(record["end_at"], event.end_at)
+
+    def test_ndjson_roundtrip(self):
+        """
+        Test de l'aller-retour au format NDJSON.
+        """
+        data, records = self.roundtrip(formats.NDJSON)
+
+        self.assertEqual(data.count(b"\n"), 5)
+        self.assert_records_match(records)
+
+    def test_csv_roundtrip(self):
+        """
+        Test de l'aller-retour au format CSV, y compris avec des virgules dans les noms.
+        """
+        data, records = self.roundtrip(formats.CSV)
+
+        self.assertTrue(data.startswith(b"id,at,name,importance"))
+        self.assert_records_match(records)
+
+    @unittest.skipIf(pyarrow is None, "pyarrow n'est pas installé")
+    def test_parquet_roundtrip(self):
+        """
+        Test de l'aller-retour au format Parquet, écrit en plusieurs row groups.
+        """
+        _, records = self.roundtrip(formats.PARQUET)
+
+        self.assert_records_match(records)
+
+    def test_export_is_chunked(self):
+        """
+        Test que l'export produit un morceau par groupe d'événements.
+        """
+        chunks = list(formats.iter_export(self.events, formats.NDJSON, chunk_size=2))
+
+        self.assertEqual(len(chunks), 3)
+
+    def test_unknown_format(self):
+        """
+        Test qu'un format inconnu est refusé.
+        """
+        with self.assertRaises(ValueError):
+            formats.iter_export(self.events, "xml")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,111 @@
+"""
+Tests unitaires de la lecture des événements en colonnes NumPy.
+"""
+
+import datetime
+import unittest
+from unittest.mock import patch
+
+from bson import ObjectId
+
+from datetime_event_store import frame
+from datetime_event_store.memory import InMemoryEventStore
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+try:
+    import pandas
+except ImportError:
+    pandas = None
+
+
+@unittest.skipIf(numpy is None, "numpy n'est pas installé")
+class TestFrame(unittest.TestCase):
+    """
+    Tests du décodage en colonnes et des comptes vectorisés.
+    """
+
+    def setUp(self):
+        self.store = InMemoryEventStore()
+        for i in range(10):
+            self.store.store_event(datetime.datetime(2024, 1, 1) + datetime.timedelta(hours=7 * i),
+                                   f"Event {i}", ("basse", "haute", "maintenance")[i % 3])
+        self.start = datetime.datetime(2024, 1, 1)
+        self.end = datetime.datetime(2024, 1, 31)
+
+    def test_documents_of_both_versions_are_decoded_into_columns(self):
+        """
+        Test du décodage de documents v1 et v2, importance hors table comprise.
+        """
+        builder = frame.FrameBuilder(frame.COLUMNS)
+        first_id = ObjectId()
+        builder.add_document({"_id": first_id, "at": datetime.datetime(2024, 1, 1), "name": "A",
+                              "importance": "haute"})
+        builder.add_document({"_id": ObjectId(), "v": 2, "t": datetime.datetime(2024, 1, 2), "n": "B",
+                              "i": 0, "s": "maintenance", "e": datetime.datetime(2024, 1, 3)})
+        builder.add_document({"_id": ObjectId(), "v": 2, "t": datetime.datetime(2024, 1, 4), "n": "C", "i": 40})
+
+        arrays = builder.arrays()
+
+        self.assertEqual(arrays["at"].dtype, numpy.dtype("datetime64[ms]"))
+        self.assertEqual(arrays["id"][0], str(first_id))
+        self.assertTrue(numpy.isnat(arrays["end_at"][0]))
+        self.assertEqual(arrays["end_at"][1], numpy.datetime64("2024-01-03"))
+        self.assertEqual([builder.categories[code] for code in arrays["importance"]],
+                         ["haute", "maintenance", "critique"])
+
+    def test_projection_reads_only_requested_fields(self):
+        """
+        Test que la projection ne lit que les champs des colonnes demandées.
+        """
+        self.assertEqual(frame.projection(1, ("at", "name")), {"at": 1, "name": 1, "_id": 0})
+        self.assertEqual(frame.projection(2, ("id", "importance")), {"t": 1, "v": 1, "i": 1, "s": 1})
+        with self.assertRaises(ValueError):
+            frame.FrameBuilder(("at", "inconnue"))
+
+    @unittest.skipIf(pandas is None, "pandas n'est pas installé")
+    def test_dataframe_and_vectorized_counts(self):
+        """
+        Test du DataFrame retourné et des comptes par intervalle et sur une fenêtre glissante.
+        """
+        df = self.store.get_events_frame(self.start, self.end)
+
+        self.assertEqual(list(df.columns), ["at", "name", "importance"])
+        self.assertEqual(str(df["importance"].dtype), "category")
+        self.assertEqual(df["importance"].iloc[2], "maintenance")
+
+        daily = frame.resample_counts(df, datetime.timedelta(days=1))
+        self.assertEqual(daily.tolist(), df.set_index("at").resample("1D").size().tolist())
+        rolling = frame.rolling_counts(df, datetime.timedelta(hours=14))
+        self.assertEqual(rolling.tolist(), df.set_index("at")["name"].rolling("14h").count().astype(int).tolist())
+
+    def test_numpy_arrays_without_pandas(self):
+        """
+        Test du dictionnaire de tableaux retourné quand pandas n'est pas installé.
+        """
+        with patch.object(frame, "_optional_pandas", return_value=None):
+            arrays = self.store.get_events_frame(self.start, self.end, columns=("at", "importance"))
+            starts, counts = frame.resample_counts(arrays, datetime.timedelta(days=1))
+            rolling = frame.rolling_counts(arrays, datetime.timedelta(hours=14))
+
+        self.assertEqual(arrays["importance_categories"][arrays["importance"][1]], "haute")
+        self.assertEqual(starts[0], numpy.datetime64("2024-01-01"))
+        self.assertEqual(counts.tolist(), [4, 3, 3])
+        self.assertEqual(rolling.tolist(), [1, 2, 2, 2, 2, 2, 2, 2, 2, 2])
+
+    def test_rolling_counts_include_events_at_the_same_date(self):
+        """
+        Test que les événements de même date comptent tous dans la fenêtre de chacun d'eux.
+        """
+        at = numpy.array([0, 0, 0, 5], dtype="datetime64[ms]")
+
+        counts = frame.rolling_counts({"at": at}, datetime.timedelta(milliseconds=10))
+
+        self.assertEqual(counts.tolist(), [3, 3, 3, 4])
+
+
+if __name__ == "__main__":
+    unittest.main()
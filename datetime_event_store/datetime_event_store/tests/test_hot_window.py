@@ -0,0 +1,183 @@
+"""
+Tests unitaires de la fenêtre en mémoire des événements récents.
+"""
+
+import datetime
+import unittest
+
+from bson import ObjectId
+
+from datetime_event_store import DatetimeEventStore, Event
+from datetime_event_store.hot_window import HotWindow, HotWindowRefresher
+
+
+class TestHotWindow(unittest.TestCase):
+    """
+    Tests du chargement, de l'éviction et des statistiques de la fenêtre.
+    """
+
+    def setUp(self):
+        self.now = datetime.datetime(2024, 3, 10, 12)
+        self.window = HotWindow(datetime.timedelta(days=7), clock=lambda: self.now)
+
+    def test_only_reads_starting_inside_the_window_are_served(self):
+        """
+        Test qu'une lecture n'est servie que si elle commence dans la fenêtre chargée.
+        """
+        self.assertFalse(self.window.covers(self.now))
+
+        self.window.load([Event(self.now - datetime.timedelta(days=1), "Hier", "haute", "a")], self.window.cutoff())
+
+        self.assertTrue(self.window.covers(self.now - datetime.timedelta(days=2)))
+        self.assertFalse(self.window.covers(self.now - datetime.timedelta(days=8)))
+        self.assertFalse(self.window.covers(None))
+        stats = self.window.stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["events"]), (1, 3, 1))
+        self.assertEqual(stats["hit_ratio"], 0.25)
+        self.assertGreater(stats["memory_bytes"], 0)
+
+    def test_events_age_out_of_the_window(self):
+        """
+        Test que les événements sortis de la fenêtre sont écartés et que son début avance.
+        """
+        events = [Event(self.now - datetime.timedelta(days=days), f"J-{days}", "normal", str(days))
+                  for days in (6, 3, 1)]
+        self.window.load(events, self.window.cutoff())
+
+        self.now += datetime.timedelta(days=4)
+
+        self.assertFalse(self.window.covers(self.now - datetime.timedelta(days=8)))
+        self.assertEqual(self.window.start, self.now - datetime.timedelta(days=7))
+        # La lecture ne fait qu'avancer le début de la fenêtre: l'éviction revient au rafraîchissement
+        self.assertEqual(self.window.events.count_events(), 3)
+        self.assertEqual(self.window.evict(), 1)
+        self.assertEqual([e.name for e in self.window.events.get_events(datetime.datetime.min, self.now)],
+                         ["J-3", "J-1"])
+
+    def test_upsert_ignores_events_before_the_window(self):
+        """
+        Test qu'une écriture antérieure à la fenêtre retire l'événement au lieu de l'ajouter.
+        """
+        self.window.load([Event(self.now, "Récent", "normal", "a")], self.window.cutoff())
+
+        self.window.upsert(Event(self.now - datetime.timedelta(days=30), "Déplacé", "normal", "a"))
+        self.window.upsert(Event(self.now, "Nouveau", "normal", "b"))
+
+        self.assertEqual([e.name for e in self.window.events.get_events(self.window.start, self.now)], ["Nouveau"])
+
+    def test_writes_during_a_reload_are_replayed_on_the_new_copy(self):
+        """
+        Test qu'une écriture reçue pendant la lecture d'un rechargement n'est pas perdue.
+        """
+        self.window.load([Event(self.now, "Avant", "normal", "a")], self.window.cutoff())
+
+        def snapshot():
+            yield Event(self.now, "Avant", "normal", "a")
+            self.window.upsert(Event(self.now, "Modifié", "haute", "a"))
+            self.window.upsert(Event(self.now, "Créé", "normal", "b"))
+            yield Event(self.now - datetime.timedelta(hours=1), "Lu", "basse", "c")
+
+        self.window.load(snapshot(), self.window.cutoff())
+
+        self.assertEqual(sorted(e.name for e in self.window.events.get_events(self.window.start, self.now)),
+                         ["Créé", "Lu", "Modifié"])
+        self.window.upsert(Event(self.now, "Après", "normal", "b"))
+        self.assertEqual(self.window.events.count_events(), 3)
+
+    def test_memory_estimate_follows_writes(self):
+        """
+        Test que l'empreinte mémoire suit les ajouts, remplacements et retraits sans recalcul.
+        """
+        self.window.load([Event(self.now, "Premier", "normal", "a")], self.window.cutoff())
+        loaded = self.window.memory_bytes()
+        self.assertGreater(loaded, 0)
+
+        self.window.upsert(Event(self.now, "Second", "haute", "b"))
+        self.assertGreater(self.window.memory_bytes(), loaded)
+        self.window.remove("b")
+        self.assertEqual(self.window.memory_bytes(), loaded)
+        self.window.upsert(Event(self.now - datetime.timedelta(days=30), "Sorti", "normal", "a"))
+        self.assertEqual(self.window.memory_bytes(), 0)
+
+
+class TestStoreHotWindow(unittest.TestCase):
+    """
+    Tests des lectures servies par la fenêtre d'un DatetimeEventStore.
+    """
+
+    def setUp(self):
+        now = datetime.datetime.utcnow()
+        self.recent = now - datetime.timedelta(days=1)
+        self.old = now - datetime.timedelta(days=30)
+        self.store = DatetimeEventStore(db_name="datetime_events_hot_window",
+                                        hot_window=datetime.timedelta(days=7))
+        self.store.clear_all_events()
+        self.store.store_event(self.old, "Ancien", "basse")
+        self.store.store_event(self.recent, "Récent", "haute")
+
+    def test_recent_reads_are_served_from_memory_and_kept_current(self):
+        """
+        Test que les lectures récentes sont servies depuis la fenêtre, tenue à jour par les écritures du magasin.
+        """
+        start = self.recent - datetime.timedelta(hours=1)
+        end = self.recent + datetime.timedelta(days=2)
+
+        self.assertEqual([e.name for e in self.store.get_events(start, end)], ["Récent"])
+        created = self.store.store_event(self.recent + datetime.timedelta(hours=1), "Ajouté", "normal")
+        self.assertEqual(self.store.count_events(start, end), 2)
+        self.store.update_event(created.id, name="Renommé")
+        self.assertEqual([e.name for e in self.store.get_events(start, end)], ["Récent", "Renommé"])
+        self.store.delete_event(created.id)
+        self.assertEqual(self.store.count_events(start, end, importance="haute"), 1)
+
+        self.assertEqual(len(list(self.store.get_events(self.old, end))), 2)
+        stats = self.store.hot_window.stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (4, 1))
+
+    def test_importance_sort_ranks_normal_spellings_together(self):
+        """
+        Test que "normal" et "normale" ont le même rang dans un tri par importance servi par la fenêtre.
+        """
+        self.store.store_event(self.recent + datetime.timedelta(hours=1), "Normale", "normale")
+        self.store.store_event(self.recent + datetime.timedelta(hours=2), "Normal", "normal")
+        start, end = self.recent - datetime.timedelta(hours=1), self.recent + datetime.timedelta(days=2)
+
+        self.assertEqual([e.name for e in self.store.get_events(start, end, sort="importance")],
+                         ["Récent", "Normal", "Normale"])
+        self.assertEqual(self.store.hot_window.stats()["hits"], 1)
+
+    def test_aware_datetimes_are_stored_and_read_in_utc(self):
+        """
+        Test qu'une date avec fuseau est stockée et lue en UTC, la fenêtre étant active.
+        """
+        paris = datetime.timezone(datetime.timedelta(hours=2))
+        at = (self.recent + datetime.timedelta(hours=1)).replace(tzinfo=datetime.timezone.utc).astimezone(paris)
+
+        created = self.store.store_event(at, "Avec fuseau", "normal")
+
+        self.assertEqual(created.at, self.recent + datetime.timedelta(hours=1))
+        start, end = at - datetime.timedelta(hours=2), at + datetime.timedelta(days=1)
+        self.assertEqual([e.name for e in self.store.get_events(start, end)], ["Récent", "Avec fuseau"])
+        self.assertEqual(self.store.count_events(start, end), 2)
+        self.assertEqual(self.store.hot_window.stats()["hits"], 2)
+
+    def test_change_feed_events_update_the_window(self):
+        """
+        Test de l'application des changements faits par d'autres processus.
+        """
+        refresher = HotWindowRefresher(self.store)
+        event_id = ObjectId()
+        refresher.apply_change({
+            "operationType": "insert",
+            "documentKey": {"_id": event_id},
+            "fullDocument": {"_id": event_id, "at": self.recent, "name": "Autre processus", "importance": "normal"},
+        })
+        start = self.recent - datetime.timedelta(hours=1)
+        self.assertEqual(self.store.hot_window.events.count_events(start), 2)
+
+        refresher.apply_change({"operationType": "delete", "documentKey": {"_id": event_id}})
+        self.assertEqual(self.store.hot_window.events.count_events(start), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
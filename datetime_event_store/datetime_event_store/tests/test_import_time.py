@@ -0,0 +1,70 @@
+"""
+Tests du coût d'import du paquet, pour détecter les régressions du temps de démarrage.
+"""
+
+import os
+import subprocess
+import sys
+import unittest
+
+# Budget du temps d'import cumulé de datetime_event_store, en microsecondes (environ 0,3 ms mesuré,
+# contre 150 ms quand pymongo était importé avec le paquet)
+IMPORT_BUDGET_US = 50000
+
+PACKAGE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def _run(code: str, *options: str) -> subprocess.CompletedProcess:
+    return subprocess.run([sys.executable, *options, "-c", code], cwd=PACKAGE_DIR,
+                          capture_output=True, text=True, check=True)
+
+
+def import_time_us(module: str) -> int:
+    """
+    Mesure le temps d'import cumulé d'un module dans un interpréteur neuf (python -X importtime).
+    """
+    result = _run(f"import {module}", "-X", "importtime")
+    for line in result.stderr.splitlines():
+        fields = [field.strip() for field in line.split("|")]
+        if len(fields) == 3 and fields[2] == module:
+            return int(fields[1])
+    raise AssertionError(f"{module} absent de la sortie de -X importtime")
+
+
+class TestImportTime(unittest.TestCase):
+    """
+    Tests de l'import paresseux du paquet.
+    """
+
+    def test_package_import_does_not_load_the_driver(self):
+        """
+        Test qu'importer le paquet, formats et la CLI ne charge ni pymongo ni bson.
+        """
+        result = _run(
+            "import sys, datetime_event_store, datetime_event_store.formats, datetime_event_store.cli\n"
+            "print(sorted(m for m in sys.modules if m.split('.')[0] in ('pymongo', 'bson')))"
+        )
+        self.assertEqual(result.stdout.strip(), "[]")
+
+    def test_exports_are_loaded_on_first_access(self):
+        """
+        Test que les classes exportées restent accessibles et listées.
+        """
+        result = _run(
+            "import datetime_event_store as p\n"
+            "print('DatetimeEventStore' in dir(p), p.Event.__module__, p.DatetimeEventStore.__name__)"
+        )
+        self.assertEqual(result.stdout.split(), ["True", "datetime_event_store.event_store", "DatetimeEventStore"])
+        with self.assertRaises(subprocess.CalledProcessError):
+            _run("import datetime_event_store as p; p.Inconnu")
+
+    def test_import_time_budget(self):
+        """
+        Test que le temps d'import du paquet reste sous le budget.
+        """
+        elapsed = min(import_time_us("datetime_event_store") for _ in range(3))
+        self.assertLess(elapsed, IMPORT_BUDGET_US)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+"""
+Tests unitaires pour le générateur de charge.
+"""
+
+import unittest
+from datetime_event_store.loadtest import LoadGenerator, format_report, parse_mix, percentile
+
+
+class FakeTransport:
+    """
+    Transport simulant l'API avec un dictionnaire d'événements.
+    """
+
+    def __init__(self):
+        self.events = {}
+        self.calls = []
+
+    def request(self, method, path, body=None):
+        self.calls.append((method, path))
+        if method == "POST":
+            event_id = str(len(self.calls))
+            self.events[event_id] = body
+            return 201, dict(body, id=event_id)
+        event_id = path.rsplit("/", 1)[-1]
+        if method == "GET" and path.startswith("/api/events?"):
+            return 200, {"items": [], "total": 0}
+        if event_id not in self.events:
+            return 404, {"detail": "Événement non trouvé"}
+        if method == "DELETE":
+            del self.events[event_id]
+            return 204, None
+        return 200, self.events[event_id]
+
+
+class TestLoadGenerator(unittest.TestCase):
+    """
+    Tests du mélange d'opérations et du calcul des percentiles.
+    """
+
+    def test_percentile(self):
+        """
+        Test du percentile par rang le plus proche.
+        """
+        values = [float(v) for v in range(1, 101)]
+
+        self.assertEqual(percentile(values, 50), 50.0)
+        self.assertEqual(percentile(values, 99), 99.0)
+        self.assertEqual(percentile(values, 100), 100.0)
+        self.assertEqual(percentile([], 95), 0.0)
+
+    def test_parse_mix(self):
+        """
+        Test de l'analyse des proportions d'opérations.
+        """
+        self.assertEqual(parse_mix("create=1, list=3"), {"create": 1.0, "list": 3.0})
+        with self.assertRaises(ValueError):
+            parse_mix("purge=1")
+        with self.assertRaises(ValueError):
+            parse_mix("create=0")
+
+    def test_run_records_every_request(self):
+        """
+        Test que chaque requête est mesurée et rattachée à sa route.
+        """
+        transport = FakeTransport()
+        generator = LoadGenerator(transport, rate=0, concurrency=4, seed=1)
+        generator.preload(20)
+
+        rows = generator.run(requests=200)
+
+        self.assertEqual(sum(row["count"] for row in rows), 200)
+        self.assertEqual(sum(row["errors"] for row in rows), 0)
+        routes = {row["route"] for row in rows}
+        self.assertIn("POST /api/events", routes)
+        self.assertIn("GET /api/events/{id}", routes)
+        self.assertTrue(any(route.startswith("GET /api/events [") for route in routes))
+        self.assertIn("total", format_report(rows))
+
+    def test_mix_restricts_operations(self):
+        """
+        Test qu'une opération de poids nul n'est jamais exécutée.
+        """
+        transport = FakeTransport()
+        generator = LoadGenerator(transport, mix=parse_mix("create=1,list=1"), rate=0, seed=2)
+
+        generator.run(requests=50)
+
+        self.assertFalse(any(method in ("PUT", "DELETE") for method, _ in transport.calls))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,210 @@
+"""
+Tests unitaires pour le stockage d'événements en mémoire.
+"""
+
+import unittest
+import datetime
+from datetime_event_store.event_store import Event
+from datetime_event_store.memory import InMemoryEventStore
+
+
+class TestInMemoryEventStore(unittest.TestCase):
+    """
+    Tests unitaires pour la classe InMemoryEventStore.
+    """
+
+    def setUp(self):
+        """
+        Préparation des tests.
+        """
+        self.store = InMemoryEventStore()
+
+        self.dates = [
+            datetime.datetime(2019, 3, 1, 12, 0),
+            datetime.datetime(2019, 1, 1, 12, 0),
+            datetime.datetime(2019, 2, 1, 12, 0),
+        ]
+        self.events = [self.store.store_event(date, f"Test event {i}", "normal") for i, date in enumerate(self.dates)]
+
+    def test_get_events_sorted_in_range(self):
+        """
+        Test que les événements d'une plage sont triés par date.
+        """
+        events = list(self.store.get_events(datetime.datetime(2019, 1, 1), datetime.datetime(2019, 2, 1, 12)))
+
+        self.assertEqual([e.at for e in events], [self.dates[1], self.dates[2]])
+
+    def test_same_timestamp_keeps_insertion_order(self):
+        """
+        Test que des événements de même date restent dans l'ordre d'insertion.
+        """
+        same = datetime.datetime(2022, 5, 10)
+        for name in ("A", "B", "C"):
+            self.store.store_event(same, name)
+
+        events = list(self.store.get_events(same, same))
+
+        self.assertEqual([e.name for e in events], ["A", "B", "C"])
+
+    def test_update_moves_event(self):
+        """
+        Test qu'une mise à jour de date repositionne l'événement.
+        """
+        updated = self.store.update_event(self.events[0].id, at=datetime.datetime(2018, 1, 1))
+
+        self.assertEqual(updated.at, datetime.datetime(2018, 1, 1))
+        first = next(self.store.get_events(datetime.datetime(2000, 1, 1), datetime.datetime(2100, 1, 1)))
+        self.assertEqual(first.id, self.events[0].id)
+        self.assertIsNone(self.store.update_event(self.events[0].id, name=updated.name))
+
+    def test_delete_and_count(self):
+        """
+        Test de la suppression et du comptage.
+        """
+        self.assertTrue(self.store.delete_event(self.events[1].id))
+        self.assertFalse(self.store.delete_event(self.events[1].id))
+        self.assertIsNone(self.store.get_event_by_id(self.events[1].id))
+        self.assertEqual(self.store.count_events(), 2)
+        self.assertEqual(self.store.count_events(start=datetime.datetime(2019, 2, 15)), 1)
+
+    def test_next_previous_and_nearest(self):
+        """
+        Test des lectures bornées autour d'une date.
+        """
+        self.store.store_event(datetime.datetime(2019, 2, 1, 12, 0), "Same date", "haute")
+
+        after = self.store.get_next_events(datetime.datetime(2019, 1, 1, 12, 0), 2)
+        self.assertEqual([e.name for e in after], ["Test event 2", "Same date"])
+        before = self.store.get_previous_events(datetime.datetime(2019, 3, 1, 12, 0), 5, importance="normal")
+        self.assertEqual([e.name for e in before], ["Test event 2", "Test event 1"])
+
+        nearest = self.store.get_nearest_events(datetime.datetime(2019, 2, 20), 2)
+        self.assertEqual([e.at for e in nearest], [self.dates[0], self.dates[2]])
+
+    def test_overlapping_intervals(self):
+        """
+        Test que les intervalles commencés avant la fenêtre et encore en cours sont retrouvés.
+        """
+        window = (datetime.datetime(2019, 2, 10), datetime.datetime(2019, 2, 11))
+        long = self.store.store_event(datetime.datetime(2019, 1, 15), "Long", end_at=datetime.datetime(2019, 2, 10, 6))
+        self.store.store_event(datetime.datetime(2019, 2, 9), "Ended", end_at=datetime.datetime(2019, 2, 9, 23))
+        inside = self.store.store_event(datetime.datetime(2019, 2, 10, 12), "Point")
+
+        events = list(self.store.overlapping(*window))
+
+        self.assertEqual([e.id for e in events], [long.id, inside.id])
+        self.store.update_event(long.id, end_at=datetime.datetime(2019, 2, 1))
+        self.assertEqual([e.id for e in self.store.overlapping(*window)], [inside.id])
+        with self.assertRaises(ValueError):
+            self.store.update_event(long.id, at=datetime.datetime(2019, 3, 1))
+
+    def test_stats(self):
+        """
+        Test des statistiques d'une plage.
+        """
+        stats = self.store.stats(start=datetime.datetime(2019, 2, 1))
+
+        self.assertEqual(stats["total"], 2)
+        self.assertEqual((stats["first"], stats["last"]), (self.dates[2], self.dates[0]))
+        self.assertEqual(stats["by_importance"], {"normal": 2})
+        self.assertEqual(list(stats["per_day"]), [datetime.date(2019, 2, 1), datetime.date(2019, 3, 1)])
+
+    def test_calendar_groups_by_local_day(self):
+        """
+        Test du calendrier: jours locaux, classement par importance et troncature.
+        """
+        store = InMemoryEventStore()
+        store.store_event(datetime.datetime(2024, 3, 4, 23, 30), "Soir UTC", "basse")
+        store.store_event(datetime.datetime(2024, 3, 5, 9, 0), "Matin", "normal")
+        store.store_event(datetime.datetime(2024, 3, 5, 10, 0), "Incident", "critique")
+        store.store_event(datetime.datetime(2024, 3, 5, 11, 0), "Revue", "haute")
+        store.store_event(datetime.datetime(2024, 2, 29, 23, 30), "Début de mois à Paris", "normal")
+        store.store_event(datetime.datetime(2024, 3, 31, 22, 30), "Avril à Paris", "normal")
+
+        utc = store.get_calendar(2024, 3, per_day=2)
+        self.assertEqual([day["day"] for day in utc],
+                         [datetime.date(2024, 3, 4), datetime.date(2024, 3, 5), datetime.date(2024, 3, 31)])
+        self.assertEqual([e.name for e in utc[1]["events"]], ["Incident", "Revue"])
+        self.assertEqual((utc[1]["total"], utc[1]["more"]), (3, 1))
+
+        paris = store.get_calendar(2024, 3, per_day=2, tz=datetime.timezone(datetime.timedelta(hours=1)))
+        self.assertEqual(paris[0]["day"], datetime.date(2024, 3, 1))
+        self.assertEqual(paris[1]["total"], 4)
+        self.assertEqual(paris[-1]["day"], datetime.date(2024, 3, 31))
+        with self.assertRaises(ValueError):
+            store.get_calendar(2024, 13)
+
+    def test_batch_operations(self):
+        """
+        Test de la lecture groupée par IDs et d'un lot mixte d'opérations.
+        """
+        first, second = self.store.get_events(self.dates[1], self.dates[2])
+        found = self.store.get_events_by_ids([second.id, "inconnu", first.id])
+        self.assertEqual([e.id if e else None for e in found], [second.id, None, first.id])
+
+        results = self.store.apply_batch([
+            {"op": "create", "at": datetime.datetime(2019, 4, 1), "name": "Nouveau", "importance": "haute"},
+            {"op": "update", "id": first.id, "at": datetime.datetime(2019, 4, 2)},
+            {"op": "delete", "id": second.id},
+            {"op": "delete", "id": second.id},
+            {"op": "update", "id": "inconnu", "name": "Rien"},
+            {"op": "rename", "id": first.id},
+        ])
+
+        self.assertEqual([r["status"] for r in results],
+                         ["created", "updated", "deleted", "error", "not_found", "error"])
+        self.assertEqual([e.name for e in self.store.get_events(datetime.datetime(2019, 4, 1),
+                                                                datetime.datetime(2019, 4, 30))],
+                         ["Nouveau", first.name])
+        self.assertIsNone(self.store.get_event_by_id(second.id))
+
+    def test_sorted_top_k(self):
+        """
+        Test des tris par importance, date décroissante et nom, avec une limite.
+        """
+        self.store.store_event(self.dates[1], "Critique", "critique")
+        start, end = datetime.datetime(2019, 1, 1), datetime.datetime(2019, 12, 31)
+
+        top = list(self.store.get_events(start, end, sort="importance", limit=2))
+        self.assertEqual([e.name for e in top], ["Critique", "Test event 0"])
+        self.assertEqual([e.at for e in self.store.get_events(start, end, sort="-at", limit=2)],
+                         [self.dates[0], self.dates[2]])
+        self.assertEqual([e.name for e in self.store.get_events(start, end, sort="name")][0], "Critique")
+
+        # "normal" et "normale" ont le même rang: la date les départage
+        self.store.store_event(datetime.datetime(2019, 2, 15), "Normale", "normale")
+        self.assertEqual([e.name for e in self.store.get_events(start, end, sort="importance")][1:4],
+                         ["Test event 0", "Normale", "Test event 2"])
+
+    def test_idempotency_keys_expire(self):
+        """
+        Test qu'une clé d'idempotence retourne l'événement d'origine jusqu'à son expiration.
+        """
+        created = self.store.store_event(self.dates[0], "Commande", idempotency_key="commande-1")
+
+        self.assertEqual(self.store.store_event(self.dates[0], "Commande", idempotency_key="commande-1").id, created.id)
+        self.assertEqual(self.store.count_events(), 4)
+        with self.assertRaises(ValueError):
+            self.store.store_event(self.dates[1], "Commande", idempotency_key="commande-1")
+
+        stored = self.store.store_events([Event(self.dates[0], "Commande"), Event(self.dates[1], "Lot")],
+                                         idempotency_keys=["commande-1", "lot"])
+        self.assertEqual([e.name for e in stored], ["Lot"])
+        self.assertTrue(self.store.delete_event(created.id))
+        self.assertEqual(self.store.store_event(self.dates[0], "Commande", idempotency_key="commande-1").id, created.id)
+
+        store = InMemoryEventStore(idempotency_ttl=datetime.timedelta(0))
+        first = store.store_event(self.dates[0], "Commande", idempotency_key="commande-1")
+        self.assertNotEqual(store.store_event(self.dates[0], "Commande", idempotency_key="commande-1").id, first.id)
+        self.assertEqual(store.count_events(), 2)
+
+    def test_invalid_datetime_type(self):
+        """
+        Test que le store rejette les types non datetime.
+        """
+        with self.assertRaises(TypeError):
+            self.store.store_event("2022-01-01", "Invalid event")
+
+
+if __name__ == "__main__":
+    unittest.main()
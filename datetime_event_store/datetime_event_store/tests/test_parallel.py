@@ -0,0 +1,104 @@
+"""
+Tests unitaires pour le découpage et la fusion des requêtes parallèles.
+"""
+
+import unittest
+import datetime
+from datetime_event_store.parallel import split_range, merge_shards, map_shards
+
+
+class TestSplitRange(unittest.TestCase):
+    """
+    Tests du découpage d'une plage de dates en sous-plages.
+    """
+
+    def setUp(self):
+        self.start = datetime.datetime(2020, 1, 1)
+        self.end = datetime.datetime(2020, 1, 5)
+
+    def test_equal_width_without_samples(self):
+        """
+        Test du découpage à largeur égale en l'absence d'échantillon.
+        """
+        shards = split_range(self.start, self.end, 4)
+
+        self.assertEqual(len(shards), 4)
+        self.assertEqual(shards[0][0], self.start)
+        self.assertEqual(shards[1][0], datetime.datetime(2020, 1, 2))
+        self.assertEqual(shards[-1][1], self.end)
+        self.assertEqual([last for _, _, last in shards], [False, False, False, True])
+
+    def test_shards_are_contiguous(self):
+        """
+        Test que les sous-plages se suivent sans trou ni chevauchement.
+        """
+        samples = [self.start + datetime.timedelta(hours=h) for h in range(0, 96, 3)]
+        shards = split_range(self.start, self.end, 3, samples)
+
+        for (_, hi, _), (lo, _, _) in zip(shards, shards[1:]):
+            self.assertEqual(hi, lo)
+
+    def test_boundaries_follow_samples(self):
+        """
+        Test que les bornes suivent la répartition des dates échantillonnées.
+        """
+        dense = [datetime.datetime(2020, 1, 4, minute=m) for m in range(40)]
+        shards = split_range(self.start, self.end, 2, dense)
+
+        self.assertEqual(shards[0][1], datetime.datetime(2020, 1, 4, minute=20))
+
+    def test_duplicate_boundaries_are_collapsed(self):
+        """
+        Test que des dates échantillonnées identiques ne créent pas de sous-plage vide.
+        """
+        same = [datetime.datetime(2020, 1, 3)] * 10
+        shards = split_range(self.start, self.end, 4, same)
+
+        self.assertEqual(len(shards), 2)
+        for lo, hi, _ in shards:
+            self.assertLess(lo, hi)
+
+
+class TestMergeShards(unittest.TestCase):
+    """
+    Tests de la fusion ordonnée des résultats de plusieurs shards.
+    """
+
+    def test_merge_is_sorted(self):
+        """
+        Test que la fusion produit un flux unique trié.
+        """
+        sources = [lambda: [1, 4, 7], lambda: [2, 5, 8], lambda: [3, 6, 9]]
+
+        self.assertEqual(list(merge_shards(sources, key=lambda x: x, buffer_size=1)), list(range(1, 10)))
+
+    def test_shard_error_is_raised(self):
+        """
+        Test qu'une erreur dans un shard est propagée au consommateur.
+        """
+        def failing():
+            yield 1
+            raise ValueError("shard en échec")
+
+        with self.assertRaises(ValueError):
+            list(merge_shards([failing, lambda: [2, 3]], key=lambda x: x))
+
+    def test_early_stop(self):
+        """
+        Test qu'un arrêt anticipé de la lecture ne bloque pas les shards.
+        """
+        merged = merge_shards([lambda: range(0, 10000, 2), lambda: range(1, 10000, 2)],
+                              key=lambda x: x, buffer_size=2)
+
+        self.assertEqual(next(merged), 0)
+        merged.close()
+
+    def test_map_shards(self):
+        """
+        Test de l'application d'une fonction à chaque sous-plage.
+        """
+        self.assertEqual(map_shards(lambda lo, hi, last: hi - lo, [(0, 2, False), (2, 7, True)]), [2, 5])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+"""
+Tests unitaires pour la décomposition des plages en créneaux de rollups.
+"""
+
+import unittest
+import datetime
+from datetime_event_store import rollups
+
+
+class TestRollupPlan(unittest.TestCase):
+    """
+    Tests de la décomposition d'une plage en créneaux alignés et bords bruts.
+    """
+
+    def test_floor_and_ceil(self):
+        """
+        Test de l'arrondi des dates aux créneaux.
+        """
+        at = datetime.datetime(2021, 3, 4, 5, 6, 7, 8000)
+
+        self.assertEqual(rollups.floor(at, rollups.MINUTE), datetime.datetime(2021, 3, 4, 5, 6))
+        self.assertEqual(rollups.floor(at, rollups.HOUR), datetime.datetime(2021, 3, 4, 5))
+        self.assertEqual(rollups.floor(at, rollups.DAY), datetime.datetime(2021, 3, 4))
+        self.assertEqual(rollups.ceil(at, rollups.DAY), datetime.datetime(2021, 3, 5))
+        self.assertEqual(rollups.ceil(datetime.datetime(2021, 3, 4), rollups.DAY), datetime.datetime(2021, 3, 4))
+
+    def test_plan_uses_coarsest_buckets(self):
+        """
+        Test que la partie alignée est couverte par des jours, heures puis minutes.
+        """
+        start = datetime.datetime(2021, 1, 1, 22, 30, 15)
+        end = datetime.datetime(2021, 1, 4, 1, 10, 30)
+
+        buckets, edges = rollups.plan(start, end)
+
+        self.assertEqual(buckets, [
+            (rollups.MINUTE, datetime.datetime(2021, 1, 1, 22, 31), datetime.datetime(2021, 1, 1, 23)),
+            (rollups.HOUR, datetime.datetime(2021, 1, 1, 23), datetime.datetime(2021, 1, 2)),
+            (rollups.DAY, datetime.datetime(2021, 1, 2), datetime.datetime(2021, 1, 4)),
+            (rollups.HOUR, datetime.datetime(2021, 1, 4), datetime.datetime(2021, 1, 4, 1)),
+            (rollups.MINUTE, datetime.datetime(2021, 1, 4, 1), datetime.datetime(2021, 1, 4, 1, 10)),
+        ])
+        self.assertEqual(edges, [
+            (start, datetime.datetime(2021, 1, 1, 22, 31), False),
+            (datetime.datetime(2021, 1, 4, 1, 10), end, True),
+        ])
+
+    def test_plan_short_range_is_raw(self):
+        """
+        Test qu'une plage de moins d'une minute alignée est comptée sur les événements.
+        """
+        start = datetime.datetime(2021, 1, 1, 10, 0, 10)
+        end = datetime.datetime(2021, 1, 1, 10, 0, 50)
+
+        self.assertEqual(rollups.plan(start, end), ([], [(start, end, True)]))
+
+    def test_build_documents(self):
+        """
+        Test de la construction des rollups de toutes les granularités.
+        """
+        groups = [
+            {"_id": {"t": "2021-01-01T10:00", "i": "haute"}, "n": 2},
+            {"_id": {"t": "2021-01-01T11:30", "i": "haute"}, "n": 3},
+        ]
+        docs = {(d["g"], d["t"]): d["n"] for d in rollups.build_documents(groups)}
+
+        self.assertEqual(docs[(rollups.DAY, datetime.datetime(2021, 1, 1))], 5)
+        self.assertEqual(docs[(rollups.HOUR, datetime.datetime(2021, 1, 1, 11))], 3)
+        self.assertEqual(docs[(rollups.MINUTE, datetime.datetime(2021, 1, 1, 10))], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,106 @@
+"""
+Tests unitaires des versions de schéma des documents
+"""
+
+import datetime
+import unittest
+
+from datetime_event_store import Event, schema
+
+
+class TestSchema(unittest.TestCase):
+    """
+    Tests de l'encodage et du décodage des documents v1 et v2.
+    """
+
+    def test_v2_document_is_compact(self):
+        """
+        Test que le document v2 utilise des champs courts et un code d'importance
+        """
+        at = datetime.datetime(2024, 3, 2, 8, 30)
+        doc = Event(at, "Réunion", "critique").to_document(schema.V2, with_day=True)
+
+        self.assertEqual(doc, {"v": 2, "t": at, "n": "Réunion", "i": 40, "d": 19784})
+
+    def test_roundtrip_both_versions(self):
+        """
+        Test que from_document relit les documents des deux versions
+        """
+        at = datetime.datetime(2024, 3, 2, 8, 30)
+        for version in schema.VERSIONS:
+            for importance in ("basse", "normale", "normal", "urgente"):
+                event = Event(at, "Réunion", importance, "65e2f0a0c3b1a2d4e5f60718")
+                decoded = Event.from_document(event.to_document(version))
+                self.assertEqual((decoded.id, decoded.at, decoded.name, decoded.importance),
+                                 (event.id, at, "Réunion", importance))
+
+    def test_unknown_importance_keeps_text(self):
+        """
+        Test qu'une importance hors table est stockée avec le code 0 et son texte
+        """
+        doc = schema.encode(datetime.datetime(2024, 1, 1), "A", "urgente", schema.V2)
+
+        self.assertEqual((doc["i"], doc["s"]), (schema.OTHER_IMPORTANCE, "urgente"))
+        self.assertEqual(schema.importance_filter("urgente", schema.V2), {"i": 0, "s": "urgente"})
+        self.assertEqual(schema.importance_filter("haute", schema.V2), {"i": 30})
+
+    def test_convert_keeps_extra_fields(self):
+        """
+        Test que la conversion conserve _id et les champs hors schéma, dans les deux sens
+        """
+        at = datetime.datetime(2024, 1, 1)
+        v1 = {"_id": 1, "at": at, "name": "A", "importance": "haute", "extra": True}
+
+        v2 = schema.convert(v1, schema.V2)
+        self.assertEqual(v2, {"_id": 1, "extra": True, "v": 2, "t": at, "n": "A", "i": 30})
+        self.assertEqual(schema.convert(v2, schema.V1), v1)
+
+    def test_update_fields_clears_stale_text(self):
+        """
+        Test que passer à une importance connue supprime le texte stocké en v2
+        """
+        update = schema.update_fields(schema.V2, name="B", importance="haute")
+
+        self.assertEqual(update, {"$set": {"n": "B", "i": 30}, "$unset": {"s": ""}})
+        self.assertEqual(schema.update_fields(schema.V1, importance="haute"), {"$set": {"importance": "haute"}})
+
+    def test_interval_fields_and_duration_class(self):
+        """
+        Test que la date de fin et la classe de durée sont encodées et converties
+        """
+        at = datetime.datetime(2024, 1, 1)
+        self.assertEqual(schema.duration_class(at, at), 0)
+        self.assertEqual(schema.duration_class(at, at + datetime.timedelta(minutes=1)), 0)
+        self.assertEqual(schema.duration_class(at, at + datetime.timedelta(minutes=4)), 1)
+        self.assertEqual(schema.duration_class(at, at + datetime.timedelta(minutes=5)), 2)
+
+        end_at = at + datetime.timedelta(hours=2)
+        v1 = Event(at, "Maintenance", "haute", "65e2f0a0c3b1a2d4e5f60718", end_at).to_document()
+        self.assertEqual((v1["end_at"], v1["duration_class"]), (end_at, 4))
+        v2 = schema.convert(v1, schema.V2)
+        self.assertEqual((v2["e"], v2["k"]), (end_at, 4))
+        self.assertNotIn("end_at", v2)
+        self.assertEqual(Event.from_document(v2).end_at, end_at)
+        self.assertIsNone(schema.decode_end(Event(at, "Point").to_document(schema.V2)))
+
+    def test_overlap_queries_bound_each_class(self):
+        """
+        Test que chaque classe de durée est cherchée sur une plage bornée par sa durée maximale
+        """
+        start = datetime.datetime(2024, 1, 1)
+        end = datetime.datetime(2024, 1, 2)
+
+        queries = schema.overlap_queries(schema.V1, start, end, [2, 0])
+
+        self.assertEqual(queries[0], {"at": {"$gte": start, "$lte": end}})
+        self.assertEqual(queries[1], {
+            "duration_class": 0,
+            "at": {"$lt": start, "$gte": start - datetime.timedelta(minutes=1)},
+            "end_at": {"$gte": start},
+        })
+        self.assertEqual(queries[2]["at"]["$gte"], start - datetime.timedelta(minutes=16))
+        self.assertNotIn("$gte", schema.overlap_queries(schema.V2, start, end, [40])[1]["t"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,113 @@
+"""
+Tests unitaires du journal des opérations lentes.
+"""
+
+import threading
+import unittest
+
+from datetime_event_store.slowlog import SlowQueryLog
+
+
+class TestSlowQueryLog(unittest.TestCase):
+    """
+    Tests de l'enregistrement des opérations lentes et de leur plan d'exécution.
+    """
+
+    def test_records_only_operations_over_threshold(self):
+        """
+        Test que seules les opérations plus longues que le seuil sont enregistrées.
+        """
+        log = SlowQueryLog(threshold_ms=50)
+
+        with log.measure("count", "events", {"at": 1}):
+            pass
+        log.record("find", "events", {"at": 2}, 75.0)
+
+        entries = log.entries()
+        self.assertEqual(len(entries), 1)
+        self.assertEqual((entries[0]["operation"], entries[0]["filter"], entries[0]["duration_ms"]),
+                         ("find", {"at": 2}, 75.0))
+
+    def test_ring_buffer_is_bounded(self):
+        """
+        Test que les entrées les plus anciennes sont écartées.
+        """
+        log = SlowQueryLog(threshold_ms=0, size=3)
+
+        for i in range(5):
+            log.record("find", "events", {"i": i}, 1.0)
+
+        self.assertEqual([entry["filter"]["i"] for entry in log.entries()], [2, 3, 4])
+
+    def test_plan_is_filled_from_explain(self):
+        """
+        Test que l'explain renseigne les documents examinés et le plan retenu.
+        """
+        done = threading.Event()
+        commands = []
+
+        def explain(command):
+            commands.append(command)
+            done.set()
+            return {
+                "queryPlanner": {"winningPlan": {"stage": "FETCH", "inputStage": {"stage": "IXSCAN"}}},
+                "executionStats": {"totalDocsExamined": 42, "totalKeysExamined": 43},
+            }
+
+        log = SlowQueryLog(threshold_ms=0, explain=explain)
+        log.record("find", "events", {"at": 1}, 10.0, {"find": "events", "filter": {"at": 1}})
+        self.assertTrue(done.wait(5))
+        log.close()
+
+        for _ in range(100):
+            entry = log.entries()[0]
+            if entry["plan"] is not None:
+                break
+            threading.Event().wait(0.01)
+        self.assertEqual(commands, [{"find": "events", "filter": {"at": 1}}])
+        self.assertEqual((entry["docs_examined"], entry["keys_examined"]), (42, 43))
+        self.assertEqual(entry["plan"]["inputStage"]["stage"], "IXSCAN")
+
+    def test_stream_excludes_time_between_items(self):
+        """
+        Test qu'une lecture en flux ne compte pas le temps passé par l'appelant entre deux documents.
+        """
+        log = SlowQueryLog(threshold_ms=20)
+
+        for _ in log.measure_iter("find", "events", {"at": 1}, range(3)):
+            threading.Event().wait(0.02)
+        self.assertEqual(log.entries(), [])
+
+        def slow_cursor():
+            threading.Event().wait(0.03)
+            yield 1
+
+        self.assertEqual(list(log.measure_iter("find", "events", {"at": 2}, slow_cursor())), [1])
+        self.assertEqual(log.entries()[0]["filter"], {"at": 2})
+        self.assertGreaterEqual(log.entries()[0]["duration_ms"], 20)
+
+    def test_explain_is_skipped_while_one_is_pending(self):
+        """
+        Test qu'un explain n'est pas lancé tant que le précédent n'est pas terminé.
+        """
+        release = threading.Event()
+        commands = []
+
+        def explain(command):
+            commands.append(command)
+            release.wait(5)
+            return {}
+
+        log = SlowQueryLog(threshold_ms=0, explain=explain)
+        for i in range(3):
+            log.record("find", "events", {"i": i}, 10.0, {"find": "events", "filter": {"i": i}})
+        release.set()
+        log._executor.shutdown(wait=True)
+
+        self.assertEqual(commands, [{"find": "events", "filter": {"i": 0}}])
+        self.assertEqual(log.explains_skipped, 2)
+        self.assertEqual(len(log.entries()), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
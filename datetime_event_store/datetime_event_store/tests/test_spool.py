@@ -0,0 +1,167 @@
+"""
+Tests unitaires du journal local des écritures et de son rejeu.
+"""
+
+import datetime
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from pymongo.errors import AutoReconnect
+
+from datetime_event_store import DatetimeEventStore
+from datetime_event_store.spool import SpoolReplayer, WriteSpool
+
+
+class TestWriteSpool(unittest.TestCase):
+    """
+    Tests de la persistance du journal et de sa reprise après un arrêt.
+    """
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "writes.spool")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_reopen_drops_incomplete_last_line(self):
+        """
+        Test qu'une ligne incomplète (écriture interrompue, jamais acquittée) est supprimée à l'ouverture.
+        """
+        spool = WriteSpool(self.path)
+        spool.append({"op": "create", "id": "a", "at": datetime.datetime(2024, 1, 1), "name": "A"})
+        spool.append({"op": "delete", "id": "b"})
+        spool.close()
+        with open(self.path, "ab") as f:
+            f.write(b'{"op": "del')
+
+        spool = WriteSpool(self.path)
+        operations, _ = spool.pending()
+
+        self.assertEqual(spool.depth, 2)
+        self.assertEqual(operations[0]["at"], datetime.datetime(2024, 1, 1))
+        self.assertEqual([operation["op"] for operation in operations], ["create", "delete"])
+        spool.close()
+
+    def test_batches_stop_before_repeated_id_and_resume_after_commit(self):
+        """
+        Test qu'un lot ne contient qu'une opération par ID et que la position confirmée survit à un redémarrage.
+        """
+        spool = WriteSpool(self.path)
+        spool.append({"op": "create", "id": "a", "at": datetime.datetime(2024, 1, 1), "name": "A"})
+        spool.append({"op": "create", "id": "b", "at": datetime.datetime(2024, 1, 2), "name": "B"})
+        spool.append({"op": "update", "id": "a", "name": "A2"})
+
+        operations, position = spool.pending()
+        self.assertEqual([operation["id"] for operation in operations], ["a", "b"])
+        spool.commit(len(operations), position)
+        spool.close()
+
+        spool = WriteSpool(self.path)
+        operations, position = spool.pending()
+        self.assertEqual((spool.depth, operations), (1, [{"op": "update", "id": "a", "name": "A2"}]))
+        spool.commit(len(operations), position)
+
+        self.assertEqual(spool.depth, 0)
+        self.assertEqual(os.path.getsize(self.path), 0)
+        spool.close()
+
+
+class TestSpooledStore(unittest.TestCase):
+    """
+    Tests des écritures acquittées par le journal pendant une panne de MongoDB.
+    """
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.store = DatetimeEventStore(db_name="datetime_events_spool",
+                                        spool_path=os.path.join(self.directory.name, "writes.spool"))
+        self.store.clear_all_events()
+
+    def tearDown(self):
+        self.store.spool.close()
+        self.directory.cleanup()
+
+    def test_writes_are_spooled_during_outage_and_replayed_in_order(self):
+        """
+        Test que les écritures sont acquittées pendant la panne puis rejouées dans l'ordre, avec les mêmes IDs.
+        """
+        kept = self.store.store_event(datetime.datetime(2024, 1, 1, 9), "Avant la panne")
+
+        with patch.object(self.store.events_collection, "insert_one", side_effect=AutoReconnect("failover")):
+            created = self.store.store_event(datetime.datetime(2024, 1, 2, 9), "Pendant la panne", "haute")
+        self.assertTrue(created.spooled)
+        self.assertFalse(kept.spooled)
+
+        # Le journal n'est pas vide: les écritures suivantes y vont aussi, pour garder l'ordre
+        renamed = self.store.update_event(created.id, name="Renommé")
+        self.assertTrue(self.store.delete_event(kept.id))
+        self.assertTrue(renamed.spooled)
+        self.assertEqual(self.store.spool.depth, 3)
+        self.assertEqual(self.store.count_events(), 1)
+
+        replayer = SpoolReplayer(self.store)
+        self.assertEqual(replayer.replay(), 3)
+
+        events = list(self.store.get_events(datetime.datetime(2024, 1, 1), datetime.datetime(2024, 1, 31)))
+        self.assertEqual([(e.id, e.name, e.importance) for e in events], [(created.id, "Renommé", "haute")])
+        self.assertEqual(replayer.stats()["depth"], 0)
+
+        # Rejouer une création déjà appliquée est sans effet
+        self.store.spool.append({"op": "create", "id": created.id, "at": created.at, "name": created.name})
+        replayer.replay()
+        self.assertEqual((self.store.count_events(), replayer.failed), (1, 1))
+
+    def test_idempotent_retries_during_outage_create_one_event(self):
+        """
+        Test que les réessais d'une création avec la même clé pendant la panne ne créent qu'un événement.
+        """
+        at = datetime.datetime(2024, 1, 2, 9)
+        with patch.object(self.store.events_collection, "insert_one", side_effect=AutoReconnect("failover")):
+            first = self.store.store_event(at, "Commande", idempotency_key="commande-1")
+        retried = self.store.store_event(at, "Commande", idempotency_key="commande-1")
+        self.assertTrue(retried.spooled)
+        self.assertEqual(retried.id, first.id)
+        # Les clés en attente sont retrouvées à la réouverture du journal
+        reopened = WriteSpool(self.store.spool.path)
+        self.assertEqual(reopened.pending_create("commande-1")["id"], first.id)
+        reopened.close()
+
+        SpoolReplayer(self.store).replay()
+        after = self.store.store_event(at, "Commande", idempotency_key="commande-1")
+
+        self.assertEqual(after.id, first.id)
+        self.assertFalse(after.spooled)
+        self.assertEqual(self.store.count_events(), 1)
+
+    def test_create_applied_without_reply_is_reconciled_on_replay(self):
+        """
+        Test qu'une création écrite mais sans réponse, donc ajoutée au journal, est comptée une fois au rejeu.
+        """
+        store = DatetimeEventStore(db_name="datetime_events_spool", rollups_enabled=True,
+                                   spool_path=os.path.join(self.directory.name, "rollups.spool"))
+        store.clear_all_events()
+        insert_one = store.events_collection.insert_one
+
+        def insert_then_fail(document):
+            insert_one(document)
+            raise AutoReconnect("réponse perdue")
+
+        with patch.object(store.events_collection, "insert_one", side_effect=insert_then_fail):
+            created = store.store_event(datetime.datetime(2024, 1, 2, 9), "Sans réponse", "haute")
+        self.assertTrue(created.spooled)
+
+        replayer = SpoolReplayer(store)
+        replayer.replay()
+        store.spool.close()
+
+        start, end = datetime.datetime(2024, 1, 1), datetime.datetime(2024, 1, 31)
+        self.assertEqual(replayer.failed, 0)
+        self.assertEqual(store.count_events(start, end), 1)
+        self.assertEqual(store.count_events(start, end, importance="haute"), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -12,6 +12,15 @@ setup(
     author="FETNI Mohamed",
     author_email="MFE.FETNI.MOHAMED@GMAIL.COM",
     python_requires=">=3.6",
+    extras_require={
+        "parquet": ["pyarrow"],
+        "analytics": ["numpy", "pandas"],
+    },
+    entry_points={
+        "console_scripts": [
+            "datetime-event-store=datetime_event_store.cli:main",
+        ],
+    },
     classifiers=[
         "Programming Language :: Python :: 3",
         "License :: OSI Approved :: MIT License",
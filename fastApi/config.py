@@ -1,12 +1,15 @@
 import os
 import json
-from typing import List
+from typing import Dict, List, Optional
 from pydantic_settings import BaseSettings
 from pydantic import field_validator 
 from dotenv import load_dotenv
 
 load_dotenv()
 
+# Valeur par défaut de API_SECRET_KEY: tant qu'elle n'est pas remplacée, l'administration est désactivée
+DEFAULT_API_SECRET_KEY = "your-secret-key-change-in-production"
+
 class Settings(BaseSettings):
     API_ENV: str = "development"
     DEBUG: bool = True
@@ -19,9 +22,44 @@ class Settings(BaseSettings):
     MONGODB_DB_NAME: str = "event_store"
     MONGODB_COLLECTION: str = "events"
     
+    EVENT_STORE_BACKEND: str = "mongodb"
+    EVENT_STORE_SCHEMA_VERSION: int = 1
+    EVENT_STORE_MIGRATE_SCHEMA: bool = False
+    REQUEST_COALESCING_ENABLED: bool = True
+    STATS_CACHE_TTL_SECONDS: float = 5.0
+    EVENT_STORE_SPOOL_PATH: Optional[str] = None
+    EVENT_STORE_SPOOL_TIMEOUT_MS: float = 1000
+    HOT_WINDOW_DAYS: float = 0
+    HOT_WINDOW_REFRESH_SECONDS: float = 60
+    EVENT_STORE_SERVER_SELECTION_TIMEOUT_MS: float = 5000
+
+    ADMISSION_CONTROL_ENABLED: bool = True
+    ADMISSION_WRITE_LIMIT: int = 12
+    ADMISSION_WRITE_QUEUE: int = 64
+    ADMISSION_LIST_LIMIT: int = 4
+    ADMISSION_LIST_QUEUE: int = 16
+    ADMISSION_READ_LIMIT: int = 20
+    ADMISSION_READ_QUEUE: int = 128
+    ADMISSION_QUEUE_TIMEOUT_MS: int = 2000
+    ADMISSION_RETRY_AFTER_SECONDS: int = 1
+
+    DEADLINE_ENABLED: bool = True
+    DEADLINE_LIST_MS: float = 10000
+    DEADLINE_READ_MS: float = 2000
+    DEADLINE_ROUTE_MS: Dict[str, float] = {"export": 0}
+
+    CIRCUIT_BREAKER_ENABLED: bool = True
+    CIRCUIT_BREAKER_FAILURES: int = 5
+    CIRCUIT_BREAKER_RESET_SECONDS: float = 10
+
+    PROFILING_INTERVAL_MS: float = 1.0
+    PROFILE_HISTORY_SIZE: int = 20
+    SLOW_QUERY_MS: Optional[float] = None
+    SLOW_QUERY_LOG_SIZE: int = 100
+
     CORS_ORIGINS: List[str] = ["http://localhost:3000"]
     
-    API_SECRET_KEY: str = "your-secret-key-change-in-production"
+    API_SECRET_KEY: str = DEFAULT_API_SECRET_KEY
     
     @field_validator("CORS_ORIGINS", mode="before")
     @classmethod
@@ -2,7 +2,12 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 import uvicorn
 
-from routers import events
+from middleware.admission import WRITE, AdmissionController, AdmissionMiddleware
+from middleware.circuit import CircuitBreaker, CircuitBreakerMiddleware
+from middleware.deadline import DeadlineBudgets, DeadlineMiddleware
+from middleware.profiling import ProfileStore, ProfilingMiddleware
+from routers import admin, events
+from services import events as events_service
 from config import settings  
 
 app = FastAPI(
@@ -12,6 +17,28 @@ app = FastAPI(
     debug=settings.DEBUG  
 )
 
+app.state.profiles = ProfileStore(settings.PROFILE_HISTORY_SIZE)
+app.add_middleware(
+    ProfilingMiddleware,
+    profiles=app.state.profiles,
+    interval=settings.PROFILING_INTERVAL_MS / 1000
+)
+
+# La somme des limites reste sous la taille du pool de threads (40) pour que
+# les routes non limitées restent servies quand MongoDB ralentit
+app.state.admission = AdmissionController.from_settings(settings)
+app.add_middleware(AdmissionMiddleware, controller=app.state.admission)
+
+# L'échéance couvre l'attente dans la file d'admission; le disjoncteur refuse avant toute attente.
+# Avec le journal local, les écritures restent acceptées pendant une panne de MongoDB.
+app.state.deadlines = DeadlineBudgets.from_settings(settings)
+app.add_middleware(DeadlineMiddleware, budgets=app.state.deadlines)
+app.state.circuit_breaker = CircuitBreaker.from_settings(settings)
+app.add_middleware(
+    CircuitBreakerMiddleware,
+    breaker=app.state.circuit_breaker,
+    exempt={WRITE} if settings.EVENT_STORE_SPOOL_PATH else ()
+)
 
 app.add_middleware(
     CORSMiddleware,
@@ -22,6 +49,21 @@ app.add_middleware(
 )
 
 app.include_router(events.router, prefix="/api")
+app.include_router(admin.router, prefix="/api")
+
+
+@app.on_event("startup")
+def start_background_tasks():
+    events_service.start_schema_migration()
+    events_service.start_spool_replay()
+    events_service.start_hot_window_refresh()
+
+
+@app.on_event("shutdown")
+def stop_background_tasks():
+    events_service.stop_hot_window_refresh()
+    events_service.stop_spool_replay()
+    events_service.stop_schema_migration()
 
 @app.get("/")
 def read_root():
@@ -0,0 +1,244 @@
+"""
+Contrôle d'admission des requêtes de l'API des événements.
+
+Chaque classe de routes (écritures, listes larges, lectures ponctuelles) a sa
+propre limite de requêtes simultanées. Au-delà, les requêtes attendent dans une
+file bornée pendant un délai maximal: une file pleine est refusée immédiatement
+(429) et une attente trop longue est abandonnée (503), avec un en-tête
+Retry-After dans les deux cas. Les routes hors de /api/events (racine,
+documentation, administration) ne sont jamais limitées.
+"""
+
+import asyncio
+import collections
+import math
+import threading
+from typing import Dict, Optional
+
+from starlette.responses import JSONResponse
+
+WRITE = "write"
+LIST = "list"
+READ = "read"
+
+ROUTE_CLASSES = (WRITE, LIST, READ)
+
+EVENTS_PREFIX = "/api/events"
+
+# Chemins (relatifs à /api/events) dont les requêtes GET parcourent une plage
+LIST_PATHS = {"", "export", "count", "distinct-names", "overlapping", "stats", "calendar"}
+
+# Chemins (relatifs à /api/events) dont les requêtes POST sont des lectures groupées
+READ_POST_PATHS = {"batch-get"}
+
+WRITE_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+
+
+def classify(method: str, path: str) -> Optional[str]:
+    """
+    Détermine la classe de routes d'une requête, ou None si elle n'est pas limitée.
+    """
+    if path != EVENTS_PREFIX and not path.startswith(EVENTS_PREFIX + "/"):
+        return None
+    relative = path[len(EVENTS_PREFIX):].strip("/")
+    if method == "POST" and relative in READ_POST_PATHS:
+        return LIST
+    if method in WRITE_METHODS:
+        return WRITE
+    if method != "GET":
+        return None
+    if relative in LIST_PATHS:
+        return LIST
+    return READ
+
+
+class AdmissionRejected(Exception):
+    """
+    Requête refusée par le contrôle d'admission.
+    """
+
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+def _wake(waiter: asyncio.Future) -> None:
+    if not waiter.done():
+        waiter.set_result(None)
+
+
+class AdmissionLimiter:
+    """
+    Limite de requêtes simultanées avec file d'attente bornée.
+
+    L'état est protégé par un verrou de thread et chaque requête en attente
+    est réveillée dans sa propre boucle d'événements: une place libérée est
+    transmise directement à la première requête de la file.
+    """
+
+    def __init__(self, limit: int, queue_size: int, queue_timeout: float):
+        """
+        Initialise la limite.
+
+        Args:
+            limit: Nombre maximal de requêtes traitées simultanément
+            queue_size: Nombre maximal de requêtes en attente
+            queue_timeout: Attente maximale dans la file, en secondes
+        """
+        self.limit = limit
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self.active = 0
+        self.admitted = 0
+        self.queued = 0
+        self.rejected_queue_full = 0
+        self.rejected_timeout = 0
+        self.max_queue_depth = 0
+        self._lock = threading.Lock()
+        self._waiters = collections.deque()
+
+    async def acquire(self) -> None:
+        """
+        Attend une place; lève AdmissionRejected si la file est pleine ou le délai dépassé.
+        """
+        with self._lock:
+            if self.active < self.limit and not self._waiters:
+                self.active += 1
+                self.admitted += 1
+                return
+            if len(self._waiters) >= self.queue_size:
+                self.rejected_queue_full += 1
+                raise AdmissionRejected(429, "Trop de requêtes en attente")
+
+            loop = asyncio.get_running_loop()
+            waiter = (loop, loop.create_future())
+            self._waiters.append(waiter)
+            self.queued += 1
+            self.max_queue_depth = max(self.max_queue_depth, len(self._waiters))
+
+        try:
+            await asyncio.wait_for(waiter[1], self.queue_timeout)
+        except BaseException as e:
+            with self._lock:
+                try:
+                    self._waiters.remove(waiter)
+                    removed = True
+                except ValueError:
+                    # La place a été transmise pendant l'abandon de l'attente
+                    removed = False
+                if removed and isinstance(e, asyncio.TimeoutError):
+                    self.rejected_timeout += 1
+            if removed:
+                if isinstance(e, asyncio.TimeoutError):
+                    raise AdmissionRejected(503, "Service surchargé, délai d'attente dépassé") from None
+                raise
+            if not isinstance(e, asyncio.TimeoutError):
+                self.release()
+                raise
+
+        with self._lock:
+            self.admitted += 1
+
+    def release(self) -> None:
+        """
+        Libère une place, transmise à la première requête en attente s'il y en a une.
+        """
+        with self._lock:
+            if not self._waiters:
+                self.active -= 1
+                return
+            loop, waiter = self._waiters.popleft()
+        loop.call_soon_threadsafe(_wake, waiter)
+
+    def metrics(self) -> Dict:
+        """
+        Retourne l'état et les compteurs de la limite.
+        """
+        with self._lock:
+            return {
+                "limit": self.limit,
+                "active": self.active,
+                "queue_depth": len(self._waiters),
+                "queue_size": self.queue_size,
+                "max_queue_depth": self.max_queue_depth,
+                "admitted": self.admitted,
+                "queued": self.queued,
+                "rejected_queue_full": self.rejected_queue_full,
+                "rejected_timeout": self.rejected_timeout,
+            }
+
+
+class AdmissionController:
+    """
+    Ensemble des limites par classe de routes.
+    """
+
+    def __init__(self, limiters: Dict[str, AdmissionLimiter], retry_after: int = 1, enabled: bool = True):
+        self.limiters = limiters
+        self.retry_after = retry_after
+        self.enabled = enabled
+
+    @classmethod
+    def from_settings(cls, settings) -> "AdmissionController":
+        """
+        Construit les limites à partir de la configuration de l'application.
+        """
+        timeout = settings.ADMISSION_QUEUE_TIMEOUT_MS / 1000
+        return cls(
+            {
+                WRITE: AdmissionLimiter(settings.ADMISSION_WRITE_LIMIT, settings.ADMISSION_WRITE_QUEUE, timeout),
+                LIST: AdmissionLimiter(settings.ADMISSION_LIST_LIMIT, settings.ADMISSION_LIST_QUEUE, timeout),
+                READ: AdmissionLimiter(settings.ADMISSION_READ_LIMIT, settings.ADMISSION_READ_QUEUE, timeout),
+            },
+            retry_after=settings.ADMISSION_RETRY_AFTER_SECONDS,
+            enabled=settings.ADMISSION_CONTROL_ENABLED,
+        )
+
+    def metrics(self) -> Dict:
+        """
+        Retourne les métriques de chaque classe de routes.
+        """
+        return {
+            "enabled": self.enabled,
+            "classes": {name: limiter.metrics() for name, limiter in self.limiters.items()},
+        }
+
+
+class AdmissionMiddleware:
+    """
+    Middleware ASGI appliquant le contrôle d'admission.
+
+    La place est conservée jusqu'à la fin de l'envoi de la réponse, y compris
+    pour les réponses en flux.
+    """
+
+    def __init__(self, app, controller: AdmissionController):
+        self.app = app
+        self.controller = controller
+
+    async def __call__(self, scope, receive, send):
+        route_class = None
+        if scope["type"] == "http" and self.controller.enabled:
+            route_class = classify(scope["method"], scope["path"])
+        if route_class is None:
+            await self.app(scope, receive, send)
+            return
+
+        limiter = self.controller.limiters[route_class]
+        try:
+            await limiter.acquire()
+        except AdmissionRejected as e:
+            retry_after = max(1, math.ceil(self.controller.retry_after))
+            response = JSONResponse(
+                {"detail": e.detail},
+                status_code=e.status_code,
+                headers={"Retry-After": str(retry_after)},
+            )
+            await response(scope, receive, send)
+            return
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            limiter.release()
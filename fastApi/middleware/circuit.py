@@ -0,0 +1,215 @@
+"""
+Disjoncteur des requêtes vers MongoDB.
+
+Quand MongoDB est injoignable, chaque requête attendrait la sélection d'un
+serveur avant d'échouer et occuperait un thread pendant ce délai. Après
+`failure_threshold` échecs de connexion consécutifs, le disjoncteur s'ouvre:
+les requêtes sur /api/events sont refusées immédiatement (503 avec
+Retry-After). Après `reset_timeout`, une seule requête d'essai est laissée
+passer; son succès referme le disjoncteur, son échec le rouvre.
+
+Seules les requêtes qui ont obtenu une réponse de MongoDB (module activity
+du store) referment le disjoncteur ou remettent à zéro le compte des échecs:
+une réponse servie par le cache, une lecture partagée ou la fenêtre en mémoire
+ne dit rien de l'état de MongoDB.
+
+Les écritures peuvent en être exemptées quand le journal local des écritures
+est activé, puisqu'elles y sont alors acquittées pendant la panne.
+"""
+
+import math
+import sys
+import threading
+import time
+from typing import Callable, Dict, Iterable
+
+from starlette.responses import JSONResponse
+
+from datetime_event_store.activity import Activity, track
+
+from middleware.admission import classify
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+def is_backend_failure(error: BaseException) -> bool:
+    """
+    Indique si une erreur est un échec de connexion à MongoDB (serveur injoignable, réseau, élection).
+    """
+    errors = sys.modules.get("pymongo.errors")
+    return errors is not None and isinstance(error, errors.ConnectionFailure)
+
+
+class CircuitBreaker:
+    """
+    État du disjoncteur et ses compteurs.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 10.0, enabled: bool = True,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Initialise un disjoncteur fermé.
+
+        Args:
+            failure_threshold: Nombre d'échecs consécutifs qui ouvrent le disjoncteur
+            reset_timeout: Durée d'ouverture avant une requête d'essai, en secondes
+            enabled: Active le disjoncteur
+            clock: Horloge monotone, en secondes
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.enabled = enabled
+        self._clock = clock
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.failures = 0
+        self.rejected = 0
+        self.opened = 0
+        self._opened_at = 0.0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls, settings) -> "CircuitBreaker":
+        """
+        Construit le disjoncteur à partir de la configuration de l'application.
+        """
+        return cls(
+            failure_threshold=settings.CIRCUIT_BREAKER_FAILURES,
+            reset_timeout=settings.CIRCUIT_BREAKER_RESET_SECONDS,
+            enabled=settings.CIRCUIT_BREAKER_ENABLED,
+        )
+
+    def allow(self) -> bool:
+        """
+        Indique si une requête peut être envoyée; l'ouverture expirée laisse passer une requête d'essai.
+        """
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and self._clock() - self._opened_at >= self.reset_timeout:
+                self.state = HALF_OPEN
+                return True
+            self.rejected += 1
+            return False
+
+    def record_success(self) -> None:
+        """
+        Enregistre une requête aboutie (MongoDB a répondu): le disjoncteur se referme.
+        """
+        with self._lock:
+            self.consecutive_failures = 0
+            if self.state == HALF_OPEN:
+                self.state = CLOSED
+
+    def record_failure(self) -> None:
+        """
+        Enregistre un échec de connexion; ouvre le disjoncteur au seuil ou après un essai manqué.
+        """
+        with self._lock:
+            self.failures += 1
+            self.consecutive_failures += 1
+            if self.state == HALF_OPEN or (self.state == CLOSED
+                                           and self.consecutive_failures >= self.failure_threshold):
+                self.state = OPEN
+                self._opened_at = self._clock()
+                self.opened += 1
+
+    def abandon(self) -> None:
+        """
+        Enregistre une requête d'essai annulée ou servie sans MongoDB: la suivante fera l'essai.
+        """
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self.state = OPEN
+
+    def retry_after(self) -> float:
+        """
+        Délai avant la prochaine requête d'essai, en secondes.
+        """
+        with self._lock:
+            return max(0.0, self.reset_timeout - (self._clock() - self._opened_at))
+
+    def metrics(self) -> Dict:
+        """
+        Retourne l'état et les compteurs du disjoncteur.
+        """
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "state": self.state,
+                "consecutive_failures": self.consecutive_failures,
+                "failures": self.failures,
+                "rejected": self.rejected,
+                "opened": self.opened,
+            }
+
+
+class CircuitBreakerMiddleware:
+    """
+    Middleware ASGI refusant les requêtes sur /api/events tant que le disjoncteur est ouvert.
+    """
+
+    def __init__(self, app, breaker: CircuitBreaker, exempt: Iterable[str] = ()):
+        """
+        Args:
+            app: Application ASGI
+            breaker: Disjoncteur partagé
+            exempt: Classes de routes jamais refusées (voir middleware.admission)
+        """
+        self.app = app
+        self.breaker = breaker
+        self.exempt = set(exempt)
+
+    def _settle(self, backend: Activity) -> None:
+        # Une requête servie sans réponse de MongoDB ne renseigne pas sur son état
+        if backend.contacted:
+            self.breaker.record_success()
+        else:
+            self.breaker.abandon()
+
+    def _unavailable(self) -> JSONResponse:
+        retry_after = max(1, math.ceil(self.breaker.retry_after()))
+        return JSONResponse(
+            {"detail": "Base de données indisponible"},
+            status_code=503,
+            headers={"Retry-After": str(retry_after)},
+        )
+
+    async def __call__(self, scope, receive, send):
+        route_class = None
+        if scope["type"] == "http" and self.breaker.enabled:
+            route_class = classify(scope["method"], scope["path"])
+        if route_class is None or route_class in self.exempt:
+            await self.app(scope, receive, send)
+            return
+
+        if not self.breaker.allow():
+            await self._unavailable()(scope, receive, send)
+            return
+
+        started = False
+
+        async def send_and_track(message):
+            nonlocal started
+            if message["type"] == "http.response.start":
+                started = True
+            await send(message)
+
+        try:
+            with track() as backend:
+                await self.app(scope, receive, send_and_track)
+        except Exception as e:
+            if not is_backend_failure(e):
+                self._settle(backend)
+                raise
+            self.breaker.record_failure()
+            if started:
+                raise
+            await self._unavailable()(scope, receive, send)
+            return
+        except BaseException:
+            self.breaker.abandon()
+            raise
+        self._settle(backend)
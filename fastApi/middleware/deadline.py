@@ -0,0 +1,132 @@
+"""
+Échéance des requêtes de l'API des événements.
+
+Chaque lecture sur /api/events reçoit une échéance: le budget de sa classe de
+routes (listes larges ou lectures ponctuelles), ou celui de son chemin s'il est
+configuré, éventuellement raccourci par l'en-tête X-Request-Timeout-Ms du
+client. Le store la transmet à MongoDB comme limite côté serveur (maxTimeMS)
+de ses lectures: une lecture qui la dépasse est interrompue par MongoDB et la
+requête reçoit une réponse 504. Un budget nul désactive l'échéance.
+
+Les écritures n'ont pas d'échéance: leur durée est bornée par la sélection du
+serveur (EVENT_STORE_SERVER_SELECTION_TIMEOUT_MS) et par le disjoncteur
+(module circuit).
+"""
+
+import sys
+from typing import Dict, Optional
+
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse
+
+from datetime_event_store.deadline import deadline
+
+from middleware.admission import EVENTS_PREFIX, LIST, READ, classify
+
+DEADLINE_HEADER = "x-request-timeout-ms"
+
+
+def is_execution_timeout(error: BaseException) -> bool:
+    """
+    Indique si une erreur est un dépassement du maxTimeMS d'une opération MongoDB.
+    """
+    # Sans pymongo chargé, l'erreur ne peut pas venir de MongoDB (et pymongo n'est pas importé pour le vérifier)
+    errors = sys.modules.get("pymongo.errors")
+    return errors is not None and isinstance(error, errors.ExecutionTimeout)
+
+
+class DeadlineBudgets:
+    """
+    Budgets de temps des requêtes, par classe de routes et par chemin.
+    """
+
+    def __init__(self, classes: Dict[str, float], routes: Optional[Dict[str, float]] = None, enabled: bool = True):
+        """
+        Initialise les budgets.
+
+        Args:
+            classes: Budget de chaque classe de routes, en millisecondes (0 ou absent: sans échéance)
+            routes: Budget de chemins particuliers (relatifs à /api/events), prioritaire sur celui de la classe
+            enabled: Active les échéances
+        """
+        self.classes = classes
+        self.routes = routes or {}
+        self.enabled = enabled
+        self.timeouts = 0
+
+    @classmethod
+    def from_settings(cls, settings) -> "DeadlineBudgets":
+        """
+        Construit les budgets à partir de la configuration de l'application.
+        """
+        return cls(
+            {LIST: settings.DEADLINE_LIST_MS, READ: settings.DEADLINE_READ_MS},
+            routes=settings.DEADLINE_ROUTE_MS,
+            enabled=settings.DEADLINE_ENABLED,
+        )
+
+    def seconds(self, method: str, path: str, requested_ms: Optional[str] = None) -> Optional[float]:
+        """
+        Échéance d'une requête en secondes, ou None si elle n'en a pas.
+
+        Args:
+            method: Méthode HTTP
+            path: Chemin de la requête
+            requested_ms: Valeur de l'en-tête X-Request-Timeout-Ms, qui ne peut que raccourcir le budget
+        """
+        route_class = classify(method, path)
+        if not self.enabled or route_class not in self.classes:
+            return None
+        relative = path[len(EVENTS_PREFIX):].strip("/")
+        budget = self.routes.get(relative, self.classes.get(route_class, 0))
+        if requested_ms is not None:
+            try:
+                requested = float(requested_ms)
+            except ValueError:
+                requested = 0
+            if requested > 0:
+                budget = min(budget, requested) if budget > 0 else requested
+        return budget / 1000 if budget > 0 else None
+
+    def metrics(self) -> Dict:
+        """
+        Retourne les budgets et le nombre de requêtes interrompues par leur échéance.
+        """
+        return {"enabled": self.enabled, "classes": self.classes, "routes": self.routes, "timeouts": self.timeouts}
+
+
+class DeadlineMiddleware:
+    """
+    Middleware ASGI fixant l'échéance de chaque requête et répondant 504 à son dépassement.
+    """
+
+    def __init__(self, app, budgets: DeadlineBudgets):
+        self.app = app
+        self.budgets = budgets
+
+    async def __call__(self, scope, receive, send):
+        seconds = None
+        if scope["type"] == "http":
+            seconds = self.budgets.seconds(scope["method"], scope["path"], Headers(scope=scope).get(DEADLINE_HEADER))
+        if seconds is None:
+            await self.app(scope, receive, send)
+            return
+
+        started = False
+
+        async def send_and_track(message):
+            nonlocal started
+            if message["type"] == "http.response.start":
+                started = True
+            await send(message)
+
+        try:
+            with deadline(seconds):
+                await self.app(scope, receive, send_and_track)
+        except Exception as e:
+            # Une réponse en flux déjà commencée ne peut plus être remplacée
+            if started or not is_execution_timeout(e):
+                raise
+            self.budgets.timeouts += 1
+            response = JSONResponse({"detail": "Délai de la requête dépassé"}, status_code=504)
+            await response(scope, receive, send)
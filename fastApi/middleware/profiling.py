@@ -0,0 +1,259 @@
+"""
+Profilage à la demande d'une requête par échantillonnage.
+
+Une requête portant l'en-tête `X-Profile` et une clé `X-API-Key` valide est
+profilée: un thread relève à intervalle régulier la pile des threads qui
+exécutent la route (boucle d'événements pour les routes async, pool de threads
+pour les autres) et agrège les piles au format « folded » (une ligne par pile,
+compatible avec les outils de flame graph).
+
+`X-Profile: return` remplace la réponse par le profil; toute autre valeur
+conserve la réponse, enregistre le profil et renvoie son identifiant dans
+l'en-tête `X-Profile-Id`.
+
+Le profilage est désactivé tant que API_SECRET_KEY garde sa valeur par défaut.
+"""
+
+import asyncio
+import collections
+import contextvars
+import functools
+import os
+import sys
+import threading
+import time
+import uuid
+from typing import Callable, Dict, List, Optional
+
+from fastapi.routing import APIRoute
+from starlette.responses import JSONResponse
+
+from security import is_valid_api_key
+
+PROFILE_HEADER = b"x-profile"
+API_KEY_HEADER = b"x-api-key"
+MAX_STACK_DEPTH = 128
+
+_active_profiler: contextvars.ContextVar = contextvars.ContextVar("active_profiler", default=None)
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def fold_stack(frame) -> str:
+    """
+    Représente la pile d'une frame sous forme « folded » (de la racine vers la frame).
+    """
+    labels = []
+    while frame is not None and len(labels) < MAX_STACK_DEPTH:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    return ";".join(reversed(labels))
+
+
+class SamplingProfiler:
+    """
+    Échantillonne la pile des threads rattachés à une requête.
+    """
+
+    def __init__(self, interval: float = 0.001):
+        self.interval = interval
+        self.samples = 0
+        self.stacks: Dict[str, int] = collections.Counter()
+        self._threads = collections.Counter()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._sampler: Optional[threading.Thread] = None
+        self._started = 0.0
+        self.duration_ms = 0.0
+
+    def attach(self) -> None:
+        """
+        Rattache le thread courant à la requête profilée.
+        """
+        with self._lock:
+            self._threads[threading.get_ident()] += 1
+
+    def detach(self) -> None:
+        """
+        Détache le thread courant de la requête profilée.
+        """
+        with self._lock:
+            ident = threading.get_ident()
+            self._threads[ident] -= 1
+            if self._threads[ident] <= 0:
+                del self._threads[ident]
+
+    def _sample(self) -> None:
+        sampler = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            with self._lock:
+                threads = [ident for ident in self._threads if ident != sampler]
+            if not threads:
+                continue
+            frames = sys._current_frames()
+            with self._lock:
+                for ident in threads:
+                    frame = frames.get(ident)
+                    if frame is not None:
+                        self.stacks[fold_stack(frame)] += 1
+                self.samples += 1
+
+    def start(self) -> None:
+        """
+        Démarre l'échantillonnage.
+        """
+        self._started = time.perf_counter()
+        self._sampler = threading.Thread(target=self._sample, name="request-profiler", daemon=True)
+        self._sampler.start()
+
+    def stop(self) -> None:
+        """
+        Arrête l'échantillonnage.
+        """
+        self._stop.set()
+        if self._sampler is not None:
+            self._sampler.join()
+        self.duration_ms = (time.perf_counter() - self._started) * 1000
+
+    def folded(self) -> str:
+        """
+        Retourne le profil au format « folded »: une ligne « pile nombre » par pile.
+        """
+        return "\n".join(f"{stack} {count}" for stack, count in self.stacks.most_common())
+
+
+def attach_profiler(endpoint: Callable) -> Callable:
+    """
+    Enveloppe une route pour rattacher au profil actif le thread qui l'exécute.
+    """
+    if asyncio.iscoroutinefunction(endpoint):
+        @functools.wraps(endpoint)
+        async def profiled_endpoint(*args, **kwargs):
+            profiler = _active_profiler.get()
+            if profiler is None:
+                return await endpoint(*args, **kwargs)
+            profiler.attach()
+            try:
+                return await endpoint(*args, **kwargs)
+            finally:
+                profiler.detach()
+    else:
+        @functools.wraps(endpoint)
+        def profiled_endpoint(*args, **kwargs):
+            profiler = _active_profiler.get()
+            if profiler is None:
+                return endpoint(*args, **kwargs)
+            profiler.attach()
+            try:
+                return endpoint(*args, **kwargs)
+            finally:
+                profiler.detach()
+    return profiled_endpoint
+
+
+class ProfiledRoute(APIRoute):
+    """
+    Route FastAPI dont l'exécution peut être profilée à la demande.
+    """
+
+    def __init__(self, path: str, endpoint: Callable, **kwargs):
+        super().__init__(path, attach_profiler(endpoint), **kwargs)
+
+
+class ProfileStore:
+    """
+    Profils enregistrés, dans un tampon circulaire borné.
+    """
+
+    def __init__(self, size: int = 20):
+        self._profiles = collections.OrderedDict()
+        self._size = size
+        self._lock = threading.Lock()
+
+    def add(self, profile: Dict) -> None:
+        with self._lock:
+            self._profiles[profile["id"]] = profile
+            while len(self._profiles) > self._size:
+                self._profiles.popitem(last=False)
+
+    def get(self, profile_id: str) -> Optional[Dict]:
+        with self._lock:
+            return self._profiles.get(profile_id)
+
+    def summaries(self) -> List[Dict]:
+        """
+        Retourne les profils enregistrés sans leurs piles, du plus récent au plus ancien.
+        """
+        with self._lock:
+            return [
+                {key: value for key, value in profile.items() if key != "stacks"}
+                for profile in reversed(self._profiles.values())
+            ]
+
+
+class ProfilingMiddleware:
+    """
+    Middleware ASGI profilant les requêtes qui le demandent.
+    """
+
+    def __init__(self, app, profiles: ProfileStore, interval: float = 0.001):
+        self.app = app
+        self.profiles = profiles
+        self.interval = interval
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope["headers"])
+        mode = headers.get(PROFILE_HEADER)
+        if mode is None:
+            await self.app(scope, receive, send)
+            return
+
+        api_key = headers.get(API_KEY_HEADER, b"").decode("latin-1")
+        if not is_valid_api_key(api_key):
+            await JSONResponse({"detail": "Clé d'API invalide pour le profilage"}, status_code=403)(scope, receive, send)
+            return
+
+        return_profile = mode.strip().lower() == b"return"
+        profile_id = uuid.uuid4().hex[:16]
+        status_code = None
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if return_profile:
+                    return
+                message["headers"] = list(message.get("headers", [])) + [(b"x-profile-id", profile_id.encode())]
+            elif return_profile:
+                return
+            await send(message)
+
+        profiler = SamplingProfiler(self.interval)
+        token = _active_profiler.set(profiler)
+        profiler.start()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            profiler.stop()
+            _active_profiler.reset(token)
+            profile = {
+                "id": profile_id,
+                "method": scope["method"],
+                "path": scope["path"],
+                "status_code": status_code,
+                "duration_ms": round(profiler.duration_ms, 3),
+                "samples": profiler.samples,
+                "interval_ms": self.interval * 1000,
+                "stacks": profiler.folded(),
+            }
+            self.profiles.add(profile)
+
+        if return_profile:
+            await JSONResponse(profile, headers={"X-Profile-Id": profile_id})(scope, receive, send)
@@ -1,6 +1,6 @@
 from pydantic import BaseModel, Field
-from datetime import datetime
-from typing import Optional, List
+from datetime import date, datetime
+from typing import Dict, Optional, List
 
 class EventBase(BaseModel):
     name: str = Field(..., description="Nom de l'événement")
@@ -8,15 +8,22 @@ class EventBase(BaseModel):
 
 class EventCreate(EventBase):
     at: datetime = Field(..., description="Date et heure de l'événement")
+    end_at: Optional[datetime] = Field(None, description="Date et heure de fin d'un événement avec une durée")
+    idempotency_key: Optional[str] = Field(
+        None, max_length=128,
+        description="Clé unique par création: un réessai avec la même clé retourne l'événement d'origine"
+    )
 
 class EventUpdate(EventBase):
     name: Optional[str] = None
     importance: Optional[str] = None
     at: Optional[datetime] = None
+    end_at: Optional[datetime] = None
 
 class EventInDB(EventBase):
     id: str
     at: datetime
+    end_at: Optional[datetime] = None
     created_at: datetime
     updated_at: Optional[datetime] = None
 
@@ -24,6 +31,94 @@ class EventResponse(EventInDB):
     class Config:
         orm_mode = True
 
+
+class SpooledWrite(BaseModel):
+    id: str
+    spooled: bool = Field(True, description="Écriture acquittée par le journal local, appliquée dès que MongoDB répond")
+
 class EventList(BaseModel):
     items: List[EventResponse]
-    total: int
\ No newline at end of file
+    total: int
+
+
+class EventCount(BaseModel):
+    count: int
+    approximate: bool = Field(False, description="Vrai si le compte est une estimation")
+    error_bound: int = Field(0, description="Demi-largeur de l'intervalle de confiance à 95% d'une estimation")
+
+
+class DayCount(BaseModel):
+    day: date
+    count: int
+
+
+class EventStats(BaseModel):
+    total: int = Field(..., description="Nombre d'événements de la plage")
+    first: Optional[datetime] = Field(None, description="Date du premier événement de la plage")
+    last: Optional[datetime] = Field(None, description="Date du dernier événement de la plage")
+    by_importance: Dict[str, int] = Field(default_factory=dict, description="Nombre d'événements par importance")
+    per_day: List[DayCount] = Field(default_factory=list, description="Nombre d'événements par jour (UTC)")
+
+
+class CalendarDay(BaseModel):
+    day: date
+    total: int = Field(..., description="Nombre d'événements du jour")
+    more: int = Field(..., description="Nombre d'événements du jour non retournés")
+    events: List[EventInDB] = Field(..., description="Événements les plus importants du jour")
+
+
+class Calendar(BaseModel):
+    year: int
+    month: int
+    tz: str
+    days: List[CalendarDay]
+
+
+class BatchGetRequest(BaseModel):
+    ids: List[str] = Field(..., description="Identifiants des événements à récupérer")
+
+
+class BatchGetResult(BaseModel):
+    items: List[Optional[EventInDB]] = Field(..., description="Événements dans l'ordre des IDs, null si introuvable")
+    found: int
+
+
+class BatchOperation(BaseModel):
+    op: str = Field(..., description="Type d'opération (create, update, delete)")
+    id: Optional[str] = Field(None, description="Identifiant de l'événement (update, delete)")
+    name: Optional[str] = None
+    importance: Optional[str] = None
+    at: Optional[datetime] = None
+    end_at: Optional[datetime] = None
+
+
+class BatchRequest(BaseModel):
+    operations: List[BatchOperation]
+
+
+class BatchOperationResult(BaseModel):
+    index: int
+    op: Optional[str] = None
+    status: str = Field(..., description="created, updated, unchanged, deleted, not_found ou error")
+    id: Optional[str] = None
+    event: Optional[EventInDB] = None
+    error: Optional[str] = None
+
+
+class BatchResponse(BaseModel):
+    results: List[BatchOperationResult]
+    counts: Dict[str, int] = Field(..., description="Nombre d'opérations par statut")
+
+
+class EventBulkUpdate(BaseModel):
+    start: datetime = Field(..., description="Date de début de la plage à modifier")
+    end: datetime = Field(..., description="Date de fin de la plage à modifier")
+    importance: Optional[str] = Field(None, description="Ne modifie que les événements de cette importance")
+    set_importance: Optional[str] = Field(None, description="Nouvelle importance des événements")
+    shift_by_seconds: Optional[float] = Field(None, description="Décalage appliqué aux dates, en secondes")
+    dry_run: bool = Field(False, description="Compte les événements concernés sans les modifier")
+
+
+class BulkResult(BaseModel):
+    count: int = Field(..., description="Nombre d'événements affectés (ou concernés en dry_run)")
+    dry_run: bool = False
@@ -0,0 +1,63 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import PlainTextResponse
+
+from security import require_api_key
+from services import events
+
+router = APIRouter(
+    prefix="/admin",
+    tags=["admin"],
+)
+
+
+@router.get("/metrics", dependencies=[Depends(require_api_key)])
+def get_metrics(request: Request):
+    """
+    Retourne les métriques de fonctionnement de l'API (contrôle d'admission, regroupement des lectures,
+    cache des statistiques, journal local des écritures, fenêtre des événements récents, échéances, disjoncteur).
+    """
+    return {
+        "admission": request.app.state.admission.metrics(),
+        "deadlines": request.app.state.deadlines.metrics(),
+        "circuit_breaker": request.app.state.circuit_breaker.metrics(),
+        "coalescing": events.coalescer.stats(),
+        "stats_cache": events.stats_cache.stats(),
+        "spool": events.get_spool_stats(),
+        "hot_window": events.get_hot_window_stats(),
+    }
+
+
+@router.get("/profiles", dependencies=[Depends(require_api_key)])
+def list_profiles(request: Request):
+    """
+    Liste les profils de requêtes enregistrés, du plus récent au plus ancien.
+    """
+    return {"items": request.app.state.profiles.summaries()}
+
+
+@router.get("/profiles/{profile_id}", dependencies=[Depends(require_api_key)])
+def get_profile(
+    request: Request,
+    profile_id: str,
+    format: str = Query("json", pattern="^(json|folded)$", description="Format du profil"),
+):
+    """
+    Récupère un profil enregistré; le format « folded » est lisible par les outils de flame graph.
+    """
+    profile = request.app.state.profiles.get(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Profil non trouvé")
+    if format == "folded":
+        return PlainTextResponse(profile["stacks"])
+    return profile
+
+
+@router.get("/slow-queries", dependencies=[Depends(require_api_key)])
+def get_slow_queries():
+    """
+    Retourne les opérations lentes du magasin d'événements avec leur plan d'exécution.
+    """
+    # Import local: bson n'est chargé qu'à la lecture du journal des requêtes lentes
+    from bson import ObjectId
+    return jsonable_encoder(events.get_slow_queries(), custom_encoder={ObjectId: str})
@@ -1,33 +1,258 @@
-from fastapi import APIRouter, HTTPException, Query, status
+from fastapi import APIRouter, HTTPException, Query, Request, Response, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, StreamingResponse
+from tempfile import SpooledTemporaryFile
 from typing import List, Optional
 from datetime import datetime
 
-from models.event import EventCreate, EventResponse, EventUpdate, EventList
+from datetime_event_store import formats
+
+from middleware.profiling import ProfiledRoute
+from config import settings
+from models.event import (
+    BatchGetRequest, BatchGetResult, BatchRequest, BatchResponse, Calendar, EventCreate, EventResponse, EventUpdate,
+    EventList, EventCount, EventBulkUpdate, BulkResult, EventStats, SpooledWrite
+)
 from services import events
 
+MAX_NEARBY_EVENTS = 1000
+MAX_CALENDAR_EVENTS_PER_DAY = 50
+MAX_BATCH_SIZE = 1000
+MAX_EVENTS_LIMIT = 10000
+
+
+def _accepted(write: SpooledWrite) -> JSONResponse:
+    # Écriture acquittée par le journal local mais pas encore appliquée
+    return JSONResponse(status_code=status.HTTP_202_ACCEPTED, content=jsonable_encoder(write))
+
+
 router = APIRouter(
     prefix="/events",
     tags=["events"],
     responses={404: {"description": "Not found"}},
+    route_class=ProfiledRoute,
 )
 
 @router.get("", response_model=EventList)
 def get_events(
     start: Optional[datetime] = Query(None, description="Date de début pour filtrer les événements"),
     end: Optional[datetime] = Query(None, description="Date de fin pour filtrer les événements"),
+    sort: str = Query("at", description="Ordre: at, -at, importance (la plus haute puis les plus récents) ou name"),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_EVENTS_LIMIT, description="Nombre maximal d'événements"),
 ):
     """
-    Récupère tous les événements, éventuellement filtrés par plage de dates.
+    Récupère tous les événements, éventuellement filtrés par plage de dates,
+    triés et limités côté serveur (par exemple les 10 plus critiques).
+    `total` compte tous les événements de la plage, même au-delà de la limite.
     """
-    event_list = events.get_events(start, end)
-    return {"items": event_list, "total": len(event_list)}
+    try:
+        event_list = events.get_events(start=start, end=end, sort=sort, limit=limit)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    total = len(event_list)
+    if limit is not None and total == limit:
+        # La limite a pu tronquer la liste: le total est compté à part
+        total = events.count_events_total(start=start, end=end)
+    return {"items": event_list, "total": total}
 
 @router.post("", response_model=EventResponse, status_code=status.HTTP_201_CREATED)
 def create_event(event_data: EventCreate):
     """
-    Crée un nouvel événement.
+    Crée un nouvel événement (202 si l'écriture est acquittée par le journal local).
+    """
+    try:
+        event = events.create_event(event_data)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    if isinstance(event, SpooledWrite):
+        return _accepted(event)
+    return event
+
+
+@router.delete("", response_model=BulkResult)
+def delete_events(
+    start: datetime = Query(..., description="Date de début de la plage à supprimer"),
+    end: datetime = Query(..., description="Date de fin de la plage à supprimer"),
+    importance: Optional[str] = Query(None, description="Ne supprime que cette importance"),
+    dry_run: bool = Query(False, description="Compte les événements concernés sans les supprimer"),
+):
+    """
+    Supprime en une seule opération tous les événements d'une plage de dates.
+    """
+    return events.delete_events(start=start, end=end, importance=importance, dry_run=dry_run)
+
+
+@router.patch("", response_model=BulkResult)
+def update_events(update: EventBulkUpdate):
+    """
+    Met à jour en une seule opération tous les événements d'une plage de dates.
+    """
+    if update.set_importance is None and not update.shift_by_seconds:
+        raise HTTPException(status_code=422, detail="Aucune modification demandée")
+    return events.update_events(update)
+
+
+@router.get("/export")
+def export_events(
+    start: Optional[datetime] = Query(None, description="Date de début de la plage à exporter"),
+    end: Optional[datetime] = Query(None, description="Date de fin de la plage à exporter"),
+    format: str = Query(formats.NDJSON, pattern="^(ndjson|csv|parquet)$", description="Format d'export"),
+):
+    """
+    Exporte en flux les événements d'une plage au format NDJSON, CSV ou Parquet.
+    """
+    return StreamingResponse(
+        events.export_events(start=start, end=end, fmt=format),
+        media_type=formats.MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="events.{format}"'}
+    )
+
+
+@router.post("/import", response_model=BulkResult)
+async def import_events(
+    request: Request,
+    format: str = Query(formats.NDJSON, pattern="^(ndjson|csv|parquet)$", description="Format du corps de la requête"),
+):
+    """
+    Importe des événements depuis le corps de la requête, par insertions groupées.
+    """
+    with SpooledTemporaryFile(max_size=8 * 1024 * 1024) as body:
+        async for chunk in request.stream():
+            # Au-delà de max_size, l'écriture se fait sur disque: hors de la boucle d'événements
+            await run_in_threadpool(body.write, chunk)
+        body.seek(0)
+        try:
+            count = await run_in_threadpool(events.import_events, body, format)
+        except (KeyError, TypeError, ValueError) as e:
+            raise HTTPException(status_code=400, detail=f"Fichier d'import invalide: {e}")
+    return {"count": count, "dry_run": False}
+
+
+@router.get("/count", response_model=EventCount)
+def count_events(
+    start: Optional[datetime] = Query(None, description="Date de début de la plage à compter"),
+    end: Optional[datetime] = Query(None, description="Date de fin de la plage à compter"),
+    importance: Optional[str] = Query(None, description="Ne compte que cette importance"),
+    approximate: bool = Query(False, description="Accepte une estimation peu coûteuse"),
+):
+    """
+    Compte les événements; en mode approximatif, la réponse indique la borne d'erreur.
+    """
+    return events.count_events(start=start, end=end, importance=importance, approximate=approximate)
+
+
+@router.get("/distinct-names", response_model=EventCount)
+def count_distinct_names(
+    start: Optional[datetime] = Query(None, description="Date de début de la plage"),
+    end: Optional[datetime] = Query(None, description="Date de fin de la plage"),
+    approximate: bool = Query(True, description="Estime la cardinalité avec une esquisse HyperLogLog"),
+):
+    """
+    Compte les noms d'événements distincts d'une plage.
+    """
+    return events.count_distinct_names(start=start, end=end, approximate=approximate)
+
+
+@router.get("/next", response_model=EventList)
+def get_next_events(
+    after: datetime = Query(..., description="Date à partir de laquelle chercher"),
+    n: int = Query(10, ge=1, le=MAX_NEARBY_EVENTS, description="Nombre maximal d'événements"),
+    importance: Optional[str] = Query(None, description="Ne retient que cette importance"),
+):
+    """
+    Récupère les n premiers événements postérieurs à une date.
+    """
+    event_list = events.get_next_events(after, n, importance=importance)
+    return {"items": event_list, "total": len(event_list)}
+
+
+@router.get("/previous", response_model=EventList)
+def get_previous_events(
+    before: datetime = Query(..., description="Date avant laquelle chercher"),
+    n: int = Query(10, ge=1, le=MAX_NEARBY_EVENTS, description="Nombre maximal d'événements"),
+    importance: Optional[str] = Query(None, description="Ne retient que cette importance"),
+):
+    """
+    Récupère les n derniers événements antérieurs à une date, du plus récent au plus ancien.
+    """
+    event_list = events.get_previous_events(before, n, importance=importance)
+    return {"items": event_list, "total": len(event_list)}
+
+
+@router.get("/nearest", response_model=EventList)
+def get_nearest_events(
+    at: datetime = Query(..., description="Date de référence"),
+    n: int = Query(10, ge=1, le=MAX_NEARBY_EVENTS, description="Nombre maximal d'événements"),
+    importance: Optional[str] = Query(None, description="Ne retient que cette importance"),
+):
+    """
+    Récupère les n événements les plus proches d'une date, par distance croissante.
+    """
+    event_list = events.get_nearest_events(at, n, importance=importance)
+    return {"items": event_list, "total": len(event_list)}
+
+
+@router.get("/stats", response_model=EventStats)
+def get_stats(
+    response: Response,
+    start: Optional[datetime] = Query(None, description="Date de début de la plage"),
+    end: Optional[datetime] = Query(None, description="Date de fin de la plage"),
+):
+    """
+    Retourne en un appel le total, les comptes par importance, les dates extrêmes et les comptes par jour.
+    """
+    response.headers["Cache-Control"] = f"private, max-age={int(settings.STATS_CACHE_TTL_SECONDS)}"
+    return events.get_stats(start=start, end=end)
+
+
+@router.get("/calendar", response_model=Calendar)
+def get_calendar(
+    year: int = Query(..., ge=1, le=9998, description="Année"),
+    month: int = Query(..., ge=1, le=12, description="Mois (1 à 12)"),
+    per_day: int = Query(3, ge=0, le=MAX_CALENDAR_EVENTS_PER_DAY, description="Nombre d'événements retournés par jour"),
+    tz: str = Query("UTC", description="Fuseau horaire IANA des jours (ex: Europe/Paris)"),
+):
+    """
+    Regroupe les événements d'un mois par jour: les plus importants de chaque jour et le nombre d'événements restants.
+    """
+    try:
+        return events.get_calendar(year, month, per_day=per_day, tz=tz)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+
+@router.get("/overlapping", response_model=EventList)
+def get_overlapping_events(
+    start: datetime = Query(..., description="Date de début de la fenêtre"),
+    end: datetime = Query(..., description="Date de fin de la fenêtre"),
+):
+    """
+    Récupère les événements (ponctuels ou avec une durée) qui chevauchent une fenêtre.
+    """
+    event_list = events.get_overlapping_events(start, end)
+    return {"items": event_list, "total": len(event_list)}
+
+
+@router.post("/batch-get", response_model=BatchGetResult)
+def get_events_by_ids(request: BatchGetRequest):
+    """
+    Récupère plusieurs événements par leur ID en une seule lecture.
+    """
+    if len(request.ids) > MAX_BATCH_SIZE:
+        raise HTTPException(status_code=422, detail=f"Au plus {MAX_BATCH_SIZE} IDs par requête")
+    items = events.get_events_by_ids(request.ids)
+    return {"items": items, "found": sum(item is not None for item in items)}
+
+
+@router.post("/batch", response_model=BatchResponse)
+def apply_batch(request: BatchRequest):
+    """
+    Applique un lot de créations, mises à jour et suppressions; chaque opération a son propre résultat.
     """
-    return events.create_event(event_data)
+    if len(request.operations) > MAX_BATCH_SIZE:
+        raise HTTPException(status_code=422, detail=f"Au plus {MAX_BATCH_SIZE} opérations par lot")
+    return events.apply_batch(request.operations)
 
 @router.get("/{event_id}", response_model=EventResponse)
 def get_event(event_id: str):
@@ -42,11 +267,16 @@ def get_event(event_id: str):
 @router.put("/{event_id}", response_model=EventResponse)
 def update_event(event_id: str, event_data: EventUpdate):
     """
-    Met à jour un événement existant.
+    Met à jour un événement existant (202 si l'écriture est acquittée par le journal local).
     """
-    updated_event = events.update_event(event_id, event_data)
+    try:
+        updated_event = events.update_event(event_id, event_data)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
     if updated_event is None:
         raise HTTPException(status_code=404, detail="Événement non trouvé")
+    if isinstance(updated_event, SpooledWrite):
+        return _accepted(updated_event)
     return updated_event
 
 @router.delete("/{event_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -0,0 +1,34 @@
+import hmac
+from typing import Optional
+
+from fastapi import Header, HTTPException
+
+from config import DEFAULT_API_SECRET_KEY, settings
+
+
+def admin_enabled() -> bool:
+    """
+    Indique si l'administration est ouverte: API_SECRET_KEY doit être définie et différer de sa valeur par défaut.
+    """
+    return bool(settings.API_SECRET_KEY) and settings.API_SECRET_KEY != DEFAULT_API_SECRET_KEY
+
+
+def is_valid_api_key(api_key: Optional[str]) -> bool:
+    """
+    Vérifie une clé d'API par comparaison à temps constant avec API_SECRET_KEY.
+
+    Aucune clé n'est valide tant que l'administration est désactivée.
+    """
+    if not api_key or not admin_enabled():
+        return False
+    return hmac.compare_digest(api_key.encode("utf-8"), settings.API_SECRET_KEY.encode("utf-8"))
+
+
+def require_api_key(x_api_key: Optional[str] = Header(None, description="Clé d'API d'administration")):
+    """
+    Dépendance refusant les requêtes sans clé d'API valide.
+    """
+    if not admin_enabled():
+        raise HTTPException(status_code=403, detail="Administration désactivée: API_SECRET_KEY n'est pas configurée")
+    if not is_valid_api_key(x_api_key):
+        raise HTTPException(status_code=403, detail="Clé d'API invalide")
@@ -0,0 +1,63 @@
+"""
+Cache en mémoire de durée de vie courte.
+
+Les entrées expirent après `ttl` secondes et le nombre d'entrées est borné (les
+plus anciennes sont écartées). Le cache ne connaît pas les écritures: c'est à
+l'appelant d'inclure dans la clé ce qui doit l'invalider.
+"""
+
+import collections
+import threading
+import time
+from typing import Any, Callable, Hashable
+
+
+class TTLCache:
+    """
+    Cache clé-valeur dont les entrées expirent après une durée fixe.
+    """
+
+    def __init__(self, ttl: float, max_size: int = 256):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_compute(self, key: Hashable, function: Callable[[], Any]) -> Any:
+        """
+        Retourne la valeur en cache pour `key`, ou la calcule et la met en cache.
+        """
+        if self.ttl <= 0:
+            return function()
+
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        value = function()
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        return value
+
+    def clear(self) -> None:
+        """
+        Vide le cache.
+        """
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        """
+        Retourne le nombre d'entrées, de lectures servies par le cache et de calculs.
+        """
+        with self._lock:
+            return {"size": len(self._entries), "hits": self.hits, "misses": self.misses}
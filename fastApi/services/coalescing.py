@@ -0,0 +1,108 @@
+"""
+Regroupement des lectures identiques simultanées (single-flight).
+
+Les appels de même clé arrivés pendant qu'une lecture est en cours attendent
+son résultat au lieu d'interroger à nouveau le magasin. Chaque écriture
+incrémente une génération à son début et à sa fin; une lecture ne rejoint
+qu'une lecture de même génération, de sorte qu'aucun résultat n'est partagé
+de part et d'autre d'une écriture.
+"""
+
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Hashable, Iterator
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Partage le résultat d'un appel en cours entre les appels identiques simultanés.
+    """
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._flights: Dict[Hashable, _Flight] = {}
+        self._generation = 0
+        self.calls = 0
+        self.executions = 0
+        self.coalesced = 0
+
+    def do(self, key: Hashable, function: Callable[[], Any]) -> Any:
+        """
+        Exécute `function`, ou attend le résultat d'un appel de même clé déjà en cours.
+
+        Une exception levée par l'appel est propagée à tous les appels qui l'attendaient.
+        """
+        if not self.enabled:
+            return function()
+
+        with self._lock:
+            self.calls += 1
+            flight_key = (key, self._generation)
+            flight = self._flights.get(flight_key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[flight_key] = _Flight()
+                self.executions += 1
+            else:
+                self.coalesced += 1
+
+        if leader:
+            try:
+                flight.result = function()
+            except BaseException as e:
+                flight.error = e
+            finally:
+                with self._lock:
+                    if self._flights.get(flight_key) is flight:
+                        del self._flights[flight_key]
+                flight.done.set()
+        else:
+            flight.done.wait()
+
+        if flight.error is not None:
+            raise flight.error
+        return flight.result
+
+    @property
+    def generation(self) -> int:
+        """
+        Numéro incrémenté au début et à la fin de chaque écriture.
+        """
+        with self._lock:
+            return self._generation
+
+    def _next_generation(self) -> None:
+        with self._lock:
+            self._generation += 1
+
+    @contextmanager
+    def write(self) -> Iterator[None]:
+        """
+        Délimite une écriture: les lectures commencées avant ne sont pas partagées avec celles qui suivent.
+        """
+        self._next_generation()
+        try:
+            yield
+        finally:
+            self._next_generation()
+
+    def stats(self) -> Dict:
+        """
+        Retourne le nombre d'appels, d'exécutions réelles et d'appels économisés.
+        """
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "calls": self.calls,
+                "executions": self.executions,
+                "coalesced": self.coalesced,
+                "in_flight": len(self._flights),
+            }
@@ -1,99 +1,467 @@
-from datetime_event_store import DatetimeEventStore
-from models.event import EventCreate, EventInDB, EventUpdate
-from typing import List, Optional
-from datetime import datetime
-
-event_store = DatetimeEventStore(
-    connection_string="mongodb://mongodb:27017/",
-    db_name="event_store_api",
-    collection_name="events"
+from datetime_event_store import formats
+from config import settings
+from services.cache import TTLCache
+from services.coalescing import SingleFlight
+from models.event import (
+    BatchOperation, BatchResponse, Calendar, EventCreate, EventInDB, EventUpdate, EventCount, EventBulkUpdate,
+    BulkResult, EventStats, SpooledWrite
 )
+from typing import BinaryIO, Callable, Iterator, List, Optional, Union
+import collections
+import threading
+from datetime import datetime, timedelta
 
-def get_events(start: Optional[datetime] = None, end: Optional[datetime] = None) -> List[EventInDB]:
+
+def _create_event_store():
+    """
+    Crée le magasin d'événements configuré (pymongo n'est importé que pour le backend MongoDB)
+    """
+    if settings.EVENT_STORE_BACKEND == "memory":
+        from datetime_event_store.memory import InMemoryEventStore
+        return InMemoryEventStore()
+
+    from datetime_event_store import DatetimeEventStore
+    return DatetimeEventStore(
+        connection_string="mongodb://mongodb:27017/",
+        db_name="event_store_api",
+        collection_name="events",
+        schema_version=settings.EVENT_STORE_SCHEMA_VERSION,
+        slow_query_ms=settings.SLOW_QUERY_MS,
+        slow_query_log_size=settings.SLOW_QUERY_LOG_SIZE,
+        spool_path=settings.EVENT_STORE_SPOOL_PATH or None,
+        spool_timeout_ms=settings.EVENT_STORE_SPOOL_TIMEOUT_MS,
+        hot_window=timedelta(days=settings.HOT_WINDOW_DAYS) if settings.HOT_WINDOW_DAYS > 0 else None,
+        server_selection_timeout_ms=settings.EVENT_STORE_SERVER_SELECTION_TIMEOUT_MS
+    )
+
+
+class LazyEventStore:
+    """
+    Crée le magasin d'événements au premier accès à l'un de ses attributs.
+
+    Importer le module ne charge ni pymongo ni ne se connecte à MongoDB
+    (création des index, lecture du schéma): c'est la première requête, ou
+    une tâche de démarrage qui en a besoin, qui ouvre le magasin.
+    """
+
+    def __init__(self, factory: Callable):
+        self._factory = factory
+        self._store = None
+        self._lock = threading.Lock()
+
+    @property
+    def initialized(self) -> bool:
+        return self._store is not None
+
+    def get(self):
+        """
+        Retourne le magasin, en le créant au premier appel
+        """
+        if self._store is None:
+            with self._lock:
+                if self._store is None:
+                    self._store = self._factory()
+        return self._store
+
+    def __getattr__(self, name: str):
+        return getattr(self.get(), name)
+
+
+event_store = LazyEventStore(_create_event_store)
+
+coalescer = SingleFlight(enabled=settings.REQUEST_COALESCING_ENABLED)
+stats_cache = TTLCache(ttl=settings.STATS_CACHE_TTL_SECONDS)
+
+schema_migrator = None
+spool_replayer = None
+hot_window_refresher = None
+
+
+def start_schema_migration() -> None:
+    """
+    Lance en arrière-plan la migration des documents vers la version de schéma configurée
+    """
+    global schema_migrator
+    if not settings.EVENT_STORE_MIGRATE_SCHEMA or settings.EVENT_STORE_BACKEND == "memory":
+        return
+    from datetime_event_store.migration import SchemaMigrator
+    schema_migrator = SchemaMigrator(event_store.get())
+    schema_migrator.start()
+
+
+def stop_schema_migration() -> None:
+    """
+    Interrompt la migration en cours; elle reprendra au prochain démarrage
+    """
+    if schema_migrator is not None:
+        schema_migrator.stop(timeout=10)
+
+
+def start_spool_replay() -> None:
+    """
+    Lance en arrière-plan le rejeu du journal local des écritures, s'il est activé
+    """
+    global spool_replayer
+    if not settings.EVENT_STORE_SPOOL_PATH or getattr(event_store, "spool", None) is None:
+        return
+    from datetime_event_store.spool import SpoolReplayer
+    spool_replayer = SpoolReplayer(event_store.get())
+    spool_replayer.start()
+
+
+def stop_spool_replay() -> None:
+    """
+    Interrompt le rejeu; les écritures restantes seront rejouées au prochain démarrage
+    """
+    if spool_replayer is not None:
+        spool_replayer.stop(timeout=10)
+
+
+def get_spool_stats() -> dict:
+    """
+    Retourne la profondeur du journal local des écritures et l'état de son rejeu
+    """
+    spool = getattr(event_store, "spool", None)
+    if spool is None:
+        return {"enabled": False, "depth": 0}
+    if spool_replayer is None:
+        return {"enabled": True, "depth": spool.depth}
+    return {"enabled": True, **spool_replayer.stats()}
+
+
+def start_hot_window_refresh() -> None:
+    """
+    Lance en arrière-plan la mise à jour de la fenêtre en mémoire avec les écritures des autres processus
+    """
+    global hot_window_refresher
+    if settings.HOT_WINDOW_DAYS <= 0 or getattr(event_store, "hot_window", None) is None:
+        return
+    from datetime_event_store.hot_window import HotWindowRefresher
+    hot_window_refresher = HotWindowRefresher(event_store.get(), interval=settings.HOT_WINDOW_REFRESH_SECONDS)
+    hot_window_refresher.start()
+
+
+def stop_hot_window_refresh() -> None:
     """
-    Récupère les événements dans une plage de dates donnée
+    Interrompt la mise à jour de la fenêtre en mémoire
+    """
+    if hot_window_refresher is not None:
+        hot_window_refresher.stop(timeout=10)
+
+
+def get_hot_window_stats() -> dict:
+    """
+    Retourne le taux de lectures servies par la fenêtre en mémoire et son empreinte
+    """
+    hot_window = getattr(event_store, "hot_window", None)
+    if hot_window is None:
+        return {"enabled": False}
+    stats = {"enabled": True, **hot_window.stats()}
+    if hot_window_refresher is not None:
+        stats["refresh_mode"] = hot_window_refresher.mode
+    return stats
+
+
+def _to_event(event, created_at: Optional[datetime] = None, updated_at: Optional[datetime] = None) -> EventInDB:
+    return EventInDB(
+        id=event.id,
+        name=event.name,
+        importance=event.importance,
+        at=event.at,
+        end_at=event.end_at,
+        created_at=created_at or event.at,
+        updated_at=updated_at
+    )
+
+
+def _to_event_list(events) -> List[EventInDB]:
+    return [_to_event(event) for event in events]
+
+
+def get_events(start: Optional[datetime] = None, end: Optional[datetime] = None,
+               sort: str = "at", limit: Optional[int] = None) -> List[EventInDB]:
+    """
+    Récupère les événements dans une plage de dates donnée, triés et limités côté serveur
     """
     if start is None:
         start = datetime(2000, 1, 1)
     if end is None:
         end = datetime(2100, 12, 31)
     
-    events_data = []
-    for event in event_store.get_events(start, end):
-        events_data.append(
-            EventInDB(
-                id=event.id,
-                name=event.name,
-                importance=event.importance,
-                at=event.at,
-                created_at=event.at,  
-                updated_at=None
-            )
-        )
+    def read():
+        return _to_event_list(event_store.get_events(start, end, sort=sort, limit=limit))
     
-    return events_data
+    return list(coalescer.do(("get_events", start, end, sort, limit), read))
+
+
+def count_events_total(start: Optional[datetime] = None, end: Optional[datetime] = None) -> int:
+    """
+    Compte exactement les événements que get_events listerait sans limite
+    """
+    if start is None:
+        start = datetime(2000, 1, 1)
+    if end is None:
+        end = datetime(2100, 12, 31)
+
+    return coalescer.do(("count_events_total", start, end), lambda: event_store.count_events(start, end))
+
+
+def get_next_events(after: datetime, n: int, importance: Optional[str] = None) -> List[EventInDB]:
+    """
+    Récupère les n premiers événements postérieurs à une date
+    """
+    return list(coalescer.do(
+        ("get_next_events", after, n, importance),
+        lambda: _to_event_list(event_store.get_next_events(after, n, importance=importance))
+    ))
+
+
+def get_previous_events(before: datetime, n: int, importance: Optional[str] = None) -> List[EventInDB]:
+    """
+    Récupère les n derniers événements antérieurs à une date, du plus récent au plus ancien
+    """
+    return list(coalescer.do(
+        ("get_previous_events", before, n, importance),
+        lambda: _to_event_list(event_store.get_previous_events(before, n, importance=importance))
+    ))
+
+
+def get_nearest_events(at: datetime, n: int, importance: Optional[str] = None) -> List[EventInDB]:
+    """
+    Récupère les n événements les plus proches d'une date, par distance croissante
+    """
+    return list(coalescer.do(
+        ("get_nearest_events", at, n, importance),
+        lambda: _to_event_list(event_store.get_nearest_events(at, n, importance=importance))
+    ))
+
+
+def get_overlapping_events(start: datetime, end: datetime) -> List[EventInDB]:
+    """
+    Récupère les événements qui chevauchent une fenêtre, triés par date de début
+    """
+    return list(coalescer.do(
+        ("get_overlapping_events", start, end),
+        lambda: _to_event_list(event_store.overlapping(start, end))
+    ))
+
 
-def create_event(event_data: EventCreate) -> EventInDB:
+def create_event(event_data: EventCreate) -> Union[EventInDB, SpooledWrite]:
     """
     Crée un nouvel événement
     """
-    event = event_store.store_event(
-        at=event_data.at,
-        name=event_data.name,
-        importance=event_data.importance
-    )
+    with coalescer.write():
+        event = event_store.store_event(
+            at=event_data.at,
+            name=event_data.name,
+            importance=event_data.importance,
+            end_at=event_data.end_at,
+            idempotency_key=event_data.idempotency_key
+        )
+
+    if getattr(event, "spooled", False):
+        return SpooledWrite(id=event.id)
     
-    return EventInDB(
-        id=event.id,
-        name=event.name,
-        importance=event.importance,
-        at=event.at,
-        created_at=datetime.now(),
-        updated_at=None
-    )
+    return _to_event(event, created_at=datetime.now())
 
 def delete_event(event_id: str) -> bool:
     """
     Supprime un événement par son ID
     """
-    return event_store.delete_event(event_id)
+    with coalescer.write():
+        return event_store.delete_event(event_id)
 
 def get_event_by_id(event_id: str) -> Optional[EventInDB]:
     """
     Récupère un événement par son ID
     """
-    event = event_store.get_event_by_id(event_id)
+    event = coalescer.do(("get_event_by_id", event_id), lambda: event_store.get_event_by_id(event_id))
     if not event:
         return None
     
-    return EventInDB(
-        id=event.id,
-        name=event.name,
-        importance=event.importance,
-        at=event.at,
-        created_at=event.at,  
-        updated_at=None
-    )
+    return _to_event(event)
+
+
+def get_events_by_ids(event_ids: List[str]) -> List[Optional[EventInDB]]:
+    """
+    Récupère plusieurs événements par leur ID en une seule lecture, dans l'ordre des IDs
+    """
+    def read():
+        return [
+            _to_event(event) if event is not None else None
+            for event in event_store.get_events_by_ids(event_ids)
+        ]
+
+    return list(coalescer.do(("get_events_by_ids", tuple(event_ids)), read))
 
-def update_event(event_id: str, event_data: EventUpdate) -> Optional[EventInDB]:
+
+def apply_batch(operations: List[BatchOperation]) -> BatchResponse:
+    """
+    Applique un lot de créations, mises à jour et suppressions en une écriture groupée
+    """
+    with coalescer.write():
+        results = event_store.apply_batch([
+            {key: value for key, value in vars(operation).items() if value is not None}
+            for operation in operations
+        ])
+
+    for result in results:
+        if result["event"] is not None:
+            result["event"] = _to_event(result["event"])
+    counts = collections.Counter(result["status"] for result in results)
+    return BatchResponse(results=results, counts=dict(counts))
+
+
+def update_event(event_id: str, event_data: EventUpdate) -> Optional[Union[EventInDB, SpooledWrite]]:
     """
     Met à jour un événement existant
     """
-    updated_event = event_store.update_event(
-        event_id=event_id,
-        name=event_data.name,
-        at=event_data.at,
-        importance=event_data.importance
-    )
+    with coalescer.write():
+        updated_event = event_store.update_event(
+            event_id=event_id,
+            name=event_data.name,
+            at=event_data.at,
+            importance=event_data.importance,
+            end_at=event_data.end_at
+        )
     
     if not updated_event:
         return None
+    if getattr(updated_event, "spooled", False):
+        return SpooledWrite(id=updated_event.id)
     
-    return EventInDB(
-        id=updated_event.id,
-        name=updated_event.name,
-        importance=updated_event.importance,
-        at=updated_event.at,
-        created_at=updated_event.at,  
-        updated_at=datetime.now()
-    )
\ No newline at end of file
+    return _to_event(updated_event, updated_at=datetime.now())
+
+
+def _to_event_count(count: int) -> EventCount:
+    approximate = not getattr(count, "exact", True)
+    return EventCount(
+        count=int(count),
+        approximate=approximate,
+        error_bound=getattr(count, "error_bound", 0)
+    )
+
+
+def count_events(start: Optional[datetime] = None, end: Optional[datetime] = None,
+                 importance: Optional[str] = None, approximate: bool = False) -> EventCount:
+    """
+    Compte les événements, éventuellement de façon approximative
+    """
+    count = coalescer.do(
+        ("count_events", start, end, importance, approximate),
+        lambda: event_store.count_events(start, end, importance=importance, approximate=approximate)
+    )
+    return _to_event_count(count)
+
+
+def count_distinct_names(start: Optional[datetime] = None, end: Optional[datetime] = None,
+                         approximate: bool = True) -> EventCount:
+    """
+    Compte les noms d'événements distincts d'une plage
+    """
+    if start is None:
+        start = datetime(2000, 1, 1)
+    if end is None:
+        end = datetime(2100, 12, 31)
+
+    count = coalescer.do(
+        ("count_distinct_names", start, end, approximate),
+        lambda: event_store.count_distinct_names(start, end, approximate=approximate)
+    )
+    return _to_event_count(count)
+
+
+def get_stats(start: Optional[datetime] = None, end: Optional[datetime] = None) -> EventStats:
+    """
+    Calcule les statistiques d'une plage, mises en cache jusqu'à la prochaine écriture ou expiration
+    """
+    def compute():
+        stats = coalescer.do(("stats", start, end), lambda: event_store.stats(start, end))
+        return EventStats(
+            total=stats["total"],
+            first=stats["first"],
+            last=stats["last"],
+            by_importance=stats["by_importance"],
+            per_day=[{"day": day, "count": count} for day, count in stats["per_day"].items()]
+        )
+
+    return stats_cache.get_or_compute((start, end, coalescer.generation), compute)
+
+
+def get_calendar(year: int, month: int, per_day: int = 3, tz: str = "UTC") -> Calendar:
+    """
+    Regroupe les événements d'un mois par jour, en ne gardant que les plus importants de chaque jour
+    """
+    def read():
+        return [
+            {"day": day["day"], "total": day["total"], "more": day["more"], "events": _to_event_list(day["events"])}
+            for day in event_store.get_calendar(year, month, per_day=per_day, tz=tz)
+        ]
+
+    days = coalescer.do(("get_calendar", year, month, per_day, tz), read)
+    return Calendar(year=year, month=month, tz=tz, days=days)
+
+
+def delete_events(start: datetime, end: datetime, importance: Optional[str] = None,
+                  dry_run: bool = False) -> BulkResult:
+    """
+    Supprime en une seule opération les événements d'une plage de dates
+    """
+    with coalescer.write():
+        count = event_store.delete_events(start, end, importance=importance, dry_run=dry_run)
+    return BulkResult(count=count, dry_run=dry_run)
+
+
+def update_events(update: EventBulkUpdate) -> BulkResult:
+    """
+    Met à jour en une seule opération les événements d'une plage de dates
+    """
+    shift_by = None
+    if update.shift_by_seconds:
+        shift_by = timedelta(seconds=update.shift_by_seconds)
+
+    with coalescer.write():
+        count = event_store.update_events(
+            update.start,
+            update.end,
+            importance=update.importance,
+            set_importance=update.set_importance,
+            shift_by=shift_by,
+            dry_run=update.dry_run
+        )
+    return BulkResult(count=count, dry_run=update.dry_run)
+
+
+def export_events(start: Optional[datetime] = None, end: Optional[datetime] = None,
+                  fmt: str = formats.NDJSON) -> Iterator[bytes]:
+    """
+    Exporte en flux les événements d'une plage, par morceaux d'octets
+    """
+    if start is None:
+        start = datetime(2000, 1, 1)
+    if end is None:
+        end = datetime(2100, 12, 31)
+
+    return formats.iter_export(event_store.get_events(start, end), fmt)
+
+
+def import_events(fileobj: BinaryIO, fmt: str = formats.NDJSON) -> int:
+    """
+    Importe en flux des événements par insertions groupées
+    """
+    with coalescer.write():
+        return event_store.import_(fileobj, fmt)
+
+
+def get_slow_queries() -> dict:
+    """
+    Retourne le journal des opérations lentes du magasin, s'il est activé
+    """
+    slow_queries = getattr(event_store, "slow_queries", None)
+    if slow_queries is None:
+        return {"enabled": False, "threshold_ms": None, "entries": []}
+    return {
+        "enabled": True,
+        "threshold_ms": slow_queries.threshold_ms,
+        "entries": slow_queries.entries()
+    }
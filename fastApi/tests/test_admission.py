@@ -0,0 +1,115 @@
+import threading
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from config import settings
+from main import app
+from middleware.admission import (
+    AdmissionController, AdmissionLimiter, AdmissionMiddleware, LIST, READ, WRITE, classify
+)
+
+
+def make_client(limit, queue_size, queue_timeout):
+    """
+    Crée une application dont la route d'écriture bloque jusqu'à la levée d'un événement.
+    """
+    release = threading.Event()
+    started = threading.Event()
+    limited = FastAPI()
+    controller = AdmissionController({WRITE: AdmissionLimiter(limit, queue_size, queue_timeout)}, retry_after=2)
+    limited.add_middleware(AdmissionMiddleware, controller=controller)
+
+    @limited.post("/api/events")
+    def slow_write():
+        started.set()
+        release.wait(5)
+        return {"ok": True}
+
+    return TestClient(limited), controller, started, release
+
+
+def start_blocking_request(client, started):
+    responses = []
+    thread = threading.Thread(target=lambda: responses.append(client.post("/api/events")))
+    thread.start()
+    assert started.wait(5)
+    return thread, responses
+
+
+def test_classify_routes():
+    assert classify("POST", "/api/events") == WRITE
+    assert classify("DELETE", "/api/events/abc") == WRITE
+    assert classify("GET", "/api/events") == LIST
+    assert classify("GET", "/api/events/export") == LIST
+    assert classify("GET", "/api/events/abc") == READ
+    assert classify("POST", "/api/events/batch-get") == LIST
+    assert classify("POST", "/api/events/batch") == WRITE
+    assert classify("GET", "/") is None
+    assert classify("GET", "/api/admin/metrics") is None
+    assert classify("GET", "/api/eventsx") is None
+
+
+def test_full_queue_is_rejected_with_429():
+    client, controller, started, release = make_client(limit=1, queue_size=0, queue_timeout=1)
+    thread, responses = start_blocking_request(client, started)
+
+    response = client.post("/api/events")
+    release.set()
+    thread.join(5)
+
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "2"
+    assert responses[0].status_code == 200
+    metrics = controller.metrics()["classes"][WRITE]
+    assert metrics["rejected_queue_full"] == 1
+    assert metrics["active"] == 0
+
+
+def test_queue_timeout_is_rejected_with_503():
+    client, controller, started, release = make_client(limit=1, queue_size=4, queue_timeout=0.05)
+    thread, _ = start_blocking_request(client, started)
+
+    response = client.post("/api/events")
+    release.set()
+    thread.join(5)
+
+    assert response.status_code == 503
+    assert "Retry-After" in response.headers
+    metrics = controller.metrics()["classes"][WRITE]
+    assert metrics["rejected_timeout"] == 1
+    assert metrics["queue_depth"] == 0
+
+
+def test_queued_request_gets_released_slot():
+    client, controller, started, release = make_client(limit=1, queue_size=4, queue_timeout=5)
+    thread, _ = start_blocking_request(client, started)
+
+    waiting = []
+    waiter = threading.Thread(target=lambda: waiting.append(client.post("/api/events")))
+    waiter.start()
+    for _ in range(500):
+        if controller.metrics()["classes"][WRITE]["queue_depth"]:
+            break
+        threading.Event().wait(0.01)
+    release.set()
+    thread.join(5)
+    waiter.join(5)
+
+    assert waiting[0].status_code == 200
+    metrics = controller.metrics()["classes"][WRITE]
+    assert metrics["admitted"] == 2
+    assert metrics["queued"] == 1
+    assert metrics["active"] == 0
+
+
+def test_unlimited_routes_and_metrics_endpoint(monkeypatch):
+    monkeypatch.setattr(settings, "API_SECRET_KEY", "test-admin-key")
+    client = TestClient(app)
+
+    assert client.get("/").status_code == 200
+    assert client.get("/api/admin/metrics").status_code == 403
+    response = client.get("/api/admin/metrics", headers={"X-API-Key": "test-admin-key"})
+
+    assert response.status_code == 200
+    assert set(response.json()["admission"]["classes"]) == {WRITE, LIST, READ}
@@ -3,6 +3,7 @@ from fastapi.testclient import TestClient
 from datetime import datetime
 from unittest.mock import patch, MagicMock
 from main import app
+from models.event import SpooledWrite
 
 client = TestClient(app)
 
@@ -62,6 +63,37 @@ def test_get_events_with_date_filter(mock_event_service):
     assert isinstance(kwargs["start"], datetime)
     assert isinstance(kwargs["end"], datetime)
 
+
+def test_get_events_sorted_top_k(mock_event_service):
+    mock_event_service.get_events.return_value = []
+
+    response = client.get("/api/events?sort=importance&limit=10")
+
+    assert response.status_code == 200
+    kwargs = mock_event_service.get_events.call_args.kwargs
+    assert (kwargs["sort"], kwargs["limit"]) == ("importance", 10)
+    mock_event_service.count_events_total.assert_not_called()
+
+
+def test_get_events_total_counts_beyond_limit(mock_event_service):
+    now = datetime.now()
+    mock_event_service.get_events.return_value = [
+        {"id": str(i), "name": f"Event {i}", "importance": "haute", "at": now, "created_at": now, "updated_at": None}
+        for i in range(2)
+    ]
+    mock_event_service.count_events_total.return_value = 5
+
+    data = client.get("/api/events?sort=importance&limit=2").json()
+
+    assert (len(data["items"]), data["total"]) == (2, 5)
+
+
+def test_get_events_invalid_sort(mock_event_service):
+    mock_event_service.get_events.side_effect = ValueError("Tri inconnu: 'date'")
+
+    assert client.get("/api/events?sort=date").status_code == 422
+    assert client.get("/api/events?limit=0").status_code == 422
+
 def test_create_event(mock_event_service):
     now = datetime.now()
     new_event = {
@@ -86,6 +118,29 @@ def test_create_event(mock_event_service):
     assert data["name"] == "New Event"
     assert data["importance"] == "critique"
 
+
+def test_create_event_idempotency_key_reused(mock_event_service):
+    mock_event_service.create_event.side_effect = ValueError("La clé d'idempotence 'k' a déjà été utilisée")
+
+    response = client.post("/api/events", json={
+        "name": "Other", "importance": "normal", "at": datetime.now().isoformat(), "idempotency_key": "k"
+    })
+
+    assert response.status_code == 422
+    assert mock_event_service.create_event.call_args.args[0].idempotency_key == "k"
+
+
+def test_spooled_writes_are_accepted(mock_event_service):
+    mock_event_service.create_event.return_value = SpooledWrite(id="65e2f0a0c3b1a2d4e5f60718")
+    mock_event_service.update_event.return_value = SpooledWrite(id="65e2f0a0c3b1a2d4e5f60718")
+
+    created = client.post("/api/events", json={"name": "Panne", "importance": "haute", "at": "2024-01-01T00:00:00"})
+    updated = client.put("/api/events/65e2f0a0c3b1a2d4e5f60718", json={"name": "Panne résolue"})
+
+    assert created.status_code == 202
+    assert created.json() == {"id": "65e2f0a0c3b1a2d4e5f60718", "spooled": True}
+    assert updated.status_code == 202
+
 def test_get_event_by_id(mock_event_service):
     event_id = "1"
     now = datetime.now()
@@ -168,4 +223,279 @@ def test_delete_event_not_found(mock_event_service):
     response = client.delete(f"/api/events/{event_id}")
     
     assert response.status_code == 404
-    assert "detail" in response.json()
\ No newline at end of file
+    assert "detail" in response.json()
+
+
+def test_count_events_approximate(mock_event_service):
+    mock_event_service.count_events.return_value = {
+        "count": 1200,
+        "approximate": True,
+        "error_bound": 40
+    }
+
+    response = client.get("/api/events/count?approximate=true")
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["count"] == 1200
+    assert data["approximate"] is True
+    assert data["error_bound"] == 40
+
+    args, kwargs = mock_event_service.count_events.call_args
+    assert kwargs["approximate"] is True
+
+
+def test_count_distinct_names(mock_event_service):
+    mock_event_service.count_distinct_names.return_value = {
+        "count": 12,
+        "approximate": True,
+        "error_bound": 1
+    }
+
+    response = client.get("/api/events/distinct-names")
+
+    assert response.status_code == 200
+    assert response.json()["count"] == 12
+
+
+def test_delete_events_in_range(mock_event_service):
+    mock_event_service.delete_events.return_value = {"count": 3, "dry_run": True}
+
+    response = client.delete("/api/events?start=2023-01-01T00:00:00&end=2023-02-01T00:00:00&dry_run=true")
+
+    assert response.status_code == 200
+    assert response.json() == {"count": 3, "dry_run": True}
+    args, kwargs = mock_event_service.delete_events.call_args
+    assert kwargs["dry_run"] is True
+    assert isinstance(kwargs["start"], datetime)
+
+
+def test_delete_events_requires_range(mock_event_service):
+    response = client.delete("/api/events")
+
+    assert response.status_code == 422
+    mock_event_service.delete_events.assert_not_called()
+
+
+def test_update_events_in_range(mock_event_service):
+    mock_event_service.update_events.return_value = {"count": 4, "dry_run": False}
+
+    response = client.patch("/api/events", json={
+        "start": "2023-01-01T00:00:00",
+        "end": "2023-02-01T00:00:00",
+        "shift_by_seconds": 3600
+    })
+
+    assert response.status_code == 200
+    assert response.json()["count"] == 4
+
+
+def test_update_events_without_changes(mock_event_service):
+    response = client.patch("/api/events", json={
+        "start": "2023-01-01T00:00:00",
+        "end": "2023-02-01T00:00:00"
+    })
+
+    assert response.status_code == 422
+    mock_event_service.update_events.assert_not_called()
+
+
+def test_export_events(mock_event_service):
+    mock_event_service.export_events.return_value = iter([b'{"id": "1"}\n', b'{"id": "2"}\n'])
+
+    response = client.get("/api/events/export?format=ndjson")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    assert response.content == b'{"id": "1"}\n{"id": "2"}\n'
+
+
+def test_export_events_unknown_format(mock_event_service):
+    response = client.get("/api/events/export?format=xml")
+
+    assert response.status_code == 422
+
+
+def test_import_events(mock_event_service):
+    mock_event_service.import_events.return_value = 2
+
+    response = client.post("/api/events/import?format=csv", content=b"id,at,name,importance\n")
+
+    assert response.status_code == 200
+    assert response.json()["count"] == 2
+    args, kwargs = mock_event_service.import_events.call_args
+    assert args[1] == "csv"
+
+
+def test_import_events_malformed_row(mock_event_service):
+    mock_event_service.import_events.side_effect = TypeError("Le paramètre 'at' doit être une instance de datetime.datetime")
+
+    response = client.post("/api/events/import?format=ndjson", content=b'{"at": 5, "name": "A", "importance": "haute"}\n')
+
+    assert response.status_code == 400
+    assert "Fichier d'import invalide" in response.json()["detail"]
+
+
+def test_get_next_events(mock_event_service):
+    now = datetime.now()
+    mock_event_service.get_next_events.return_value = [
+        {"id": "1", "name": "Next", "importance": "haute", "at": now, "created_at": now, "updated_at": None}
+    ]
+
+    response = client.get("/api/events/next?after=2023-01-01T00:00:00&n=1&importance=haute")
+
+    assert response.status_code == 200
+    assert response.json()["items"][0]["id"] == "1"
+    args, kwargs = mock_event_service.get_next_events.call_args
+    assert args == (datetime(2023, 1, 1), 1)
+    assert kwargs["importance"] == "haute"
+
+
+def test_get_previous_and_nearest_events(mock_event_service):
+    mock_event_service.get_previous_events.return_value = []
+    mock_event_service.get_nearest_events.return_value = []
+
+    assert client.get("/api/events/previous?before=2023-01-01T00:00:00").json() == {"items": [], "total": 0}
+    assert client.get("/api/events/nearest?at=2023-01-01T00:00:00&n=5").status_code == 200
+    assert mock_event_service.get_nearest_events.call_args[0][1] == 5
+    mock_event_service.get_event_by_id.assert_not_called()
+
+
+def test_nearest_events_validation(mock_event_service):
+    assert client.get("/api/events/next").status_code == 422
+    assert client.get("/api/events/nearest?at=2023-01-01T00:00:00&n=0").status_code == 422
+    assert client.get("/api/events/nearest?at=2023-01-01T00:00:00&n=100000").status_code == 422
+
+
+def test_get_overlapping_events(mock_event_service):
+    mock_event_service.get_overlapping_events.return_value = [{
+        "id": "1",
+        "name": "Maintenance",
+        "importance": "haute",
+        "at": datetime(2023, 1, 1, 22),
+        "end_at": datetime(2023, 1, 2, 2),
+        "created_at": datetime(2023, 1, 1, 22),
+        "updated_at": None
+    }]
+
+    response = client.get("/api/events/overlapping?start=2023-01-02T00:00:00&end=2023-01-02T06:00:00")
+
+    assert response.status_code == 200
+    assert response.json()["items"][0]["end_at"] == "2023-01-02T02:00:00"
+    assert mock_event_service.get_overlapping_events.call_args[0] == (datetime(2023, 1, 2), datetime(2023, 1, 2, 6))
+
+
+def test_create_event_with_invalid_interval(mock_event_service):
+    mock_event_service.create_event.side_effect = ValueError("La date de fin 'end_at' doit être postérieure ou égale à 'at'")
+
+    response = client.post("/api/events", json={
+        "name": "Maintenance",
+        "importance": "haute",
+        "at": "2023-01-02T00:00:00",
+        "end_at": "2023-01-01T00:00:00"
+    })
+
+    assert response.status_code == 422
+    assert mock_event_service.create_event.call_args[0][0].end_at == datetime(2023, 1, 1)
+
+
+def test_get_stats(mock_event_service):
+    mock_event_service.get_stats.return_value = {
+        "total": 3,
+        "first": datetime(2023, 1, 1, 8),
+        "last": datetime(2023, 1, 2, 9),
+        "by_importance": {"haute": 2, "basse": 1},
+        "per_day": [{"day": "2023-01-01", "count": 2}, {"day": "2023-01-02", "count": 1}]
+    }
+
+    response = client.get("/api/events/stats?start=2023-01-01T00:00:00")
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["by_importance"] == {"haute": 2, "basse": 1}
+    assert data["per_day"][0] == {"day": "2023-01-01", "count": 2}
+    assert response.headers["Cache-Control"].startswith("private, max-age=")
+    assert mock_event_service.get_stats.call_args[1] == {"start": datetime(2023, 1, 1), "end": None}
+
+
+def test_get_calendar(mock_event_service):
+    mock_event_service.get_calendar.return_value = {
+        "year": 2024,
+        "month": 3,
+        "tz": "Europe/Paris",
+        "days": [{
+            "day": "2024-03-05",
+            "total": 12,
+            "more": 10,
+            "events": [
+                {"id": "1", "name": "Incident", "importance": "critique", "at": datetime(2024, 3, 5, 10),
+                 "created_at": datetime(2024, 3, 5, 10), "updated_at": None},
+                {"id": "2", "name": "Revue", "importance": "haute", "at": datetime(2024, 3, 5, 11),
+                 "created_at": datetime(2024, 3, 5, 11), "updated_at": None}
+            ]
+        }]
+    }
+
+    response = client.get("/api/events/calendar?year=2024&month=3&per_day=2&tz=Europe/Paris")
+
+    assert response.status_code == 200
+    day = response.json()["days"][0]
+    assert (day["total"], day["more"], len(day["events"])) == (12, 10, 2)
+    args, kwargs = mock_event_service.get_calendar.call_args
+    assert args == (2024, 3)
+    assert kwargs == {"per_day": 2, "tz": "Europe/Paris"}
+
+
+def test_get_calendar_validation(mock_event_service):
+    mock_event_service.get_calendar.side_effect = ValueError("Fuseau horaire inconnu: 'Mars/Olympus'")
+
+    assert client.get("/api/events/calendar?year=2024&month=13").status_code == 422
+    assert client.get("/api/events/calendar?year=2024&month=3&tz=Mars/Olympus").status_code == 422
+
+
+def test_batch_get_events(mock_event_service):
+    mock_event_service.get_events_by_ids.return_value = [
+        None,
+        {"id": "2", "name": "Revue", "importance": "haute", "at": datetime(2024, 3, 5, 11),
+         "created_at": datetime(2024, 3, 5, 11), "updated_at": None}
+    ]
+
+    response = client.post("/api/events/batch-get", json={"ids": ["1", "2"]})
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["found"] == 1
+    assert data["items"][0] is None
+    assert data["items"][1]["name"] == "Revue"
+    mock_event_service.get_events_by_ids.assert_called_once_with(["1", "2"])
+
+
+def test_apply_batch(mock_event_service):
+    mock_event_service.apply_batch.return_value = {
+        "results": [
+            {"index": 0, "op": "create", "status": "created", "id": "3",
+             "event": {"id": "3", "name": "Nouveau", "importance": "normal", "at": datetime(2024, 3, 6),
+                       "created_at": datetime(2024, 3, 6), "updated_at": None}},
+            {"index": 1, "op": "delete", "status": "not_found", "id": "9"}
+        ],
+        "counts": {"created": 1, "not_found": 1}
+    }
+
+    response = client.post("/api/events/batch", json={"operations": [
+        {"op": "create", "name": "Nouveau", "at": "2024-03-06T00:00:00"},
+        {"op": "delete", "id": "9"}
+    ]})
+
+    assert response.status_code == 200
+    data = response.json()
+    assert [result["status"] for result in data["results"]] == ["created", "not_found"]
+    assert data["results"][0]["event"]["id"] == "3"
+    operations = mock_event_service.apply_batch.call_args[0][0]
+    assert [(operation.op, operation.id) for operation in operations] == [("create", None), ("delete", "9")]
+
+
+def test_batch_size_is_limited(mock_event_service):
+    response = client.post("/api/events/batch-get", json={"ids": [str(i) for i in range(1001)]})
+
+    assert response.status_code == 422
+    mock_event_service.get_events_by_ids.assert_not_called()
@@ -0,0 +1,31 @@
+import time
+
+from services.cache import TTLCache
+
+
+def test_value_is_reused_until_expiry():
+    cache = TTLCache(ttl=0.05)
+    values = iter([1, 2])
+
+    assert cache.get_or_compute("key", lambda: next(values)) == 1
+    assert cache.get_or_compute("key", lambda: next(values)) == 1
+    time.sleep(0.06)
+    assert cache.get_or_compute("key", lambda: next(values)) == 2
+    assert cache.stats() == {"size": 1, "hits": 1, "misses": 2}
+
+
+def test_size_is_bounded():
+    cache = TTLCache(ttl=60, max_size=2)
+    for key in ("a", "b", "c"):
+        cache.get_or_compute(key, lambda: key)
+
+    assert cache.stats()["size"] == 2
+    assert cache.get_or_compute("a", lambda: "recalculé") == "recalculé"
+
+
+def test_zero_ttl_disables_cache():
+    cache = TTLCache(ttl=0)
+    values = iter([1, 2])
+
+    assert cache.get_or_compute("key", lambda: next(values)) == 1
+    assert cache.get_or_compute("key", lambda: next(values)) == 2
@@ -0,0 +1,116 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from pymongo.errors import ServerSelectionTimeoutError
+
+from datetime_event_store.activity import record_reply
+
+from middleware.admission import WRITE
+from middleware.circuit import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitBreakerMiddleware
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_client(breaker, exempt=()):
+    """
+    Crée une application dont les routes échouent tant que `backend["down"]` est vrai;
+    /api/events/cached répond sans interroger MongoDB.
+    """
+    backend = {"down": True, "calls": 0}
+    limited = FastAPI()
+    limited.add_middleware(CircuitBreakerMiddleware, breaker=breaker, exempt=exempt)
+
+    @limited.get("/api/events")
+    def read():
+        backend["calls"] += 1
+        if backend["down"]:
+            raise ServerSelectionTimeoutError("No servers found")
+        # Réponse de MongoDB, comptée par l'écouteur de commandes du store
+        record_reply()
+        return []
+
+    @limited.get("/api/events/cached")
+    def cached():
+        return {"cached": True}
+
+    @limited.post("/api/events")
+    def write():
+        backend["calls"] += 1
+        return {"spooled": True}
+
+    return TestClient(limited), backend
+
+
+def test_breaker_opens_after_consecutive_failures():
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10, clock=clock)
+    client, backend = make_client(breaker)
+
+    assert client.get("/api/events").status_code == 503
+    assert breaker.state == CLOSED
+    assert client.get("/api/events").status_code == 503
+    assert breaker.state == OPEN
+
+    clock.now = 4
+    response = client.get("/api/events")
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "6"
+    assert backend["calls"] == 2
+    assert breaker.metrics()["rejected"] == 1
+
+
+def test_half_open_probe_closes_or_reopens_the_breaker():
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10, clock=clock)
+    client, backend = make_client(breaker)
+    client.get("/api/events")
+
+    clock.now = 10
+    assert client.get("/api/events").status_code == 503
+    assert breaker.state == OPEN
+    assert breaker.metrics()["opened"] == 2
+
+    clock.now = 20
+    assert breaker.allow()
+    assert breaker.state == HALF_OPEN
+    assert not breaker.allow()
+    breaker.abandon()
+
+    backend["down"] = False
+    assert client.get("/api/events").status_code == 200
+    assert breaker.state == CLOSED
+    assert breaker.metrics()["consecutive_failures"] == 0
+
+
+def test_responses_served_without_mongodb_do_not_close_the_breaker():
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10, clock=clock)
+    client, backend = make_client(breaker)
+
+    client.get("/api/events")
+    assert client.get("/api/events/cached").status_code == 200
+    assert breaker.metrics()["consecutive_failures"] == 1
+    client.get("/api/events")
+    assert breaker.state == OPEN
+
+    clock.now = 10
+    assert client.get("/api/events/cached").status_code == 200
+    assert breaker.state == OPEN
+    assert client.get("/api/events").status_code == 503
+    assert backend["calls"] == 3
+
+
+def test_exempt_classes_and_other_routes_pass_through():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10)
+    client, backend = make_client(breaker, exempt={WRITE})
+    client.get("/api/events")
+
+    assert breaker.state == OPEN
+    assert client.post("/api/events").json() == {"spooled": True}
+    assert client.get("/").status_code == 404
@@ -0,0 +1,110 @@
+import threading
+
+import pytest
+
+from services.coalescing import SingleFlight
+
+
+def run_concurrently(flight, key, function, count):
+    """
+    Lance `count` appels de même clé, le premier bloquant jusqu'à ce que tous soient en attente.
+    """
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(flight.do(key, function)))
+        for _ in range(count)
+    ]
+    for thread in threads:
+        thread.start()
+    return threads, results
+
+
+def wait_for(condition):
+    for _ in range(500):
+        if condition():
+            return
+        threading.Event().wait(0.01)
+    raise AssertionError("condition non atteinte")
+
+
+def test_identical_calls_share_one_execution():
+    flight = SingleFlight()
+    release = threading.Event()
+    executions = []
+
+    def read():
+        executions.append(1)
+        release.wait(5)
+        return [1, 2, 3]
+
+    threads, results = run_concurrently(flight, ("get_events", 1), read, 5)
+    wait_for(lambda: flight.stats()["calls"] == 5)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert len(executions) == 1
+    assert results == [[1, 2, 3]] * 5
+    stats = flight.stats()
+    assert (stats["executions"], stats["coalesced"], stats["in_flight"]) == (1, 4, 0)
+
+
+def test_write_mid_flight_starts_a_new_flight():
+    flight = SingleFlight()
+    release = threading.Event()
+    values = iter(["avant", "après"])
+
+    def read():
+        value = next(values)
+        release.wait(5)
+        return value
+
+    first, first_results = run_concurrently(flight, "key", read, 1)
+    wait_for(lambda: flight.stats()["in_flight"] == 1)
+    with flight.write():
+        pass
+    second, second_results = run_concurrently(flight, "key", read, 1)
+    wait_for(lambda: flight.stats()["in_flight"] == 2)
+    release.set()
+    for thread in first + second:
+        thread.join(5)
+
+    assert first_results == ["avant"]
+    assert second_results == ["après"]
+    assert flight.stats()["coalesced"] == 0
+
+
+def test_error_is_propagated_to_every_caller():
+    flight = SingleFlight()
+    release = threading.Event()
+    errors = []
+
+    def failing():
+        release.wait(5)
+        raise ValueError("boom")
+
+    def call():
+        try:
+            flight.do("key", failing)
+        except ValueError as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=call) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    wait_for(lambda: flight.stats()["calls"] == 3)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert len(errors) == 3
+    with pytest.raises(KeyError):
+        flight.do("key", lambda: {}["missing"])
+
+
+def test_sequential_calls_are_not_cached():
+    flight = SingleFlight()
+    values = iter([1, 2])
+
+    assert flight.do("key", lambda: next(values)) == 1
+    assert flight.do("key", lambda: next(values)) == 2
@@ -0,0 +1,70 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from pymongo.errors import ExecutionTimeout
+
+from datetime_event_store.deadline import remaining
+
+from middleware.admission import LIST, READ
+from middleware.deadline import DeadlineBudgets, DeadlineMiddleware
+
+
+def make_client(budgets):
+    """
+    Crée une application dont les routes exposent l'échéance de la requête ou la dépassent.
+    """
+    limited = FastAPI()
+    limited.add_middleware(DeadlineMiddleware, budgets=budgets)
+
+    @limited.get("/api/events/{event_id}")
+    def read(event_id: str):
+        if event_id == "slow":
+            raise ExecutionTimeout("operation exceeded time limit", code=50)
+        return {"remaining": remaining()}
+
+    @limited.post("/api/events")
+    def write():
+        return {"remaining": remaining()}
+
+    return TestClient(limited)
+
+
+def test_budget_by_class_route_and_header():
+    budgets = DeadlineBudgets({LIST: 10000, READ: 2000}, routes={"export": 0})
+
+    assert budgets.seconds("GET", "/api/events") == 10
+    assert budgets.seconds("GET", "/api/events/abc") == 2
+    assert budgets.seconds("GET", "/api/events/abc", "500") == 0.5
+    assert budgets.seconds("GET", "/api/events/abc", "60000") == 2
+    assert budgets.seconds("GET", "/api/events/abc", "invalide") == 2
+    assert budgets.seconds("GET", "/api/events/export") is None
+    assert budgets.seconds("GET", "/api/events/export", "3000") == 3
+    assert budgets.seconds("POST", "/api/events", "1000") is None
+    assert budgets.seconds("GET", "/api/admin/metrics") is None
+    assert DeadlineBudgets({READ: 2000}, enabled=False).seconds("GET", "/api/events/abc") is None
+
+
+def test_request_runs_under_its_deadline():
+    client = make_client(DeadlineBudgets({READ: 2000}))
+
+    left = client.get("/api/events/abc", headers={"X-Request-Timeout-Ms": "500"}).json()["remaining"]
+    assert 0 < left <= 0.5
+    assert client.post("/api/events").json()["remaining"] is None
+
+
+def test_execution_timeout_is_mapped_to_504():
+    budgets = DeadlineBudgets({READ: 2000})
+    client = make_client(budgets)
+
+    response = client.get("/api/events/slow")
+
+    assert response.status_code == 504
+    assert response.json()["detail"] == "Délai de la requête dépassé"
+    assert budgets.metrics()["timeouts"] == 1
+
+
+def test_execution_timeout_without_deadline_is_not_mapped():
+    client = make_client(DeadlineBudgets({READ: 0}))
+
+    with pytest.raises(ExecutionTimeout):
+        client.get("/api/events/slow")
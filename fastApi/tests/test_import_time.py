@@ -0,0 +1,51 @@
+import collections
+import os
+import subprocess
+import sys
+
+APP_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+
+def _run(code: str) -> str:
+    env = {**os.environ, "EVENT_STORE_BACKEND": "mongodb"}
+    result = subprocess.run([sys.executable, "-c", code], cwd=APP_DIR, env=env,
+                            capture_output=True, text=True, check=True)
+    return result.stdout.strip()
+
+
+def test_app_import_does_not_open_the_store():
+    output = _run(
+        "import sys, main\n"
+        "from services import events\n"
+        "print(events.event_store.initialized, any(m.split('.')[0] in ('pymongo', 'bson') for m in sys.modules))"
+    )
+    assert output == "False False"
+
+
+def test_startup_without_background_tasks_does_not_open_the_store():
+    output = _run(
+        "from fastapi.testclient import TestClient\n"
+        "import main\n"
+        "from services import events\n"
+        "with TestClient(main.app) as client:\n"
+        "    client.get('/')\n"
+        "print(events.event_store.initialized)"
+    )
+    assert output == "False"
+
+
+def test_store_is_created_once_on_first_use():
+    from services.events import LazyEventStore
+
+    created = []
+
+    def factory():
+        created.append(object())
+        return collections.Counter(a=1)
+
+    store = LazyEventStore(factory)
+
+    assert not store.initialized
+    assert store.most_common() == [("a", 1)]
+    assert store.get() is store.get()
+    assert len(created) == 1
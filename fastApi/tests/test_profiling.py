@@ -0,0 +1,112 @@
+import time
+from datetime import datetime
+from unittest.mock import patch
+
+import pytest
+from bson import ObjectId
+from fastapi.testclient import TestClient
+
+from config import DEFAULT_API_SECRET_KEY, settings
+from main import app
+
+client = TestClient(app)
+
+API_KEY = "test-admin-key"
+AUTH = {"X-API-Key": API_KEY}
+
+
+@pytest.fixture(autouse=True)
+def api_key(monkeypatch):
+    monkeypatch.setattr(settings, "API_SECRET_KEY", API_KEY)
+
+
+@pytest.fixture
+def slow_event_service():
+    def slow_get_events(*args, **kwargs):
+        time.sleep(0.05)
+        return []
+
+    with patch("routers.events.events") as mock_service:
+        mock_service.get_events.side_effect = slow_get_events
+        yield mock_service
+
+
+def test_profile_returned_in_response(slow_event_service):
+    response = client.get("/api/events", headers={"X-Profile": "return", **AUTH})
+
+    assert response.status_code == 200
+    profile = response.json()
+    assert profile["status_code"] == 200
+    assert profile["path"] == "/api/events"
+    assert profile["samples"] > 0
+    assert "slow_get_events" in profile["stacks"]
+    assert response.headers["X-Profile-Id"] == profile["id"]
+
+
+def test_profile_stored_and_read_from_admin(slow_event_service):
+    response = client.get("/api/events", headers={"X-Profile": "1", **AUTH})
+
+    assert response.status_code == 200
+    assert response.json() == {"items": [], "total": 0}
+    profile_id = response.headers["X-Profile-Id"]
+
+    listed = client.get("/api/admin/profiles", headers=AUTH).json()["items"]
+    assert profile_id in [profile["id"] for profile in listed]
+
+    folded = client.get(f"/api/admin/profiles/{profile_id}?format=folded", headers=AUTH)
+    assert folded.status_code == 200
+    assert "slow_get_events" in folded.text
+    assert client.get(f"/api/admin/profiles/{profile_id}").status_code == 403
+
+
+def test_profiling_requires_valid_api_key(slow_event_service):
+    response = client.get("/api/events", headers={"X-Profile": "return", "X-API-Key": "wrong"})
+
+    assert response.status_code == 403
+    slow_event_service.get_events.assert_not_called()
+
+
+def test_unprofiled_requests_are_unchanged(slow_event_service):
+    response = client.get("/api/events")
+
+    assert response.status_code == 200
+    assert "X-Profile-Id" not in response.headers
+
+
+def test_slow_queries_endpoint():
+    entry = {
+        "at": datetime(2024, 1, 1),
+        "operation": "find",
+        "collection": "events",
+        "filter": {"_id": ObjectId("65e2f0a0c3b1a2d4e5f60718")},
+        "duration_ms": 250.0,
+        "docs_examined": 1000,
+        "keys_examined": 0,
+        "plan": {"stage": "COLLSCAN"},
+    }
+    with patch("services.events.event_store") as mock_store:
+        mock_store.slow_queries.threshold_ms = 200
+        mock_store.slow_queries.entries.return_value = [entry]
+
+        assert client.get("/api/admin/slow-queries").status_code == 403
+        response = client.get("/api/admin/slow-queries", headers=AUTH)
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["threshold_ms"] == 200
+    assert data["entries"][0]["filter"] == {"_id": "65e2f0a0c3b1a2d4e5f60718"}
+    assert data["entries"][0]["plan"] == {"stage": "COLLSCAN"}
+
+
+def test_admin_disabled_with_default_key(monkeypatch, slow_event_service):
+    monkeypatch.setattr(settings, "API_SECRET_KEY", DEFAULT_API_SECRET_KEY)
+    default_auth = {"X-API-Key": DEFAULT_API_SECRET_KEY}
+
+    for path in ("/api/admin/metrics", "/api/admin/profiles", "/api/admin/slow-queries"):
+        response = client.get(path, headers=default_auth)
+        assert response.status_code == 403
+        assert "désactivée" in response.json()["detail"]
+
+    response = client.get("/api/events", headers={"X-Profile": "return", **default_auth})
+    assert response.status_code == 403
+    assert slow_event_service.get_events.call_count == 0
@@ -1,15 +1,20 @@
 import pytest
-from datetime import datetime
+from datetime import datetime, timedelta
 from unittest.mock import patch, MagicMock
-from services.events import get_events, create_event, delete_event, get_event_by_id, update_event
-from models.event import EventCreate, EventUpdate
+from services.events import (
+    get_events, create_event, delete_event, get_event_by_id, update_event, count_events,
+    delete_events, update_events, get_stats, apply_batch
+)
+from datetime_event_store.approximate import ApproximateCount
+from models.event import BatchOperation, EventCreate, EventUpdate, EventBulkUpdate, SpooledWrite
 
 class MockEvent:
-    def __init__(self, at, name, importance, event_id=None):
+    def __init__(self, at, name, importance, event_id=None, end_at=None):
         self.at = at
         self.name = name
         self.importance = importance
         self.id = event_id
+        self.end_at = end_at
 
 @pytest.fixture
 def mock_event_store():
@@ -32,7 +37,7 @@ def test_get_events(mock_event_store):
     assert result[1].name == "Event 2"
     assert result[1].importance == "haute"
     
-    mock_event_store.get_events.assert_called_once_with(now, now)
+    mock_event_store.get_events.assert_called_once_with(now, now, sort="at", limit=None)
 
 def test_create_event(mock_event_store):
     now = datetime.now()
@@ -48,9 +53,30 @@ def test_create_event(mock_event_store):
     assert result.at == now
     
     mock_event_store.store_event.assert_called_once_with(
-        at=now, name="New Event", importance="critique"
+        at=now, name="New Event", importance="critique", end_at=None, idempotency_key=None
     )
 
+
+def test_create_event_with_idempotency_key(mock_event_store):
+    now = datetime.now()
+    mock_event_store.store_event.return_value = MockEvent(now, "New Event", "critique", "original-id")
+
+    result = create_event(EventCreate(name="New Event", importance="critique", at=now, idempotency_key="retry-1"))
+
+    assert result.id == "original-id"
+    assert mock_event_store.store_event.call_args.kwargs["idempotency_key"] == "retry-1"
+
+
+def test_create_event_spooled(mock_event_store):
+    now = datetime.now()
+    mock_event = MockEvent(now, "New Event", "critique", "new-id")
+    mock_event.spooled = True
+    mock_event_store.store_event.return_value = mock_event
+
+    result = create_event(EventCreate(name="New Event", importance="critique", at=now))
+
+    assert result == SpooledWrite(id="new-id", spooled=True)
+
 def test_delete_event(mock_event_store):
     event_id = "1"
     mock_event_store.delete_event.return_value = True
@@ -102,7 +128,8 @@ def test_update_event(mock_event_store):
         event_id=event_id,
         name="Updated Event",
         importance="haute",
-        at=None  
+        at=None,
+        end_at=None
     )
 
 def test_update_event_not_found(mock_event_store):
@@ -119,5 +146,94 @@ def test_update_event_not_found(mock_event_store):
         event_id=event_id,
         name="Updated Event",
         importance=None,
-        at=None
-    )
\ No newline at end of file
+        at=None,
+        end_at=None
+    )
+
+
+def test_count_events_approximate(mock_event_store):
+    mock_event_store.count_events.return_value = ApproximateCount(5000, error_bound=120)
+
+    result = count_events(approximate=True)
+
+    assert result.count == 5000
+    assert result.approximate is True
+    assert result.error_bound == 120
+
+    mock_event_store.count_events.assert_called_once_with(None, None, importance=None, approximate=True)
+
+
+def test_count_events_exact(mock_event_store):
+    mock_event_store.count_events.return_value = 7
+
+    result = count_events(start=datetime(2023, 1, 1), end=datetime(2023, 2, 1))
+
+    assert result.count == 7
+    assert result.approximate is False
+
+
+def test_delete_events(mock_event_store):
+    start = datetime(2023, 1, 1)
+    end = datetime(2023, 2, 1)
+    mock_event_store.delete_events.return_value = 8
+
+    result = delete_events(start, end, importance="basse")
+
+    assert result.count == 8
+    assert result.dry_run is False
+    mock_event_store.delete_events.assert_called_once_with(start, end, importance="basse", dry_run=False)
+
+
+def test_update_events_shift(mock_event_store):
+    start = datetime(2023, 1, 1)
+    end = datetime(2023, 2, 1)
+    mock_event_store.update_events.return_value = 2
+
+    result = update_events(EventBulkUpdate(start=start, end=end, shift_by_seconds=90))
+
+    assert result.count == 2
+    mock_event_store.update_events.assert_called_once_with(
+        start, end, importance=None, set_importance=None, shift_by=timedelta(seconds=90), dry_run=False
+    )
+
+
+def test_get_stats_is_cached_until_next_write(mock_event_store):
+    mock_event_store.stats.return_value = {
+        "total": 1,
+        "first": datetime(2023, 1, 1),
+        "last": datetime(2023, 1, 1),
+        "by_importance": {"haute": 1},
+        "per_day": {datetime(2023, 1, 1).date(): 1}
+    }
+    start = datetime(2023, 1, 1)
+
+    first = get_stats(start=start)
+    second = get_stats(start=start)
+    delete_event("1")
+    get_stats(start=start)
+
+    assert first.total == 1
+    assert second.per_day[0].count == 1
+    assert mock_event_store.stats.call_count == 2
+    mock_event_store.stats.assert_called_with(start, None)
+
+
+def test_apply_batch_converts_results(mock_event_store):
+    now = datetime(2024, 3, 6)
+    mock_event_store.apply_batch.return_value = [
+        {"index": 0, "op": "create", "status": "created", "id": "3",
+         "event": MockEvent(now, "Nouveau", "normal", "3"), "error": None},
+        {"index": 1, "op": "delete", "status": "not_found", "id": "9", "event": None, "error": None},
+    ]
+
+    result = apply_batch([
+        BatchOperation(op="create", name="Nouveau", at=now),
+        BatchOperation(op="delete", id="9"),
+    ])
+
+    assert result.results[0].event.name == "Nouveau"
+    assert result.counts == {"created": 1, "not_found": 1}
+    mock_event_store.apply_batch.assert_called_once_with([
+        {"op": "create", "name": "Nouveau", "at": now},
+        {"op": "delete", "id": "9"},
+    ])